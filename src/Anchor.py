@@ -3,6 +3,10 @@ import logging
 from typing import Tuple, List, Optional
 
 import numpy as np
+
+from Instrumentation import trace
+
+
 class Anchor:
     def __init__(self, flat_finder, rot, ta, logger: Optional[logging.Logger] = None):
         self.flat_finder = flat_finder
@@ -44,5 +48,6 @@ class Anchor:
 
         dxdy = self.ta.delta_xy(src, target_corner_point)
         self.ta.translate_puzzle_in_place(anchor_piece, dxdy)
+        trace.count("pieces_placed")
 
         return ang, dxdy
@@ -0,0 +1,110 @@
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+from typing import Callable, Optional, Sequence, Tuple
+
+import cv2 as cv
+import numpy as np
+
+
+class CameraCalibration:
+    """
+    Pixel → table (mm) mapping as a 3x3 homography.
+
+    The homography is computed once per camera setup (from a checkerboard
+    image or from reference markers with known table positions) and cached on
+    disk, keyed by the setup description. Applying it is a single
+    cv.perspectiveTransform call for any number of points.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, logger: Optional[logging.Logger] = None) -> None:
+        self.cache_dir = cache_dir
+        self.log = logger or logging.getLogger(__name__)
+        self.H: Optional[np.ndarray] = None
+
+    # ---------- cache ----------
+    @staticmethod
+    def setup_key(**setup) -> str:
+        """Stable key for a camera setup, e.g. setup_key(camera="top", size=(1252, 932))."""
+        payload = json.dumps(setup, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+    def _cache_path(self, key: str) -> Optional[str]:
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, f"homography_{key}.npy")
+
+    def load_or_compute(self, key: str, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """Return the cached homography for key, or compute and store it."""
+        path = self._cache_path(key)
+        if path is not None and os.path.exists(path):
+            self.H = np.load(path)
+            self.log.info(f"Kalibrierung aus Cache geladen: {path}")
+            return self.H
+
+        self.H = np.asarray(compute(), dtype=np.float64).reshape(3, 3)
+        if path is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            np.save(path, self.H)
+            self.log.info(f"Kalibrierung gespeichert: {path}")
+        return self.H
+
+    # ---------- homography sources ----------
+    @staticmethod
+    def homography_from_markers(pixel_pts: Sequence, mm_pts: Sequence) -> np.ndarray:
+        """Homography from >= 4 reference markers (pixel positions ↔ table positions in mm)."""
+        src = np.asarray(pixel_pts, dtype=np.float64).reshape(-1, 2)
+        dst = np.asarray(mm_pts, dtype=np.float64).reshape(-1, 2)
+        if len(src) < 4 or len(src) != len(dst):
+            raise ValueError("Mindestens 4 Punktpaare mit gleicher Anzahl nötig")
+        H, _ = cv.findHomography(src, dst, 0 if len(src) == 4 else cv.RANSAC)
+        if H is None:
+            raise ValueError("Homographie konnte nicht berechnet werden")
+        return H
+
+    @staticmethod
+    def homography_from_checkerboard(image, pattern_size: Tuple[int, int], square_mm: float,
+                                     origin_mm: Tuple[float, float] = (0.0, 0.0)) -> np.ndarray:
+        """
+        Homography from a checkerboard lying flat on the table.
+
+        pattern_size : inner corners (cols, rows)
+        square_mm    : edge length of one square
+        origin_mm    : table position of the first detected inner corner
+        The table Y axis points up (same convention as GlobalArea).
+        """
+        gray = image if image.ndim == 2 else cv.cvtColor(image, cv.COLOR_BGR2GRAY)
+        found, corners = cv.findChessboardCorners(gray, pattern_size)
+        if not found:
+            raise ValueError(f"Schachbrett {pattern_size} nicht gefunden")
+        criteria = (cv.TERM_CRITERIA_EPS + cv.TERM_CRITERIA_MAX_ITER, 30, 1e-3)
+        corners = cv.cornerSubPix(gray, corners, (11, 11), (-1, -1), criteria)
+
+        cols, rows = pattern_size
+        gx, gy = np.meshgrid(np.arange(cols), np.arange(rows))
+        mm = np.stack([origin_mm[0] + gx.ravel() * square_mm,
+                       origin_mm[1] - gy.ravel() * square_mm], axis=1)
+        return CameraCalibration.homography_from_markers(corners.reshape(-1, 2), mm)
+
+    @staticmethod
+    def homography_from_scale(ratio_x: float, ratio_y: float, offset: Tuple[float, float] = (0.0, 0.0),
+                              img_height: float = 964) -> np.ndarray:
+        """
+        Homography for a plain scale + Y flip + offset (the old hard-coded
+        pixels → mm conversion): x_mm = rx*x + ox, y_mm = ry*(img_height - y) + oy.
+        """
+        ox, oy = offset
+        return np.array([[ratio_x, 0.0, ox],
+                         [0.0, -ratio_y, ratio_y * img_height + oy],
+                         [0.0, 0.0, 1.0]], dtype=np.float64)
+
+    # ---------- apply ----------
+    def apply(self, points) -> np.ndarray:
+        """Map Nx2 (or Nx1x2) pixel points to mm; keeps the input shape."""
+        if self.H is None:
+            raise ValueError("Keine Homographie gesetzt")
+        arr = np.asarray(points, dtype=np.float32)
+        out = cv.perspectiveTransform(arr.reshape(-1, 1, 2), self.H)
+        return out.reshape(arr.shape)
@@ -0,0 +1,182 @@
+import cv2
+import numpy as np
+import os
+import shutil
+import tempfile
+
+# Mosaik aus vielen Einzelaufnahmen, ohne alle Bilder gleichzeitig im Speicher zu halten.
+# Die Leinwand liegt als np.memmap auf der Festplatte und wird Kachel für Kachel
+# beschrieben; die Einzelbilder werden nacheinander von der Festplatte gelesen.
+# Im RAM liegen so höchstens ein Einzelbild, seine Gewichtsmaske und eine Kachel.
+
+
+def grid_homographies(frame_size, rows, cols, cell_size=None, overlap=(0, 0)):
+    """
+    Homographien Einzelbild -> Mosaik für ein bekanntes Raster, Zeile für Zeile.
+
+    frame_size : (w, h) der Einzelbilder
+    cell_size  : (w, h) einer Rasterzelle im Mosaik, Standard = frame_size
+    overlap    : (x, y) Überlappung benachbarter Zellen in Mosaik-Pixeln
+    """
+    fw, fh = frame_size
+    cw, ch = cell_size or frame_size
+    sx, sy = cw / fw, ch / fh
+    homographies = []
+    for r in range(rows):
+        for c in range(cols):
+            tx = c * (cw - overlap[0])
+            ty = r * (ch - overlap[1])
+            homographies.append(np.array([[sx, 0, tx], [0, sy, ty], [0, 0, 1]], dtype=np.float64))
+    return homographies
+
+
+def _projected_corners(frame_size, H):
+    fw, fh = frame_size
+    corners = np.float32([[0, 0], [fw, 0], [fw, fh], [0, fh]]).reshape(-1, 1, 2)
+    return cv2.perspectiveTransform(corners, np.asarray(H, dtype=np.float64)).reshape(-1, 2)
+
+
+def mosaic_bounds(frame_sizes, homographies):
+    """
+    Grösse (w, h) der Leinwand, die alle projizierten Einzelbilder enthält, und die
+    Verschiebung, die links oben auf (0, 0) legt (vor die Homographien multiplizieren).
+    """
+    pts = np.vstack([_projected_corners(s, H) for s, H in zip(frame_sizes, homographies)])
+    x0, y0 = np.floor(pts.min(axis=0))
+    x1, y1 = np.ceil(pts.max(axis=0))
+    offset = np.array([[1, 0, -x0], [0, 1, -y0], [0, 0, 1]], dtype=np.float64)
+    return (int(x1 - x0), int(y1 - y0)), offset
+
+
+class MosaicBuilder:
+    """
+    Schreibt Einzelbilder über ihre Homographie (Bild -> Mosaik) in eine
+    memmap-Leinwand. Überlappungen werden mit einer Gewichtung gemischt, die
+    zum Bildrand hin abfällt (feather=False: gleichgewichteter Mittelwert).
+
+    Das Ergebnis ist eine .npy-Datei (np.load(out_path, mmap_mode="r")).
+    """
+
+    def __init__(self, size, out_path, tile=512, feather=True, work_dir=None):
+        self.width, self.height = int(size[0]), int(size[1])
+        self.tile = int(tile)
+        self.feather = feather
+        self.out_path = out_path
+        self.out = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.uint8,
+                                             shape=(self.height, self.width, 3))
+
+        # Summen und Gewichte ebenfalls auf der Festplatte
+        self._work_dir = tempfile.mkdtemp(prefix="mosaic_", dir=work_dir)
+        self._acc = np.memmap(os.path.join(self._work_dir, "acc.f32"), dtype=np.float32,
+                              mode="w+", shape=(self.height, self.width, 3))
+        self._wgt = np.memmap(os.path.join(self._work_dir, "wgt.f32"), dtype=np.float32,
+                              mode="w+", shape=(self.height, self.width))
+        self.frames = 0
+
+    def _weight(self, fw, fh):
+        if not self.feather:
+            return np.ones((fh, fw), dtype=np.float32)
+        wx = np.minimum(np.arange(fw) + 1, fw - np.arange(fw)).astype(np.float32) / (fw / 2)
+        wy = np.minimum(np.arange(fh) + 1, fh - np.arange(fh)).astype(np.float32) / (fh / 2)
+        return np.outer(wy, wx)
+
+    def _tiles(self, x0, y0, x1, y1):
+        t = self.tile
+        for ty in range((y0 // t) * t, y1, t):
+            for tx in range((x0 // t) * t, x1, t):
+                yield tx, ty, min(t, self.width - tx), min(t, self.height - ty)
+
+    def add(self, frame, H):
+        """Ein Einzelbild (Pfad oder Array) mit Homographie H (Bild -> Mosaik) einzeichnen."""
+        if isinstance(frame, str):
+            path = frame
+            frame = cv2.imread(path)
+            if frame is None:
+                raise IOError(f"Bild konnte nicht geladen werden: {path}")
+        H = np.asarray(H, dtype=np.float64)
+        fh, fw = frame.shape[:2]
+        weight = self._weight(fw, fh)
+
+        pts = _projected_corners((fw, fh), H)
+        x0, y0 = np.maximum(np.floor(pts.min(axis=0)).astype(int), 0)
+        x1 = min(int(np.ceil(pts[:, 0].max())), self.width)
+        y1 = min(int(np.ceil(pts[:, 1].max())), self.height)
+        if x1 <= x0 or y1 <= y0:
+            return 0
+
+        touched = 0
+        for tx, ty, tw, th in self._tiles(x0, y0, x1, y1):
+            # H in Kachelkoordinaten
+            T = np.array([[1, 0, -tx], [0, 1, -ty], [0, 0, 1]], dtype=np.float64) @ H
+            w = cv2.warpPerspective(weight, T, (tw, th), flags=cv2.INTER_LINEAR,
+                                    borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+            if not w.any():
+                continue
+            img = cv2.warpPerspective(frame, T, (tw, th), flags=cv2.INTER_LINEAR,
+                                      borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+            self._acc[ty:ty + th, tx:tx + tw] += img.astype(np.float32) * w[..., None]
+            self._wgt[ty:ty + th, tx:tx + tw] += w
+            touched += 1
+        self.frames += 1
+        return touched
+
+    def finalize(self):
+        """Summen durch Gewichte teilen, Streifen für Streifen, und Arbeitsdateien löschen."""
+        for ty in range(0, self.height, self.tile):
+            sl = slice(ty, min(ty + self.tile, self.height))
+            w = np.asarray(self._wgt[sl])
+            acc = np.asarray(self._acc[sl])
+            band = np.zeros(acc.shape, dtype=np.uint8)
+            covered = w > 0
+            band[covered] = np.clip(acc[covered] / w[covered][:, None] + 0.5, 0, 255).astype(np.uint8)
+            self.out[sl] = band
+        self.out.flush()
+
+        del self._acc, self._wgt
+        shutil.rmtree(self._work_dir, ignore_errors=True)
+        return self.out
+
+    def save_image(self, path):
+        # cv2.imwrite braucht das ganze Bild; die Seiten lädt das Betriebssystem nach Bedarf
+        cv2.imwrite(path, self.out)
+        return path
+
+
+def build_mosaic(paths, homographies, out_path, tile=512, feather=True, frame_sizes=None):
+    """
+    Mosaik aus Bilddateien mit bekannten Homographien (Raster oder geschätzt).
+    frame_sizes kann angegeben werden, sonst wird jede Datei einmal gelesen.
+    """
+    if frame_sizes is None:
+        frame_sizes = []
+        for p in paths:
+            img = cv2.imread(p)
+            if img is None:
+                raise IOError(f"Bild konnte nicht geladen werden: {p}")
+            frame_sizes.append((img.shape[1], img.shape[0]))
+            del img
+
+    size, offset = mosaic_bounds(frame_sizes, homographies)
+    builder = MosaicBuilder(size, out_path, tile=tile, feather=feather)
+    for p, H in zip(paths, homographies):
+        builder.add(p, offset @ np.asarray(H, dtype=np.float64))
+    builder.finalize()
+    return builder
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    images_dir = os.path.join(script_dir, "Images")
+
+    order = [6, 5, 4, 3, 2, 1]
+    paths = [os.path.join(images_dir, f"Stiching_{i}.jpg") for i in order]
+
+    # Gleiche Anordnung wie Combiner2.grid_2x3: 6 5 4 / 3 2 1, Zellbreite 400 px
+    frame_size = (964, 1280)
+    cell = (400, int(frame_size[1] * 400 / frame_size[0]))
+    homographies = grid_homographies(frame_size, rows=2, cols=3, cell_size=cell)
+
+    builder = build_mosaic(paths, homographies, os.path.join(images_dir, "mosaic_output.npy"),
+                           frame_sizes=[frame_size] * len(paths))
+    output_path = builder.save_image(os.path.join(images_dir, "mosaic_output.jpg"))
+    print("Gespeichert als:", output_path)
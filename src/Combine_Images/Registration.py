@@ -0,0 +1,328 @@
+import cv2
+import hashlib
+import json
+import logging
+import numpy as np
+import os
+
+# Registrierung der Einzelaufnahmen eines fest montierten Kamera-Rigs.
+# ORB-Merkmale werden auf verkleinerten Bildern gesucht, die paarweisen
+# Homographien auf volle Auflösung hochgerechnet und pro Rig auf der
+# Festplatte gespeichert. Spätere Läufe prüfen nur noch mit wenigen
+# Bildausschnitten, ob die gespeicherten Transformationen noch passen.
+# Findet ORB zu wenige Paare, kann cv2.Stitcher (SCANS) die Transformationen
+# liefern; sie werden genauso gespeichert und geprüft.
+
+
+class FrameRegistration:
+    """
+    Homographien Einzelbild -> Mosaik (Bezug: erstes Bild) für ein Kamera-Rig.
+
+    pairs        : Kanten (a, b) zwischen überlappenden Bildern, die vom Bild 0 aus
+                   alle Bilder erreichen; Standard ist die Kette (0,1), (1,2), ...
+    model        : "similarity" (Drehung, Skalierung, Verschiebung; für senkrecht auf den
+                   Tisch blickende Kameras), "affine" oder "homography". Bei schmalen
+                   Überlappungen ist eine volle Homographie schlecht bestimmt.
+    check_tol_px : erlaubte Abweichung der Prüfung, in Pixeln der verkleinerten Bilder
+
+    Gespeichert wird pro Bild eine Homographie "H"; Bilder, die (nur beim Stitcher)
+    nicht verbunden werden konnten, haben NaN und werden als None zurückgegeben.
+    """
+
+    MODELS = ("similarity", "affine", "homography")
+
+    def __init__(self, cache_dir=None, scale=0.25, n_features=2000, ratio=0.75,
+                 ransac_px=3.0, min_inliers=15, check_points=40, check_tol_px=1.5,
+                 model="similarity", logger=None):
+        if model not in self.MODELS:
+            raise ValueError(f"Unbekanntes Modell: {model}")
+        self.model = model
+        self.cache_dir = cache_dir
+        self.scale = float(scale)
+        self.n_features = n_features
+        self.ratio = ratio
+        self.ransac_px = ransac_px
+        self.min_inliers = min_inliers
+        self.check_points = check_points
+        self.check_tol_px = check_tol_px
+        self.log = logger or logging.getLogger(__name__)
+        # Anzahl vollständiger Registrierungen (ORB + RANSAC) dieses Objekts
+        self.registrations = 0
+
+    # ---------- cache ----------
+    @staticmethod
+    def rig_key(**rig):
+        """Stabiler Schlüssel für ein Rig, z.B. rig_key(name="tisch", frames=6, size=(964, 1280))."""
+        payload = json.dumps(rig, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+    def _cache_path(self, key):
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, f"registration_{key}.npz")
+
+    def _load(self, key):
+        path = self._cache_path(key)
+        if path is None or not os.path.exists(path):
+            return None
+        data = np.load(path)
+        return {k: data[k] for k in data.files}
+
+    def _save(self, key, reg):
+        path = self._cache_path(key)
+        if path is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        np.savez(path, **reg)
+        self.log.info(f"Registrierung gespeichert: {path}")
+
+    # ---------- small frames ----------
+    def _small(self, frame):
+        """Graustufen, verkleinert; bei Pfaden wird das volle Bild gleich wieder verworfen."""
+        if isinstance(frame, str):
+            path = frame
+            frame = cv2.imread(path)
+            if frame is None:
+                raise IOError(f"Bild konnte nicht geladen werden: {path}")
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        return small, (gray.shape[1], gray.shape[0])
+
+    def _to_full(self, H_small):
+        S = np.diag([self.scale, self.scale, 1.0])
+        return np.linalg.inv(S) @ H_small @ S
+
+    def _to_small(self, H_full):
+        S = np.diag([self.scale, self.scale, 1.0])
+        return S @ H_full @ np.linalg.inv(S)
+
+    # ---------- registration ----------
+    def _pairwise(self, small_a, small_b):
+        """Transformation b -> a (3x3) auf den kleinen Bildern und die Inlier-Punkte in a."""
+        orb = cv2.ORB_create(nfeatures=self.n_features)
+        ka, da = orb.detectAndCompute(small_a, None)
+        kb, db = orb.detectAndCompute(small_b, None)
+        if da is None or db is None:
+            raise ValueError("Keine ORB-Merkmale gefunden")
+
+        matcher = cv2.BFMatcher(cv2.NORM_HAMMING)
+        good = [m[0] for m in matcher.knnMatch(db, da, k=2)
+                if len(m) == 2 and m[0].distance < self.ratio * m[1].distance]
+        if len(good) < self.min_inliers:
+            raise ValueError(f"Zu wenige Merkmalspaare ({len(good)})")
+
+        src = np.float32([kb[m.queryIdx].pt for m in good])
+        dst = np.float32([ka[m.trainIdx].pt for m in good])
+        if self.model == "homography":
+            H, mask = cv2.findHomography(src, dst, cv2.RANSAC, self.ransac_px)
+        else:
+            estimate = cv2.estimateAffinePartial2D if self.model == "similarity" else cv2.estimateAffine2D
+            A, mask = estimate(src, dst, method=cv2.RANSAC, ransacReprojThreshold=self.ransac_px)
+            H = None if A is None else np.vstack([A, [0, 0, 1]])
+        if H is None or int(mask.sum()) < self.min_inliers:
+            raise ValueError("Homographie konnte nicht geschätzt werden")
+        return H, dst[mask.ravel() > 0]
+
+    def _pairs(self, n, pairs):
+        return [tuple(p) for p in pairs] if pairs is not None else [(i, i + 1) for i in range(n - 1)]
+
+    def register(self, frames, pairs=None):
+        """Alle Bilder registrieren; gibt die Cache-Daten (inkl. Homographien "H") zurück."""
+        smalls, sizes = zip(*(self._small(f) for f in frames))
+        n = len(smalls)
+        pairs = self._pairs(n, pairs)
+
+        Hs = [None] * n
+        Hs[0] = np.eye(3)
+        check_pts = []
+        pending = list(pairs)
+        while pending:
+            progressed = False
+            for k, (a, b) in enumerate(pending):
+                if Hs[a] is None and Hs[b] is None:
+                    continue
+                if Hs[a] is None:
+                    a, b = b, a
+                H_ba, inliers = self._pairwise(smalls[a], smalls[b])
+                Hs[b] = Hs[a] @ self._to_full(H_ba)
+
+                # zufällige (reproduzierbare) Teilmenge der Inlier für die spätere Prüfung
+                pick = np.random.default_rng(0).permutation(len(inliers))[:self.check_points]
+                pts = inliers[pick]
+                check_pts.append(np.column_stack([np.full(len(pts), a), np.full(len(pts), b), pts]))
+                pending.pop(k)
+                progressed = True
+                break
+            if not progressed:
+                raise ValueError(f"Bilder ohne Verbindung zu Bild 0: {pending}")
+
+        self.registrations += 1
+        return {"H": np.stack(Hs), "sizes": np.array(sizes), "scale": np.array(self.scale),
+                "model": np.array(self.model),
+                "check": np.vstack(check_pts).astype(np.float32)}
+
+    def register_with_stitcher(self, frames, mode=cv2.Stitcher_SCANS, seed=0):
+        """
+        Transformationen mit cv2.Stitcher schätzen (Standard: SCANS, affin für flache
+        Vorlagen); langsamer, findet aber auch bei wenig Struktur noch Paare.
+        Mit festem seed wählt der Stitcher bei jedem Lauf dieselben Bilder.
+        Bezug ist das erste verbundene Bild; nicht verbundene Bilder bekommen NaN.
+        """
+        images = [cv2.imread(f) if isinstance(f, str) else f for f in frames]
+        if any(img is None for img in images):
+            raise IOError("Bild konnte nicht geladen werden")
+        cv2.setRNGSeed(seed)
+        stitcher = cv2.Stitcher.create(mode)
+        status = stitcher.estimateTransform(images)
+        if status != cv2.Stitcher_OK:
+            raise ValueError(f"Stitcher fehlgeschlagen, Status {status}")
+
+        # CameraParams.R bildet (in Arbeitsauflösung) Mosaik -> Bild ab
+        S = np.diag([stitcher.workScale(), stitcher.workScale(), 1.0])
+        component = [int(i) for i in stitcher.component()]
+        to_mosaic = {i: np.linalg.inv(np.linalg.inv(S) @ np.asarray(cam.R, np.float64) @ S)
+                     for i, cam in zip(component, stitcher.cameras())}
+        ref = np.linalg.inv(to_mosaic[component[0]])
+        Hs = np.full((len(images), 3, 3), np.nan)
+        for i, H in to_mosaic.items():
+            Hs[i] = ref @ H
+
+        smalls, sizes = zip(*(self._small(img) for img in images))
+        check_pts = [self._check_points(smalls[a], smalls[b], Hs[a], Hs[b], a, b)
+                     for k, a in enumerate(component) for b in component[k + 1:]]
+        check_pts = [c for c in check_pts if len(c)]
+        if not check_pts:
+            raise ValueError("Stitcher: keine überlappenden Bilder")
+
+        self.registrations += 1
+        self.log.info(f"Stitcher hat {len(component)} von {len(images)} Bildern verbunden: {component}")
+        return {"H": Hs, "sizes": np.array(sizes), "scale": np.array(self.scale),
+                "model": np.array("stitcher"),
+                "check": np.vstack(check_pts).astype(np.float32)}
+
+    def _check_points(self, small_a, small_b, H_a, H_b, a, b):
+        """
+        Prüfpunkte für consistent(): markante Stellen von a im Überlapp mit b, an
+        denen die Transformation jetzt schon passt (wie die RANSAC-Inlier bei ORB).
+        """
+        H_ba = self._to_small(np.linalg.inv(H_a) @ H_b)
+        size = (small_a.shape[1], small_a.shape[0])
+        overlap = cv2.warpPerspective(np.full(small_b.shape, 255, np.uint8), H_ba, size)
+        overlap = cv2.erode(overlap, np.ones((15, 15), np.uint8))
+        pts = cv2.goodFeaturesToTrack(small_a, 4 * self.check_points, 0.01, 5, mask=overlap)
+        if pts is None:
+            return np.empty((0, 4))
+        warped = cv2.warpPerspective(small_b, H_ba, size)
+        pts = [p for p in pts.reshape(-1, 2) if self._point_ok(small_a, warped, p)][:self.check_points]
+        if len(pts) < 3:
+            return np.empty((0, 4))
+        pts = np.array(pts)
+        return np.column_stack([np.full(len(pts), a), np.full(len(pts), b), pts])
+
+    # ---------- consistency ----------
+    def consistent(self, frames, reg, smalls=None):
+        """
+        Günstige Prüfung: b wird (klein) mit der gespeicherten Transformation auf a
+        abgebildet; Ausschnitte von a an den gespeicherten Inlier-Punkten werden im
+        abgebildeten b gesucht. Passt die Transformation, liegt der Treffer an der
+        erwarteten Stelle. Jedes Bildpaar muss die Prüfung bestehen.
+        """
+        if smalls is None:
+            smalls = [self._small(f)[0] for f in frames]
+        if len(smalls) != len(reg["H"]) or len(reg["check"]) == 0:
+            return False
+        Hs = reg["H"]
+
+        for a, b in {(int(c[0]), int(c[1])) for c in reg["check"]}:
+            sa, sb = smalls[a], smalls[b]
+            H_ba = self._to_small(np.linalg.inv(Hs[a]) @ Hs[b])
+            warped = cv2.warpPerspective(sb, H_ba, (sa.shape[1], sa.shape[0]))
+            pts = reg["check"][(reg["check"][:, 0] == a) & (reg["check"][:, 1] == b)][:, 2:]
+
+            ok = [o for o in (self._point_ok(sa, warped, p) for p in pts) if o is not None]
+            if len(ok) < 3 or np.mean(ok) < 0.6:
+                self.log.info(f"Prüfung Bildpaar ({a}, {b}) fehlgeschlagen: {sum(ok)}/{len(ok)}")
+                return False
+        return True
+
+    def _point_ok(self, small_a, warped_b, pt, r=7, margin=6):
+        """Ausschnitt von a um pt im abgebildeten b an der erwarteten Stelle? None: nicht prüfbar."""
+        x, y = np.round(pt).astype(int)
+        y0, y1, x0, x1 = y - r - margin, y + r + margin + 1, x - r - margin, x + r + margin + 1
+        if y0 < 0 or x0 < 0 or y1 > small_a.shape[0] or x1 > small_a.shape[1]:
+            return None
+        patch = small_a[y - r:y + r + 1, x - r:x + r + 1]
+        if patch.std() < 4:  # kein Inhalt mehr an dieser Stelle
+            return None
+        res = cv2.matchTemplate(warped_b[y0:y1, x0:x1], patch, cv2.TM_CCOEFF_NORMED)
+        _, score, _, loc = cv2.minMaxLoc(res)
+        return score >= 0.6 and np.hypot(loc[0] - margin, loc[1] - margin) <= self.check_tol_px
+
+    def load_or_register(self, key, frames, pairs=None, fallback=False):
+        """
+        Gespeicherte Homographien des Rigs verwenden, solange die Prüfung besteht.
+        Mit fallback=True wird bei fehlgeschlagener ORB-Registrierung
+        register_with_stitcher verwendet und ebenfalls gespeichert.
+        """
+        smalls = [self._small(f)[0] for f in frames]
+        reg = self._load(key)
+        if (reg is not None and float(reg["scale"]) == self.scale
+                and str(reg["model"]) in (self.model, "stitcher")
+                and self.consistent(frames, reg, smalls)):
+            self.log.info(f"Registrierung aus Cache verwendet ({key})")
+            return self._homographies(reg)
+        if reg is not None:
+            self.log.warning(f"Gespeicherte Registrierung passt nicht mehr, neu registrieren ({key})")
+
+        try:
+            reg = self.register(frames, pairs)
+        except ValueError as e:
+            if not fallback:
+                raise
+            self.log.warning(f"Registrierung fehlgeschlagen ({e}), verwende cv2.Stitcher (SCANS)")
+            reg = self.register_with_stitcher(frames)
+        self._save(key, reg)
+        return self._homographies(reg)
+
+    @staticmethod
+    def _homographies(reg):
+        return [None if np.isnan(H).any() else H for H in reg["H"]]
+
+
+def stitch_registered(paths, out_path, key, cache_dir=None, pairs=None, tile=512, registration=None,
+                      fallback=True):
+    """
+    Registrieren (oder Cache) und die vollen Bilder mit MosaicBuilder zusammensetzen.
+    Mit fallback=True übernimmt cv2.Stitcher die Registrierung, wenn ORB fehlschlägt;
+    Bilder, die er nicht verbinden kann, fehlen im Mosaik.
+    """
+    try:
+        from .MosaicBuilder import build_mosaic
+    except ImportError:
+        from MosaicBuilder import build_mosaic
+
+    registration = registration or FrameRegistration(cache_dir=cache_dir)
+    Hs = registration.load_or_register(key, paths, pairs, fallback=fallback)
+    used = [(p, H) for p, H in zip(paths, Hs) if H is not None]
+    return build_mosaic([p for p, _ in used], [H for _, H in used], out_path, tile=tile)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    images_dir = os.path.join(script_dir, "Images")
+
+    order = [6, 5, 4, 3, 2, 1]
+    paths = [os.path.join(images_dir, f"Stiching_{i}.jpg") for i in order]
+
+    # 6 5 4 / 3 2 1: Nachbarn in der Zeile und senkrecht darunter
+    pairs = [(0, 1), (1, 2), (0, 3), (3, 4), (4, 5)]
+    key = FrameRegistration.rig_key(frames=[os.path.basename(p) for p in paths], pairs=pairs)
+    try:
+        builder = stitch_registered(paths, os.path.join(images_dir, "registered_output.npy"), key,
+                                    cache_dir=os.path.join(script_dir, "../../.registration"), pairs=pairs)
+    except ValueError as e:
+        print("Zusammensetzen fehlgeschlagen:", e)
+    else:
+        output_path = builder.save_image(os.path.join(images_dir, "registered_output.jpg"))
+        print("Gespeichert als:", output_path)
@@ -1,7 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from typing import Tuple, Optional, List
-import matplotlib.pyplot as plt
 import numpy as np
 from puzzle import Puzzle
 
@@ -32,6 +31,182 @@ class Rect:
         return self.y + self.h
 
 
+class PackedContours:
+    """
+    All contours and corners of one area in contiguous float32 buffers.
+
+      points  : (N, 2)    contour points of all pieces, back to back
+      offsets : (P + 1,)  piece i owns points[offsets[i]:offsets[i + 1]]
+      corners : (P, 4, 2) corners per piece, order [TL, TR, BR, BL]
+
+    Puzzle.contour and Puzzle.corners are bound as views into these buffers,
+    so scale/translate/rotate run as one NumPy operation for the whole area
+    and every piece sees the result without copying.
+    """
+
+    def __init__(self, points=None, offsets=None, corners=None) -> None:
+        self.points = np.empty((0, 2), np.float32) if points is None else points
+        self.offsets = np.zeros(1, np.int64) if offsets is None else offsets
+        n = len(self.offsets) - 1
+        self.corners = np.zeros((n, 4, 2), np.float32) if corners is None else corners
+        self._piece_ids = None
+
+    @classmethod
+    def pack(cls, contours) -> "PackedContours":
+        """Copy a list of contours (Nx2 or Nx1x2) into one packed buffer."""
+        arrays = [np.asarray(c).reshape(-1, 2) for c in contours]
+        offsets = np.zeros(len(arrays) + 1, np.int64)
+        offsets[1:] = np.cumsum([len(a) for a in arrays])
+        if arrays:
+            points = np.concatenate(arrays).astype(np.float32)
+        else:
+            points = np.empty((0, 2), np.float32)
+        return cls(points, offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def piece_ids(self) -> np.ndarray:
+        """(N,) index of the piece each point belongs to."""
+        if self._piece_ids is None:
+            self._piece_ids = np.repeat(np.arange(len(self)), np.diff(self.offsets))
+        return self._piece_ids
+
+    def contour(self, i: int) -> np.ndarray:
+        """(n_i, 1, 2) view of contour i (OpenCV layout)."""
+        return self.points[self.offsets[i]:self.offsets[i + 1]].reshape(-1, 1, 2)
+
+    # ---------- binding to Puzzle objects ----------
+    def bind(self, puzzles) -> None:
+        """Point contour/corners of every puzzle to its slice of the buffers."""
+        for i, p in enumerate(puzzles):
+            p.contour = self.contour(i)
+            p.corners = self.corners[i]
+
+    def _is_bound(self, p, i: int) -> bool:
+        cnt, crn = p.contour, p.corners
+        return (isinstance(cnt, np.ndarray) and cnt.base is self.points
+                and cnt.size == 2 * (self.offsets[i + 1] - self.offsets[i])
+                and isinstance(crn, np.ndarray) and crn.base is self.corners)
+
+    def _repack(self, puzzles) -> None:
+        fresh = PackedContours.pack([p.contour for p in puzzles])
+        for i, p in enumerate(puzzles):
+            fresh.corners[i] = np.asarray(p.corners, dtype=np.float32).reshape(4, 2)
+        self.__dict__.update(fresh.__dict__)
+        self.bind(puzzles)
+
+    def sync(self, puzzles) -> None:
+        """
+        Pull back pieces whose contour/corners were replaced by a new array
+        (e.g. Rotation.rotate_puzzle_in_place) so the buffer is current again.
+        """
+        if len(puzzles) != len(self):
+            self._repack(puzzles)
+            return
+
+        for i, p in enumerate(puzzles):
+            if self._is_bound(p, i):
+                continue
+            pts = np.asarray(p.contour, dtype=np.float32).reshape(-1, 2)
+            if len(pts) != self.offsets[i + 1] - self.offsets[i]:
+                # Point count changed -> rebuild the whole buffer once
+                self._repack(puzzles)
+                return
+            self.points[self.offsets[i]:self.offsets[i + 1]] = pts
+            self.corners[i] = np.asarray(p.corners, dtype=np.float32).reshape(4, 2)
+            p.contour = self.contour(i)
+            p.corners = self.corners[i]
+
+    # ---------- per piece geometry (vectorized) ----------
+    def _signed_cross(self):
+        """Shoelace terms x_i*y_{i+1} - x_{i+1}*y_i with wrap-around per piece."""
+        pts = self.points.astype(np.float64)
+        nxt_idx = np.arange(len(pts)) + 1
+        nxt_idx[self.offsets[1:] - 1] = self.offsets[:-1]
+        nxt = pts[nxt_idx]
+        cross = pts[:, 0] * nxt[:, 1] - nxt[:, 0] * pts[:, 1]
+        return pts, nxt, cross
+
+    def _reduce(self, values) -> np.ndarray:
+        counts = np.diff(self.offsets)
+        out = np.zeros((len(self),) + values.shape[1:], dtype=values.dtype)
+        nonempty = counts > 0
+        if np.any(nonempty):
+            out[nonempty] = np.add.reduceat(values, self.offsets[:-1][nonempty], axis=0)
+        return out
+
+    def areas(self) -> np.ndarray:
+        """(P,) polygon area per piece (same as cv.contourArea)."""
+        _, _, cross = self._signed_cross()
+        return np.abs(0.5 * self._reduce(cross))
+
+    def centroids(self) -> np.ndarray:
+        """(P, 2) area centroid per piece (same as cv.moments m10/m00, m01/m00)."""
+        pts, nxt, cross = self._signed_cross()
+        a2 = self._reduce(cross)                      # 2 * signed area
+        sx = self._reduce((pts[:, 0] + nxt[:, 0]) * cross)
+        sy = self._reduce((pts[:, 1] + nxt[:, 1]) * cross)
+        out = np.zeros((len(self), 2))
+        ok = np.abs(a2) > 1e-12
+        out[ok, 0] = sx[ok] / (3.0 * a2[ok])
+        out[ok, 1] = sy[ok] / (3.0 * a2[ok])
+        return out
+
+    def bounding_boxes(self) -> np.ndarray:
+        """(P, 4) integer (x, y, w, h) per piece like cv.boundingRect."""
+        out = np.zeros((len(self), 4), np.int64)
+        counts = np.diff(self.offsets)
+        nonempty = counts > 0
+        if not np.any(nonempty):
+            return out
+        starts = self.offsets[:-1][nonempty]
+        lo = np.floor(np.minimum.reduceat(self.points, starts, axis=0)).astype(np.int64)
+        hi = np.floor(np.maximum.reduceat(self.points, starts, axis=0)).astype(np.int64)
+        out[nonempty, :2] = lo
+        out[nonempty, 2:] = hi - lo + 1
+        return out
+
+    # ---------- transforms (in place, whole area at once) ----------
+    def scale(self, ratio_x: float, ratio_y: float) -> None:
+        s = np.array([ratio_x, ratio_y], dtype=np.float32)
+        self.points *= s
+        self.corners *= s
+
+    def translate(self, dx: float, dy: float) -> None:
+        d = np.array([dx, dy], dtype=np.float32)
+        self.points += d
+        self.corners += d
+
+    def rotate(self, angles_deg, centers=None) -> None:
+        """Rotate piece i by angles_deg[i] around centers[i] (default: centroid)."""
+        n = len(self)
+        ang = np.deg2rad(np.broadcast_to(np.asarray(angles_deg, dtype=np.float64), (n,)))
+        ctr = self.centroids() if centers is None else np.asarray(centers, np.float64).reshape(n, 2)
+        c, s = np.cos(ang), np.sin(ang)
+        # (P, 2, 2) rotation matrices
+        rot = np.stack([np.stack([c, -s], -1), np.stack([s, c], -1)], -2).astype(np.float32)
+        ctr = ctr.astype(np.float32)
+
+        ids = self.piece_ids
+        rel = self.points - ctr[ids]
+        self.points[:] = np.einsum("nij,nj->ni", rot[ids], rel) + ctr[ids]
+
+        rel_c = self.corners - ctr[:, None, :]
+        self.corners[:] = np.einsum("pij,pkj->pki", rot, rel_c) + ctr[:, None, :]
+
+    def transform(self, H) -> None:
+        """Apply a 3x3 homography to all contour points and corners (one perspectiveTransform)."""
+        import cv2 as cv
+
+        n_pts = len(self.points)
+        both = np.concatenate([self.points, self.corners.reshape(-1, 2)]).reshape(-1, 1, 2)
+        out = cv.perspectiveTransform(both, np.asarray(H, dtype=np.float64)).reshape(-1, 2)
+        self.points[:] = out[:n_pts]
+        self.corners[:] = out[n_pts:].reshape(-1, 4, 2)
+
+
 class GlobalArea:
 
     """
@@ -48,7 +223,8 @@ class GlobalArea:
         area_unsolved: Optional["Rect"] = None,
         area_solved: Optional["Rect"] = None,
         *,
-        pixels_to_mm_ratio: Tuple[float, float] = (0.25, 0.25)
+        pixels_to_mm_ratio: Tuple[float, float] = (0.25, 0.25),
+        img_height: float = 964
     ) -> None:
         """
         Parameters
@@ -62,7 +238,9 @@ class GlobalArea:
         pixels_to_mm_ratio : (sx, sy), optional
             Pixel-to-mm scale factors if you want to convert image pixels
             to real-world millimeters. Example: (0.25, 0.25) means
-            each pixel equals 0.25 mm.
+            each pixel equals 0.25 mm. Used by default_homography().
+        img_height : float, optional
+            Image height in pixels, used to flip the Y axis on import.
         """
         # Default values if not provided
         if base is None:
@@ -77,8 +255,11 @@ class GlobalArea:
         self.area_unsolved = area_unsolved
         self.area_solved = area_solved
         self.ratiox, self.ratioy = pixels_to_mm_ratio
+        self.img_height = img_height
         self.unsolved_puzzles=[]
         self.solved_puzzles = []
+        self.unsolved_buffer = PackedContours()
+        self.solved_buffer = PackedContours()
 
     def _as_pts(self, contour):
         """Return (Nx2 float32 points, original_shape)."""
@@ -91,31 +272,44 @@ class GlobalArea:
         """Reshape Nx2 points back to original contour shape, float32 for OpenCV."""
         return np.asarray(pts, dtype=np.float32).reshape(orig_shape)
 
-        
-    # Import a copy of the puzzle pieces
-    def _import_puzzles(self, puzzles: List[Puzzle], target_list, img_height=964) -> None:
-        target_list.clear()
 
-        for p in puzzles:
-            orig = np.asarray(p.contour)
-            orig_shape = orig.shape
+    def _buffer_for(self, target_list) -> "PackedContours":
+        return self.solved_buffer if target_list is self.solved_puzzles else self.unsolved_buffer
 
-            # IMPORTANT: float32 for OpenCV contourArea
-            pts = orig.reshape(-1, 2).astype(np.float32).copy()
-            pts[:, 1] = np.float32(img_height) - pts[:, 1]   # invert Y
-
-            cnt_global = pts.reshape(orig_shape)  # keeps (N,1,2)
-            new_puzzle = Puzzle(cnt_global, p.index)
+    # Import a copy of the puzzle pieces
+    def _import_puzzles(self, puzzles: List[Puzzle], target_list, img_height=None) -> None:
+        target_list.clear()
+        if img_height is None:
+            img_height = self.img_height
+
+        # IMPORTANT: float32 for OpenCV contourArea
+        buf = PackedContours.pack([p.contour for p in puzzles])
+        buf.points[:, 1] = np.float32(img_height) - buf.points[:, 1]   # invert Y
+
+        # Area, bounding box and centroid of every piece in one pass over the buffer
+        areas = buf.areas()
+        boxes = buf.bounding_boxes()
+        centers = buf.centroids()
+
+        for i, p in enumerate(puzzles):
+            cx, cy = centers[i]
+            new_puzzle = Puzzle.from_geometry(
+                buf.contour(i), p.index,
+                area=float(areas[i]),
+                bounding_box=tuple(int(v) for v in boxes[i]),
+                center_point=(int(cx), int(cy)),
+            )
             #The [::-1] reverses the list of corners to match the order of the real puzzle pieces. 
             #This has to be done because in GlobalArea, the y axis gets flipped to follow the normal graph style.
             #It would be better to first assign the corners, then do the conversion. 
-            new_puzzle.corners = new_puzzle.get_best_4_corners()[::-1]
+            buf.corners[i] = np.asarray(new_puzzle.get_best_4_corners()[::-1], dtype=np.float32)
             target_list.append(new_puzzle)
 
-
-
-
-
+        buf.bind(target_list)
+        if target_list is self.solved_puzzles:
+            self.solved_buffer = buf
+        else:
+            self.unsolved_buffer = buf
 
     def set_unsolved_puzzles(self, puzzles) -> None:
         self._import_puzzles(puzzles, self.unsolved_puzzles)
@@ -127,51 +321,57 @@ class GlobalArea:
 
 
 
+    def default_homography(self, offset: Tuple[float, float] = (0.0, 0.0)) -> np.ndarray:
+        """Pixel → mm homography from pixels_to_mm_ratio (Y flip + scale + offset)."""
+        from Calibration import CameraCalibration
+        return CameraCalibration.homography_from_scale(self.ratiox, self.ratioy, offset, self.img_height)
+
+    def apply_homography(self, H, solved: bool = True, unsolved: bool = True) -> None:
+        """
+        Map pieces from image pixels to table mm with a calibration homography.
+
+        H maps raw image pixels (Y down) to mm. The pieces were imported with
+        the Y axis already flipped, so the flip is folded into H here and each
+        list is transformed by one perspectiveTransform call on its buffer.
+        """
+        flip = np.array([[1.0, 0.0, 0.0],
+                         [0.0, -1.0, float(self.img_height)],
+                         [0.0, 0.0, 1.0]])
+        H_flipped = np.asarray(H, dtype=np.float64) @ flip
+
+        groups = []
+        if unsolved:
+            groups.append(self.unsolved_puzzles)
+        if solved:
+            groups.append(self.solved_puzzles)
+        for group in groups:
+            if not group:
+                continue
+            buf = self._buffer_for(group)
+            buf.sync(group)
+            buf.transform(H_flipped)
+
     def scale_all_puzzles(self, ratio_x: float, ratio_y: float) -> None:
         """
         Scale contours AND corners for both unsolved and solved puzzle lists.
         (Smaller number makes smaller contour)
         """
         for group in (self.unsolved_puzzles, self.solved_puzzles):
-            for p in group:
-                cnt = p.contour
-                pts, orig_shape = self._as_pts(cnt)
-                pts[:, 0] *= ratio_x
-                pts[:, 1] *= ratio_y
-                new_cnt = self._from_pts(pts, orig_shape)
-
-                if hasattr(p, "set_contour"):
-                    p.set_contour(new_cnt)
-                else:
-                    p.contour = new_cnt
-
-                if hasattr(p, "corners") and p.corners is not None:
-                    c = np.asarray(p.corners, dtype=float).reshape(4, 2)
-                    c[:, 0] *= ratio_x
-                    c[:, 1] *= ratio_y
-                    p.corners = c
+            buf = self._buffer_for(group)
+            buf.sync(group)
+            buf.scale(ratio_x, ratio_y)
     
     def _translate_puzzles(self, target_list, dx: float, dy: float) -> None:
         """
         Translate all contours in target_list by (dx, dy).
-        Mutates the list in-place (replaces each contour with a translated copy).
+        Works in-place on the packed buffer of that list.
         """
         if not target_list:
             return
 
-        translated = []
-        for p in target_list:
-            cnt = p.contour
-            crn = p.corners
-            pts = np.asarray(cnt).reshape(-1, 2).astype(float)
-            pts[:, 0] += dx
-            pts[:, 1] += dy
-            p.contour = pts
-
-            corner_pts = np.asarray(crn).reshape(-1, 2).astype(float)
-            corner_pts[:, 0] += dx
-            corner_pts[:, 1] += dy
-            p.corners = corner_pts
+        buf = self._buffer_for(target_list)
+        buf.sync(target_list)
+        buf.translate(dx, dy)
 
 
 
@@ -181,7 +381,33 @@ class GlobalArea:
     def translate_solved_puzzles(self, dx: float, dy: float) -> None:
         self._translate_puzzles(self.solved_puzzles, dx, dy)
 
+    def rotate_puzzles(self, angles_deg, centers=None, solved: bool = True) -> None:
+        """
+        Rotate every piece of one list by its own angle (degrees, CCW).
+
+        angles_deg : scalar or (P,) per piece
+        centers    : (P, 2) rotation centers, default = centroid of each piece
+        """
+        target_list = self.solved_puzzles if solved else self.unsolved_puzzles
+        if not target_list:
+            return
+
+        buf = self._buffer_for(target_list)
+        buf.sync(target_list)
+        buf.rotate(angles_deg, centers)
+
+
+
+    def packed(self, solved: bool = True) -> "PackedContours":
+        """Packed buffer of one list, synced with its pieces (read-only use)."""
+        target_list = self.solved_puzzles if solved else self.unsolved_puzzles
+        buf = self._buffer_for(target_list)
+        buf.sync(target_list)
+        return buf
 
+    def piece_centroids(self, solved: bool = True) -> np.ndarray:
+        """(P, 2) centroid of every piece of one list, in list order."""
+        return self.packed(solved).centroids()
 
     def get_unsolved_puzzle_piece(self,pos):
         return self.unsolved_puzzles[pos]
@@ -215,13 +441,10 @@ class GlobalArea:
     # ------------------------------------------------------------------
     # Visualization
         # ------------------------------------------------------------------
-    def show(self, invert_y: bool = False, margin: float = 10.0,
-             title: str = "GlobalArea — Physical Coordinate Plane") -> None:
+    def draw(self, ax, invert_y: bool = False, margin: float = 10.0,
+             title: str = "GlobalArea — Physical Coordinate Plane", pieces: bool = True) -> None:
+        """Draw areas, contours and corners into a matplotlib Axes (pieces=False: areas only)."""
         from matplotlib.patches import Rectangle
-        import numpy as np
-        import matplotlib.pyplot as plt
-
-        fig, ax = plt.subplots(figsize=(7, 5))
 
         def draw_rect(rect, color: str, label: str, lw: float = 2.0):
             ax.add_patch(Rectangle((rect.x, rect.y), rect.w, rect.h,
@@ -261,25 +484,26 @@ class GlobalArea:
         draw_rect(self.area_unsolved, 'tab:blue', 'UNSOLVED')
         draw_rect(self.area_solved, 'tab:green', 'SOLVED')
 
-        # Draw unsolved contours with indices
-        if self.unsolved_puzzles:
-            for i, p in enumerate(self.unsolved_puzzles):
-                draw_labeled_contour(p, i, color='tab:red', prefix="U")
+        if pieces:
+            # Draw unsolved contours with indices
+            if self.unsolved_puzzles:
+                for i, p in enumerate(self.unsolved_puzzles):
+                    draw_labeled_contour(p, i, color='tab:red', prefix="U")
 
-        # Draw solved contours with indices
-        if self.solved_puzzles:
-            for i, p in enumerate(self.solved_puzzles):
-                draw_labeled_contour(p, i, color='tab:orange', prefix="S")
+            # Draw solved contours with indices
+            if self.solved_puzzles:
+                for i, p in enumerate(self.solved_puzzles):
+                    draw_labeled_contour(p, i, color='tab:orange', prefix="S")
         
-        # Draw unsolved corners
-        if self.unsolved_puzzles:
-            for i, p in enumerate(self.unsolved_puzzles):
-                draw_corners(self,p, i, color="tab:purple", prefix="UC")
+            # Draw unsolved corners
+            if self.unsolved_puzzles:
+                for i, p in enumerate(self.unsolved_puzzles):
+                    draw_corners(self,p, i, color="tab:purple", prefix="UC")
         
-        # Draw solved corners
-        if self.unsolved_puzzles:
-            for i, p in enumerate(self.solved_puzzles):
-                draw_corners(self,p, i, color="tab:purple", prefix="SC")
+            # Draw solved corners
+            if self.unsolved_puzzles:
+                for i, p in enumerate(self.solved_puzzles):
+                    draw_corners(self,p, i, color="tab:purple", prefix="SC")
 
         ax.set_xlim(self.base.x - margin, self.base.right + margin)
         ax.set_ylim(self.base.y - margin, self.base.bottom + margin)
@@ -294,5 +518,26 @@ class GlobalArea:
         ax.set_xlabel('X (mm)')
         ax.set_ylabel('Y (mm)' if not invert_y else 'Y (mm, down)')
         ax.set_title(title)
+
+    def show(self, invert_y: bool = False, margin: float = 10.0,
+             title: str = "GlobalArea — Physical Coordinate Plane") -> None:
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots(figsize=(7, 5))
+        self.draw(ax, invert_y=invert_y, margin=margin, title=title)
         plt.tight_layout()
         plt.show()
+
+    def save(self, path: str, invert_y: bool = False, margin: float = 10.0,
+             title: str = "GlobalArea — Physical Coordinate Plane", dpi: int = 120) -> str:
+        """Render the same plot as show() to an image file without a GUI (Agg)."""
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        fig = Figure(figsize=(7, 5))
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+        self.draw(ax, invert_y=invert_y, margin=margin, title=title)
+        fig.tight_layout()
+        fig.savefig(path, dpi=dpi)
+        return path
@@ -0,0 +1,126 @@
+from __future__ import annotations
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional
+
+# shared no-op span: with tracing off, span() costs one attribute check
+_NULL_SPAN = nullcontext()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer: "Instrumentation", name: str, args: Dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        end = time.perf_counter_ns()
+        self.tracer._record(self.name, self.start, end, self.args)
+
+
+class Instrumentation:
+    """
+    Timing spans and counters for the S-Log.
+
+        from Instrumentation import trace
+        with trace.span("matching", pieces=len(pieces)):
+            ...
+        trace.count("comparisons", n)
+
+    Disabled by default; then span() returns a shared no-op context manager and
+    count() returns immediately. Recorded data is written as JSON lines
+    (write_jsonl) or as a Chrome trace-event file (write_chrome_trace, open in
+    chrome://tracing or Perfetto).
+    """
+
+    def __init__(self, enabled: bool = False, logger: Optional[logging.Logger] = None) -> None:
+        self.enabled = enabled
+        self.log = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.spans: List[Dict[str, Any]] = []
+            self.counters: Dict[str, int] = {}
+            # (ts_ns, name, value after the update) for counter tracks in the trace
+            self._samples: List[tuple] = []
+
+    def enable(self, enabled: bool = True) -> "Instrumentation":
+        self.enabled = enabled
+        return self
+
+    # ---------- recording ----------
+    def span(self, name: str, **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def count(self, name: str, n: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            value = self.counters.get(name, 0) + n
+            self.counters[name] = value
+            self._samples.append((time.perf_counter_ns(), name, value))
+
+    def _record(self, name: str, start: int, end: int, args: Dict[str, Any]) -> None:
+        with self._lock:
+            self.spans.append({"name": name, "start_ns": start - self._origin, "dur_ns": end - start,
+                               "tid": threading.get_ident(), "args": args})
+
+    # ---------- summaries ----------
+    def totals(self) -> Dict[str, float]:
+        """Total seconds per span name."""
+        out: Dict[str, float] = {}
+        for s in self.spans:
+            out[s["name"]] = out.get(s["name"], 0.0) + s["dur_ns"] / 1e9
+        return out
+
+    def log_summary(self) -> None:
+        for name, sec in self.totals().items():
+            self.log.info(f"Stufe {name}: {sec * 1000:.1f} ms")
+        for name, value in self.counters.items():
+            self.log.info(f"Zähler {name}: {value}")
+
+    # ---------- export ----------
+    def write_jsonl(self, path: str) -> str:
+        """One JSON object per line: all spans in order of completion, then the counters."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for s in self.spans:
+                f.write(json.dumps({"type": "span", "name": s["name"], "start_ms": s["start_ns"] / 1e6,
+                                    "dur_ms": s["dur_ns"] / 1e6, "tid": s["tid"], "args": s["args"]},
+                                   default=str) + "\n")
+            for name, value in self.counters.items():
+                f.write(json.dumps({"type": "counter", "name": name, "value": value}) + "\n")
+        return path
+
+    def write_chrome_trace(self, path: str) -> str:
+        """Chrome trace-event format: complete events ("X") for spans, counter events ("C")."""
+        pid = os.getpid()
+        events = [{"name": s["name"], "ph": "X", "ts": s["start_ns"] / 1e3, "dur": s["dur_ns"] / 1e3,
+                   "pid": pid, "tid": s["tid"], "args": s["args"]} for s in self.spans]
+        tid = threading.get_ident()
+        events += [{"name": name, "ph": "C", "ts": (ts - self._origin) / 1e3, "pid": pid, "tid": tid,
+                    "args": {name: value}} for ts, name, value in self._samples]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+        return path
+
+
+# process-wide instance used by all stages
+trace = Instrumentation()
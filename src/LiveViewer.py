@@ -0,0 +1,185 @@
+from __future__ import annotations
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+
+class LiveViewer:
+    """
+    Interactive GlobalArea view that follows MatchPlacer while it moves pieces.
+
+    Areas, grid and labels are drawn once into a cached background. Every
+    piece gets its own animated artists (outline, corners, label), created
+    once. When a piece moves only its line data is updated; the region
+    covering its old and new extent is restored from the background, the
+    artists inside that region are redrawn clipped to it and only that
+    region is blitted. The redraw cost therefore depends on the moved pieces
+    (and their direct neighbours), not on the size of the scene.
+
+    Register as a MatchPlacer listener. Keys in the window:
+      space      pause / resume
+      n / right  next step while paused
+    """
+
+    COLORS = {"unsolved": "tab:red", "solved": "tab:orange", "corner": "tab:purple"}
+
+    def __init__(self, ga, fig=None, margin: float = 10.0, interval: float = 0.05,
+                 step: bool = False, title: str = "GlobalArea — Live") -> None:
+        self.ga = ga
+        self.interval = float(interval)
+        # own window → pyplot and event loop; given figure (e.g. Agg) → no waiting
+        self.interactive = fig is None
+        if fig is None:
+            import matplotlib.pyplot as plt
+
+            fig = plt.figure(figsize=(7, 5))
+            plt.show(block=False)
+        self.fig = fig
+        self.canvas = fig.canvas
+        self.ax = fig.add_subplot(111)
+        ga.draw(self.ax, margin=margin, title=title, pieces=False)
+
+        self.paused = bool(step)
+        self._step = False
+        self._artists: Dict[int, list] = {}
+        self._extents: Dict[int, object] = {}
+        self._background = None
+        # number of piece artist groups drawn by the last update (for diagnostics/tests)
+        self.last_redrawn = 0
+
+        self._create_artists()
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+        self.canvas.mpl_connect("key_press_event", self._on_key)
+        self.canvas.draw()
+
+    # ---------- setup ----------
+    def _create_artists(self) -> None:
+        for puzzles, color, prefix in ((self.ga.unsolved_puzzles, self.COLORS["unsolved"], "U"),
+                                       (self.ga.solved_puzzles, self.COLORS["solved"], "S")):
+            for i, p in enumerate(puzzles):
+                outline, = self.ax.plot([], [], "-", lw=1.5, color=color, animated=True)
+                corners, = self.ax.plot([], [], "o", ms=4, color=self.COLORS["corner"], animated=True)
+                label = self.ax.text(0, 0, f"{prefix}{i}", color=color, fontsize=10, weight="bold",
+                                     ha="center", va="center", animated=True)
+                self._artists[id(p)] = [outline, corners, label]
+                self._set_data(p)
+
+    def _pieces(self) -> List:
+        return list(self.ga.unsolved_puzzles) + list(self.ga.solved_puzzles)
+
+    def _set_data(self, p) -> None:
+        outline, corners, label = self._artists[id(p)]
+        pts = np.asarray(p.contour, dtype=float).reshape(-1, 2)
+        closed = np.vstack([pts, pts[:1]])
+        outline.set_data(closed[:, 0], closed[:, 1])
+        c = np.asarray(p.corners, dtype=float).reshape(-1, 2)
+        corners.set_data(c[:, 0], c[:, 1])
+        label.set_position(pts.mean(axis=0))
+
+    def _extent(self, p):
+        """Display bbox of a piece's artists, padded and snapped to whole pixels."""
+        from matplotlib.transforms import Bbox
+
+        renderer = self.canvas.get_renderer()
+        bb = Bbox.union([a.get_window_extent(renderer) for a in self._artists[id(p)]])
+        return Bbox.from_extents(np.floor(bb.x0) - 3, np.floor(bb.y0) - 3,
+                                 np.ceil(bb.x1) + 3, np.ceil(bb.y1) + 3)
+
+    # ---------- drawing ----------
+    def _on_draw(self, event) -> None:
+        # full draw (first show, resize, zoom): new background, everything on top
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._paint(self._pieces(), self.fig.bbox, restore=False)
+
+    def _paint(self, pieces, region, restore: bool = True) -> None:
+        from matplotlib.transforms import Bbox
+
+        region = Bbox.intersection(region, self.fig.bbox)
+        if region is None:
+            self.last_redrawn = 0
+            return
+        if restore:
+            # restore_region takes the rectangle with y from the top of the canvas
+            h = self.fig.bbox.height
+            self.canvas.restore_region(self._background,
+                                       bbox=(region.x0, h - region.y1, region.x1, h - region.y0),
+                                       xy=(0, 0))
+        clip = Bbox.intersection(region, self.ax.bbox)
+        drawn = 0
+        if clip is not None:
+            for p in pieces:
+                artists = self._artists[id(p)]
+                for a in artists:
+                    a.set_clip_box(clip)
+                    self.ax.draw_artist(a)
+                    a.set_clip_box(self.ax.bbox)
+                drawn += 1
+        self.last_redrawn = drawn
+        self.canvas.blit(region)
+
+    def update(self, pieces: Iterable) -> None:
+        """Move the artists of the given pieces and redraw only the affected region."""
+        from matplotlib.transforms import Bbox
+
+        if self._background is None:
+            self.canvas.draw()
+        dirty = []
+        for p in pieces:
+            if id(p) not in self._artists:
+                continue
+            old = self._extents.get(id(p)) or self._extent(p)
+            self._set_data(p)
+            new = self._extent(p)
+            self._extents[id(p)] = new
+            dirty += [old, new]
+        if not dirty:
+            return
+        region = Bbox.union(dirty)
+
+        # everything that overlaps the region has to be drawn again, in scene order
+        hit = []
+        for p in self._pieces():
+            ext = self._extents.get(id(p))
+            if ext is None:
+                ext = self._extents[id(p)] = self._extent(p)
+            if ext.overlaps(region):
+                hit.append(p)
+        self._paint(hit, region)
+
+    def refresh(self) -> None:
+        """Resync all pieces (e.g. after apply_homography or the anchor placement)."""
+        for p in self._pieces():
+            if id(p) in self._artists:
+                self._set_data(p)
+                self._extents[id(p)] = self._extent(p)
+        if self._background is None:
+            self.canvas.draw()
+        else:
+            self._paint(self._pieces(), self.fig.bbox)
+        self._wait()
+
+    # ---------- listener ----------
+    def on_piece_step(self, piece, stage: str) -> None:
+        self.update([piece])
+        self._wait()
+
+    def on_piece_moved(self, piece) -> None:
+        self.update([piece])
+        self._wait()
+
+    # ---------- pause / step ----------
+    def _on_key(self, event) -> None:
+        if event.key == " ":
+            self.paused = not self.paused
+        elif event.key in ("n", "right"):
+            self._step = True
+
+    def _wait(self) -> None:
+        if not self.interactive:
+            return
+        import matplotlib.pyplot as plt
+
+        self._step = False
+        self.canvas.start_event_loop(self.interval)
+        while self.paused and not self._step and plt.fignum_exists(self.fig.number):
+            self.canvas.start_event_loop(0.05)
@@ -1,9 +1,28 @@
+from Instrumentation import trace
+
+
 class MatchPlacer:
-    def __init__(self, ga, rot, ta, logger=None):
+    def __init__(self, ga, rot, ta, logger=None, listeners=None, refiner=None):
         self.ga = ga
         self.rot = rot
         self.ta = ta
         self.log = logger
+        # optional fine alignment on the full edges, e.g. ICPRefiner
+        self.refiner = refiner
+        # objects with on_piece_moved(piece), e.g. PlacementValidator;
+        # optional on_piece_step(piece, stage) for every intermediate move (LiveViewer)
+        self.listeners = list(listeners) if listeners else []
+        # placement commands in the order they were applied
+        self.placements = []
+
+    def _notify(self, piece):
+        for listener in self.listeners:
+            listener.on_piece_moved(piece)
+
+    def _notify_step(self, piece, stage):
+        for listener in self.listeners:
+            if hasattr(listener, "on_piece_step"):
+                listener.on_piece_step(piece, stage)
 
     def apply_matches(self, matches):
         if not matches:
@@ -14,11 +33,36 @@ class MatchPlacer:
             # compute rotation from current geometry
             lines = self.ga.get_matching_edge_lines(m['piece_a'], m['edge_a'], m['piece_b'], m['edge_b'])
             req_rot = self.rot.compute_required_rotation_deg(lines)
-        
+
             pb = self.ga.get_solved_puzzle_piece(m['piece_b'] - 1)
             self.rot.rotate_puzzle_in_place(pb, req_rot)
-        
+            self._notify_step(pb, "rotate")
+
             # IMPORTANT: recompute lines after rotation, so pb edge endpoints are updated
             lines_after = self.ga.get_matching_edge_lines(m['piece_a'], m['edge_a'], m['piece_b'], m['edge_b'])
-            self.ta.translate_piece_b_to_a_in_place(pb, lines_after)
+            dx, dy = self.ta.translate_piece_b_to_a_in_place(pb, lines_after)
+            self._notify_step(pb, "translate")
+            angle = float(req_rot)
+
+            if self.refiner is not None:
+                pa = self.ga.get_solved_puzzle_piece(m['piece_a'] - 1)
+                corr = self.refiner.refine(pa, m['edge_a'], pb, m['edge_b'])
+                if corr is not None:
+                    # rotation is around the centroid, so both steps add up to one command
+                    self.rot.rotate_puzzle_in_place(pb, corr["angle"])
+                    self.ta.translate_puzzle_in_place(pb, (corr["dx"], corr["dy"]))
+                    angle += corr["angle"]
+                    dx += corr["dx"]
+                    dy += corr["dy"]
+                    if self.log:
+                        self.log.info(f"ICP Teil {m['piece_b']}: {corr['angle']:.2f}°, "
+                                      f"({corr['dx']:.2f}, {corr['dy']:.2f}) mm, RMSE={corr['rmse']:.3f}")
+
+            # a piece can be moved by several matches, count it once
+            if all(c["piece"] != m['piece_b'] for c in self.placements):
+                trace.count("pieces_placed")
+            self.placements.append({"piece": m['piece_b'], "angle": angle, "dx": dx, "dy": dy})
+            self._notify(pb)
+
+        return self.placements
 
@@ -0,0 +1,252 @@
+from __future__ import annotations
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class Pose:
+    """Piece pose on the table: centroid (mm) and orientation (deg)."""
+    x: float
+    y: float
+    angle: float = 0.0
+
+
+def _wrap_deg(a):
+    """Wrap angle(s) to [-180, 180)."""
+    return (np.asarray(a, dtype=float) + 180.0) % 360.0 - 180.0
+
+
+class MovePlanner:
+    """
+    Orders pick-and-place moves so the gripper travels as little as possible.
+
+    A move for piece i goes: current gripper position -> start pose S_i
+    (pick) -> target pose T_i (place). The S_i -> T_i part is fixed, only the
+    empty legs T_prev -> S_next depend on the order. Rotation is counted the
+    same way: the wrist leaves a piece at its target angle and has to turn to
+    the start angle of the next piece. Cost = travel (mm) + rotation_weight *
+    rotation (deg).
+
+    Up to exact_max pieces the order is exact (Held-Karp). Above that it is
+    built nearest-neighbour over a KD-tree of start centroids and improved
+    with 2-opt (segment reversal) on the full cost; the given current order
+    is improved the same way and the cheaper of both is kept, so the plan is
+    never worse than the current order.
+    """
+
+    def __init__(self, rotation_weight: float = 0.5, home: Tuple[float, float] = (0.0, 0.0),
+                 max_passes: int = 50, exact_max: int = 8, logger: Optional[logging.Logger] = None) -> None:
+        """
+        Parameters
+        ----------
+        rotation_weight : float
+            mm of travel that one degree of wrist rotation is worth.
+        home : (x, y)
+            Gripper position before the first move.
+        max_passes : int
+            Upper bound for 2-opt improvement passes.
+        exact_max : int
+            Largest number of pieces that is solved exactly (2^n * n^2 steps).
+        """
+        self.rotation_weight = float(rotation_weight)
+        self.home = (float(home[0]), float(home[1]))
+        self.max_passes = int(max_passes)
+        self.exact_max = int(exact_max)
+        self.log = logger or logging.getLogger(__name__)
+
+    # ---------- poses ----------
+    @staticmethod
+    def poses_from_area(ga, placements: Sequence[Dict]) -> Tuple[Dict[int, Pose], Dict[int, Pose]]:
+        """
+        Start poses from ga.unsolved_puzzles, target poses from ga.solved_puzzles.
+        The target angle of a piece is the sum of all rotations applied to it
+        in placements (dicts with 'piece' and 'angle', see MatchPlacer).
+        """
+        total_angle: Dict[int, float] = {}
+        for cmd in placements:
+            total_angle[cmd["piece"]] = total_angle.get(cmd["piece"], 0.0) + float(cmd["angle"])
+
+        start_xy = ga.piece_centroids(solved=False)
+        target_xy = ga.piece_centroids(solved=True)
+        starts = {p.index: Pose(*start_xy[i]) for i, p in enumerate(ga.unsolved_puzzles)}
+        targets = {p.index: Pose(*target_xy[i], total_angle.get(p.index, 0.0))
+                   for i, p in enumerate(ga.solved_puzzles) if p.index in total_angle}
+        return starts, targets
+
+    # ---------- cost ----------
+    def _leg_costs(self, ids, starts, targets):
+        """
+        C[a, b]: cost of the empty leg from the target of a to the start of b.
+        Row n is the home position. Also returns the fixed per-move cost.
+        """
+        S = np.array([[starts[i].x, starts[i].y] for i in ids], dtype=float)
+        T = np.array([[targets[i].x, targets[i].y] for i in ids], dtype=float)
+        Sa = np.array([starts[i].angle for i in ids], dtype=float)
+        Ta = np.array([targets[i].angle for i in ids], dtype=float)
+
+        origins = np.vstack([T, np.array(self.home)])
+        origin_angle = np.append(Ta, 0.0)
+
+        travel = np.linalg.norm(origins[:, None, :] - S[None, :, :], axis=2)
+        rotation = np.abs(_wrap_deg(Sa[None, :] - origin_angle[:, None]))
+        C = travel + self.rotation_weight * rotation
+
+        fixed = (np.linalg.norm(T - S, axis=1)
+                 + self.rotation_weight * np.abs(_wrap_deg(Ta - Sa)))
+        return C, float(fixed.sum()), S
+
+    @staticmethod
+    def _tour_cost(C, order) -> float:
+        home = C.shape[0] - 1
+        if len(order) == 0:
+            return 0.0
+        prev = np.concatenate([[home], order[:-1]])
+        return float(C[prev, order].sum())
+
+    # ---------- construction ----------
+    def _nearest_neighbour(self, S, T) -> np.ndarray:
+        from scipy.spatial import cKDTree
+
+        n = len(S)
+        tree = cKDTree(S)
+        visited = np.zeros(n, dtype=bool)
+        order = []
+        pos = np.array(self.home)
+        for _ in range(n):
+            k = 1
+            while True:
+                _, idx = tree.query(pos, k=min(k, n))
+                idx = np.atleast_1d(idx)
+                free = idx[~visited[idx]]
+                if len(free):
+                    nxt = int(free[0])
+                    break
+                k *= 2
+            visited[nxt] = True
+            order.append(nxt)
+            pos = T[nxt]
+        return np.array(order, dtype=int)
+
+    @staticmethod
+    def _held_karp(C) -> np.ndarray:
+        """Optimal open path from home (last row of C) through all pieces."""
+        n = C.shape[1]
+        home = C.shape[0] - 1
+        legs = C[:n, :n]
+        dp = np.full((1 << n, n), np.inf)      # dp[mask, j]: besuchte Menge mask, zuletzt j
+        parent = np.full((1 << n, n), -1, dtype=int)
+        for j in range(n):
+            dp[1 << j, j] = C[home, j]
+        for mask in range(1, 1 << n):
+            row = dp[mask]
+            if not np.isfinite(row).any():
+                continue
+            cand = row[:, None] + legs                  # cand[j, k]: über j nach k
+            best_j = np.argmin(cand, axis=0)
+            best = cand[best_j, np.arange(n)]
+            for k in range(n):
+                if mask & (1 << k):
+                    continue
+                nxt = mask | (1 << k)
+                if best[k] < dp[nxt, k]:
+                    dp[nxt, k] = best[k]
+                    parent[nxt, k] = best_j[k]
+        mask, j = (1 << n) - 1, int(np.argmin(dp[(1 << n) - 1]))
+        order = []
+        while j >= 0:
+            order.append(j)
+            mask, j = mask ^ (1 << j), parent[mask, j]
+        return np.array(order[::-1], dtype=int)
+
+    def _two_opt(self, C, order) -> np.ndarray:
+        """2-opt for an open, asymmetric path: reversing a segment also reverses its legs."""
+        order = order.copy()
+        n = len(order)
+        home = C.shape[0] - 1
+        if n < 3:
+            return order
+
+        for _ in range(self.max_passes):
+            improved = False
+            for i in range(n - 1):
+                path = np.concatenate([[home], order])        # path[k] precedes order[k]
+                fwd = C[path[:-1], path[1:]]                   # leg into order[k]
+                bwd = np.zeros(n)
+                bwd[1:] = C[order[1:], order[:-1]]             # leg order[k] -> order[k-1]
+                cf = np.cumsum(fwd)
+                cb = np.cumsum(bwd)
+
+                j = np.arange(i + 1, n)
+                prev = path[i]                                  # node before order[i]
+                nxt_cost_old = np.where(j + 1 < n, C[order[j], order[np.minimum(j + 1, n - 1)]], 0.0)
+                nxt_cost_new = np.where(j + 1 < n, C[order[i], order[np.minimum(j + 1, n - 1)]], 0.0)
+
+                # internal legs i+1..j, forward vs reversed
+                internal_fwd = cf[j] - cf[i]
+                internal_bwd = cb[j] - cb[i]
+                old = fwd[i] + internal_fwd + nxt_cost_old
+                new = C[prev, order[j]] + internal_bwd + nxt_cost_new
+                delta = new - old
+
+                best = int(np.argmin(delta))
+                if delta[best] < -1e-9:
+                    jj = j[best]
+                    order[i:jj + 1] = order[i:jj + 1][::-1]
+                    improved = True
+            if not improved:
+                break
+        return order
+
+    # ---------- public ----------
+    def plan(self, starts: Dict[int, Pose], targets: Dict[int, Pose],
+             current_order: Optional[Sequence[int]] = None) -> Dict:
+        """
+        Plan the move order for all pieces in targets.
+
+        Returns dict with
+          order          : piece indices in planned order
+          cost           : planned cost (travel + weighted rotation)
+          baseline_order : current_order (default: sorted piece indices)
+          baseline_cost  : cost of baseline_order
+          savings        : baseline_cost - cost
+        """
+        ids = sorted(targets)
+        if not ids:
+            return {"order": [], "cost": 0.0, "baseline_order": [], "baseline_cost": 0.0, "savings": 0.0}
+
+        C, fixed, S = self._leg_costs(ids, starts, targets)
+        T = np.array([[targets[i].x, targets[i].y] for i in ids], dtype=float)
+        pos_of = {pid: k for k, pid in enumerate(ids)}
+
+        if current_order is None:
+            baseline = list(ids)
+        else:
+            # keep first occurrence, append pieces the given order misses
+            seen = []
+            for pid in current_order:
+                if pid in pos_of and pid not in seen:
+                    seen.append(pid)
+            baseline = seen + [pid for pid in ids if pid not in seen]
+        baseline_idx = np.array([pos_of[p] for p in baseline], dtype=int)
+        baseline_cost = self._tour_cost(C, baseline_idx) + fixed
+
+        if len(ids) <= self.exact_max:
+            order = self._held_karp(C)
+        else:
+            order = min((self._two_opt(C, self._nearest_neighbour(S, T)), self._two_opt(C, baseline_idx)),
+                        key=lambda o: self._tour_cost(C, o))
+        cost = self._tour_cost(C, order) + fixed
+
+        result = {
+            "order": [ids[k] for k in order],
+            "cost": cost,
+            "baseline_order": baseline,
+            "baseline_cost": baseline_cost,
+            "savings": baseline_cost - cost,
+        }
+        self.log.info(f"Reihenfolge: {result['order']} | Kosten {cost:.1f} "
+                      f"(vorher {baseline_cost:.1f}, Ersparnis {result['savings']:.1f})")
+        return result
@@ -0,0 +1,223 @@
+from __future__ import annotations
+import copy
+import hashlib
+import json
+import logging
+import os
+import pickle
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import cv2 as cv
+
+from Instrumentation import trace
+
+
+# ---------- stage functions (inputs by name, params as keywords) ----------
+def _load(path):
+    with trace.span("load"):
+        img = cv.imread(path)
+    if img is None:
+        raise FileNotFoundError(f"Datei nicht gefunden: {path}")
+    return img
+
+
+def _detect(image, min_area):
+    from edgedetection import EdgeDetection
+
+    with trace.span("contours"):
+        det = EdgeDetection.from_image(image)
+        det.find_contours()
+        det.filter_contours(min_area)
+    return det.get_puzzle_pieces()
+
+
+def _segment(pieces, epsilon_factor):
+    # Kopien, damit das (evtl. gecachte) Ergebnis von detect unverändert bleibt
+    out = []
+    with trace.span("segmentation", pieces=len(pieces)):
+        for p in pieces:
+            p = copy.copy(p)
+            p.get_puzzle_edges(epsilon_factor=epsilon_factor)
+            out.append(p)
+    return out
+
+
+def _appearance(image, pieces):
+    from edgeappearance import EdgeAppearance
+
+    with trace.span("appearance", pieces=len(pieces)):
+        return EdgeAppearance().describe(image, pieces)
+
+
+def _match(pieces, num_points, threshold, color_threshold, appearance=None):
+    from matching import Matching
+
+    matcher = Matching(pieces, num_points=num_points, appearance=appearance, color_threshold=color_threshold)
+    matches = matcher.find_matches(threshold=threshold)
+    return {"matches": matches, "artifact": matcher.artifact}
+
+
+def _organize(pieces, match, grid_size):
+    from puzzleorganizer import PuzzleOrganizer
+
+    with trace.span("organize"):
+        return PuzzleOrganizer(pieces, match["matches"], grid_size=grid_size).organize()
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[..., Any]
+    inputs: Tuple[str, ...]
+    params: Tuple[str, ...] = ()
+    # load is cheaper to redo than to store; everything else goes to disk
+    cache: bool = True
+    # (input, param): input is only resolved (and passed by name) when param is not None
+    optional: Tuple[Tuple[str, str], ...] = ()
+
+
+@dataclass
+class Pipeline:
+    """
+    Named stages with explicit inputs and outputs:
+
+        load → detect → segment → appearance → match → organize
+
+    appearance only feeds match when color_threshold is set; default runs
+    never sample the edge colours.
+
+    Every stage result is cached on disk under a key made from the SHA-1 of
+    the image bytes, the stage's own parameters and the keys of its inputs.
+    A stage is only run when its key is not in the cache, and its inputs are
+    only resolved when it has to run, so changing e.g. only the match
+    threshold loads the segmented pieces from disk and never touches
+    detection or segmentation.
+    """
+
+    image_path: str
+    cache_dir: Optional[str] = None
+    min_area: float = 500
+    epsilon_factor: float = 0.00002
+    num_points: int = 100
+    threshold: float = 0.04
+    # Farb-Vorfilter im Matching (None = aus)
+    color_threshold: Optional[float] = None
+    grid_size: int = 2
+    logger: Optional[logging.Logger] = None
+
+    STAGES = (
+        Stage("load", _load, ("path",), cache=False),
+        Stage("detect", _detect, ("load",), ("min_area",)),
+        Stage("segment", _segment, ("detect",), ("epsilon_factor",)),
+        Stage("appearance", _appearance, ("load", "segment")),
+        Stage("match", _match, ("segment",), ("num_points", "threshold", "color_threshold"),
+              optional=(("appearance", "color_threshold"),)),
+        Stage("organize", _organize, ("segment", "match"), ("grid_size",)),
+    )
+
+    results: Dict[str, Any] = field(default_factory=dict, init=False, repr=False)
+    # stage -> "hit" / "run" for this Pipeline object
+    status: Dict[str, str] = field(default_factory=dict, init=False)
+
+    def __post_init__(self) -> None:
+        self.log = self.logger or logging.getLogger(__name__)
+        self._stages = {s.name: s for s in self.STAGES}
+        self._keys: Dict[str, str] = {}
+        self._image_hash: Optional[str] = None
+
+    # ---------- keys ----------
+    def image_hash(self) -> str:
+        if self._image_hash is None:
+            h = hashlib.sha1()
+            with open(self.image_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+            self._image_hash = h.hexdigest()
+        return self._image_hash
+
+    def params(self, name: str) -> Dict[str, Any]:
+        return {p: getattr(self, p) for p in self._stages[name].params}
+
+    def optional_inputs(self, name: str) -> Tuple[str, ...]:
+        return tuple(i for i, p in self._stages[name].optional if getattr(self, p) is not None)
+
+    def key(self, name: str) -> str:
+        if name == "path":
+            return self.image_hash()
+        if name not in self._keys:
+            stage = self._stages[name]
+            inputs = stage.inputs + self.optional_inputs(name)
+            payload = json.dumps({"stage": name, "params": self.params(name),
+                                  "inputs": [self.key(i) for i in inputs]}, sort_keys=True)
+            self._keys[name] = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:20]
+        return self._keys[name]
+
+    # ---------- cache ----------
+    def _cache_path(self, name: str) -> Optional[str]:
+        if self.cache_dir is None or not self._stages[name].cache:
+            return None
+        return os.path.join(self.cache_dir, name, f"{self.key(name)}.pkl")
+
+    def _load_cached(self, name: str):
+        path = self._cache_path(name)
+        if path is None or not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def _store(self, name: str, value) -> None:
+        path = self._cache_path(name)
+        if path is None:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    # ---------- run ----------
+    def get(self, name: str):
+        """Result of one stage: from memory, from the disk cache, or computed."""
+        if name == "path":
+            return self.image_path
+        if name in self.results:
+            return self.results[name]
+
+        cached = self._load_cached(name)
+        if cached is not None:
+            self.status[name] = "hit"
+            trace.count("cache_hits")
+            self.log.info(f"Stufe {name}: aus Cache ({self.key(name)})")
+            self.results[name] = cached
+            return cached
+
+        stage = self._stages[name]
+        if stage.cache and self.cache_dir is not None:
+            trace.count("cache_misses")
+        args = [self.get(i) for i in stage.inputs]
+        kwargs = {i: self.get(i) for i in self.optional_inputs(name)}
+        value = stage.func(*args, **kwargs, **self.params(name))
+        self.status[name] = "run"
+        self.log.info(f"Stufe {name}: berechnet ({self.key(name)})")
+        self._store(name, value)
+        self.results[name] = value
+        return value
+
+    def run(self, until: str = "organize") -> Dict[str, Any]:
+        """
+        Resolve the stage until (and, lazily, whatever it needs); returns the
+        results held in memory. Upstream stages whose downstream result is
+        cached are neither run nor loaded.
+        """
+        self.get(until)
+        return self.results
+
+    def with_params(self, **params) -> "Pipeline":
+        """Same image and cache with changed parameters (fresh in-memory results)."""
+        kwargs = {k: getattr(self, k) for k in ("image_path", "cache_dir", "min_area", "epsilon_factor",
+                                                "num_points", "threshold", "color_threshold", "grid_size", "logger")}
+        kwargs.update(params)
+        clone = Pipeline(**kwargs)
+        clone._image_hash = self._image_hash
+        return clone
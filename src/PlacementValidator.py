@@ -0,0 +1,275 @@
+from __future__ import annotations
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+import cv2 as cv
+import numpy as np
+
+
+class UniformGrid:
+    """
+    Uniform grid over axis-aligned bounding boxes (x0, y0, x1, y1).
+
+    Every key is stored in each cell its box touches, so candidate pairs are
+    only those keys sharing at least one cell. Insert/remove/update are
+    O(cells touched), which keeps incremental updates cheap.
+    """
+
+    def __init__(self, cell_size: float) -> None:
+        if cell_size <= 0:
+            raise ValueError("cell_size must be > 0")
+        self.cell_size = float(cell_size)
+        self.cells: Dict[Tuple[int, int], Set] = {}
+        self.boxes: Dict = {}
+
+    def _cells_of(self, box):
+        x0, y0, x1, y1 = box
+        cs = self.cell_size
+        for gx in range(int(np.floor(x0 / cs)), int(np.floor(x1 / cs)) + 1):
+            for gy in range(int(np.floor(y0 / cs)), int(np.floor(y1 / cs)) + 1):
+                yield gx, gy
+
+    def insert(self, key, box) -> None:
+        self.boxes[key] = tuple(float(v) for v in box)
+        for cell in self._cells_of(self.boxes[key]):
+            self.cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key) -> None:
+        box = self.boxes.pop(key, None)
+        if box is None:
+            return
+        for cell in self._cells_of(box):
+            bucket = self.cells.get(cell)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self.cells[cell]
+
+    def update(self, key, box) -> None:
+        self.remove(key)
+        self.insert(key, box)
+
+    @staticmethod
+    def boxes_intersect(a, b) -> bool:
+        return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+    def candidates(self, key) -> Set:
+        """Keys whose boxes intersect the box of key (key itself excluded)."""
+        box = self.boxes[key]
+        found = set()
+        for cell in self._cells_of(box):
+            found |= self.cells.get(cell, set())
+        found.discard(key)
+        return {k for k in found if self.boxes_intersect(box, self.boxes[k])}
+
+    def pairs(self) -> Set[Tuple]:
+        """All unordered key pairs with intersecting boxes."""
+        out = set()
+        for bucket in self.cells.values():
+            if len(bucket) < 2:
+                continue
+            keys = sorted(bucket)
+            for i, a in enumerate(keys):
+                for b in keys[i + 1:]:
+                    if self.boxes_intersect(self.boxes[a], self.boxes[b]):
+                        out.add((a, b))
+        return out
+
+
+def _ccw(pts: np.ndarray) -> np.ndarray:
+    x, y = pts[:, 0], pts[:, 1]
+    area = np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y)
+    return pts if area >= 0 else pts[::-1]
+
+
+def _inside_part(pa: np.ndarray, pb: np.ndarray, shared: bool) -> float:
+    """
+    Shoelace sum of the parts of the boundary of pa (CCW) that lie inside pb.
+    Boundary pieces lying on pb count only if shared is set and the interiors
+    of both polygons are on the same side there.
+    """
+    a0, a1 = pa, np.roll(pa, -1, axis=0)
+    b0, b1 = pb, np.roll(pb, -1, axis=0)
+    d, e = a1 - a0, b1 - b0
+
+    # nur Kanten, die die Box des anderen Polygons berühren
+    lo, hi = pb.min(axis=0), pb.max(axis=0)
+    keep_a = np.all(np.minimum(a0, a1) <= hi, axis=1) & np.all(np.maximum(a0, a1) >= lo, axis=1)
+    lo, hi = pa.min(axis=0), pa.max(axis=0)
+    keep_b = np.all(np.minimum(b0, b1) <= hi, axis=1) & np.all(np.maximum(b0, b1) >= lo, axis=1)
+    if not keep_a.any():
+        return 0.0
+    a0, a1, d = a0[keep_a], a1[keep_a], d[keep_a]
+    b0, e = b0[keep_b], e[keep_b]
+
+    # Schnittparameter t entlang jeder Kante von pa: Kreuzungen mit Kanten von pb
+    # und Ecken von pb, die auf der Kante liegen (kollineare Stücke)
+    w = b0[None, :, :] - a0[:, None, :]
+    denom = d[:, None, 0] * e[None, :, 1] - d[:, None, 1] * e[None, :, 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (w[..., 0] * e[None, :, 1] - w[..., 1] * e[None, :, 0]) / denom
+        u = (w[..., 0] * d[:, None, 1] - w[..., 1] * d[:, None, 0]) / denom
+    cross = (t > 0) & (t < 1) & (u >= 0) & (u <= 1) & (denom != 0)
+    length2 = np.maximum(np.sum(d * d, axis=1), 1e-30)[:, None]
+    tv = (w[..., 0] * d[:, None, 0] + w[..., 1] * d[:, None, 1]) / length2
+    off = np.abs(d[:, None, 0] * w[..., 1] - d[:, None, 1] * w[..., 0]) / np.sqrt(length2)
+    on_edge = (off < 1e-6) & (tv > 0) & (tv < 1)
+
+    contour = pb.reshape(-1, 1, 2).astype(np.float32)
+    scale = float(np.ptp(pb, axis=0).max()) or 1.0
+    eps = 1e-6 * scale
+    total = 0.0
+    for i in range(len(d)):
+        ts = np.unique(np.concatenate([[0.0, 1.0], t[i, cross[i]], tv[i, on_edge[i]]]))
+        pts = a0[i] + ts[:, None] * d[i]
+        for p, q in zip(pts[:-1], pts[1:]):
+            mid = (p + q) / 2
+            dist = cv.pointPolygonTest(contour, (float(mid[0]), float(mid[1])), True)
+            if dist <= eps:
+                if not shared or dist < -eps:
+                    continue
+                # auf dem Rand von pb: zählt, wenn das Innere von pa auf derselben Seite liegt
+                n = np.array([-d[i, 1], d[i, 0]]) / np.sqrt(length2[i, 0])
+                probe = mid + n * 1e3 * eps
+                if cv.pointPolygonTest(contour, (float(probe[0]), float(probe[1])), False) <= 0:
+                    continue
+            total += p[0] * q[1] - q[0] * p[1]
+    return 0.5 * total
+
+
+def polygon_intersection_area(pa, pb) -> float:
+    """
+    Exact intersection area of two simple polygons (any shape, not only convex).
+
+    The boundary of A ∩ B consists of the parts of each boundary that lie
+    inside the other polygon; the shoelace formula over those parts (both
+    polygons counter-clockwise) gives the area. Pieces that only touch share
+    boundary with opposite direction and contribute nothing.
+    """
+    pa = _ccw(np.asarray(pa, np.float64).reshape(-1, 2))
+    pb = _ccw(np.asarray(pb, np.float64).reshape(-1, 2))
+    if len(pa) < 3 or len(pb) < 3:
+        return 0.0
+    return max(0.0, _inside_part(pa, pb, shared=True) + _inside_part(pb, pa, shared=False))
+
+
+class PlacementValidator:
+    """
+    Checks the solved pieces of a GlobalArea for overlaps and for parts that
+    stick out of area_solved / base.
+
+    Piece bounding boxes are kept in a UniformGrid; only pairs returned by the
+    grid get an exact polygon check (convex hull test, then the exact
+    intersection area of the contours, see polygon_intersection_area). Results
+    per pair are cached and only recomputed for pieces that moved (see
+    on_piece_moved).
+    """
+
+    def __init__(self, ga, cell_size: Optional[float] = None,
+                 min_overlap_area: float = 1.0, logger: Optional[logging.Logger] = None) -> None:
+        """
+        Parameters
+        ----------
+        ga : GlobalArea
+        cell_size : float, optional
+            Grid cell size in mm. Default: mean bounding box size of the pieces.
+        min_overlap_area : float
+            Overlaps below this area (mm²) are ignored (placement tolerance).
+        """
+        self.ga = ga
+        self.min_overlap_area = float(min_overlap_area)
+        self.log = logger or logging.getLogger(__name__)
+        self._cell_size = cell_size
+        self.grid: Optional[UniformGrid] = None
+        self._pair_cache: Dict[Tuple[int, int], float] = {}
+        self._pieces: Dict[int, object] = {}
+
+    # ---------- index ----------
+    @staticmethod
+    def _points(piece) -> np.ndarray:
+        return np.asarray(piece.contour, dtype=np.float32).reshape(-1, 2)
+
+    def _box(self, piece):
+        pts = self._points(piece)
+        x0, y0 = pts.min(axis=0)
+        x1, y1 = pts.max(axis=0)
+        return float(x0), float(y0), float(x1), float(y1)
+
+    def rebuild(self) -> None:
+        """(Re)index all solved pieces."""
+        pieces = self.ga.solved_puzzles
+        self._pieces = {p.index: p for p in pieces}
+        boxes = {p.index: self._box(p) for p in pieces}
+
+        cell = self._cell_size
+        if cell is None:
+            sizes = [max(b[2] - b[0], b[3] - b[1]) for b in boxes.values()]
+            cell = float(np.mean(sizes)) if sizes else 1.0
+        self.grid = UniformGrid(max(cell, 1e-6))
+        for key, box in boxes.items():
+            self.grid.insert(key, box)
+        self._pair_cache.clear()
+
+    def on_piece_moved(self, piece) -> None:
+        """Listener hook for MatchPlacer: re-index one piece, drop its cached pairs."""
+        if self.grid is None:
+            self.rebuild()
+            return
+        self._pieces[piece.index] = piece
+        self.grid.update(piece.index, self._box(piece))
+        for pair in [k for k in self._pair_cache if piece.index in k]:
+            del self._pair_cache[pair]
+
+    # ---------- exact checks ----------
+    def overlap_area(self, piece_a, piece_b) -> float:
+        """Intersection area (mm²) of two piece contours."""
+        pa, pb = self._points(piece_a), self._points(piece_b)
+
+        # Cheap exact reject: disjoint convex hulls cannot overlap
+        hull_area, _ = cv.intersectConvexConvex(cv.convexHull(pa), cv.convexHull(pb))
+        if hull_area <= 0:
+            return 0.0
+        return polygon_intersection_area(pa, pb)
+
+    def overlaps(self) -> List[Dict]:
+        """All overlapping solved pairs as dicts {piece_a, piece_b, area}."""
+        if self.grid is None:
+            self.rebuild()
+
+        result = []
+        for a, b in sorted(self.grid.pairs()):
+            key = (a, b)
+            if key not in self._pair_cache:
+                self._pair_cache[key] = self.overlap_area(self._pieces[a], self._pieces[b])
+            area = self._pair_cache[key]
+            if area >= self.min_overlap_area:
+                result.append({"piece_a": a, "piece_b": b, "area": area})
+        return result
+
+    def outside(self, rect) -> List[Dict]:
+        """Pieces with points outside rect, with the max protrusion (mm)."""
+        result = []
+        for p in self.ga.solved_puzzles:
+            pts = self._points(p)
+            over = np.maximum.reduce([
+                rect.x - pts[:, 0], pts[:, 0] - rect.right,
+                rect.y - pts[:, 1], pts[:, 1] - rect.bottom,
+            ])
+            worst = float(over.max()) if len(over) else 0.0
+            if worst > 0:
+                result.append({"piece": p.index, "protrusion": worst})
+        return result
+
+    def report(self) -> Dict[str, List[Dict]]:
+        rep = {
+            "overlaps": self.overlaps(),
+            "outside_solved": self.outside(self.ga.area_solved),
+            "outside_base": self.outside(self.ga.base),
+        }
+        for o in rep["overlaps"]:
+            self.log.warning(f"Überlappung Teil {o['piece_a']} ↔ Teil {o['piece_b']}: {o['area']:.1f} mm²")
+        for o in rep["outside_solved"]:
+            self.log.warning(f"Teil {o['piece']} ragt {o['protrusion']:.1f} mm aus dem SOLVED-Bereich")
+        for o in rep["outside_base"]:
+            self.log.warning(f"Teil {o['piece']} ragt {o['protrusion']:.1f} mm aus der BASE")
+        return rep
@@ -0,0 +1,155 @@
+import numpy as np
+import cv2 as cv
+from typing import Dict, Optional, Tuple
+
+
+class ICPRefiner:
+    """
+    Fine alignment of two matched edges with Iterative Closest Point.
+
+    The coarse placement (Rotation + Translation on the 4-corner chords) is
+    only as good as get_best_4_corners. This stage takes the full edge point
+    sets of both pieces and iterates
+
+      correspondences: nearest point on edge A for every point on edge B (cKDTree)
+      rigid update:    small-angle least squares of the point-to-line distances
+
+    until the update is below tol or max_iter is reached. Both edges are
+    resampled to a fixed number of points first, so runtime does not depend
+    on contour resolution.
+    """
+
+    EDGE_TO = ((0, 1), (1, 2), (2, 3), (3, 0))
+
+    def __init__(self, num_points: int = 64, max_iter: int = 30, tol: float = 1e-4,
+                 reject_factor: float = 2.5, max_angle_deg: float = 15.0) -> None:
+        """
+        Parameters
+        ----------
+        num_points : int
+            Point budget per edge after resampling.
+        max_iter : int
+            Convergence cap.
+        tol : float
+            Stop when rotation (rad) and translation (mm) updates are below tol.
+        reject_factor : float
+            Drop pairs farther than reject_factor * median distance (edges
+            rarely cover exactly the same stretch).
+        max_angle_deg : float
+            Corrections larger than this are considered a failed fit and ignored.
+        """
+        self.num_points = int(num_points)
+        self.max_iter = int(max_iter)
+        self.tol = float(tol)
+        self.reject_factor = float(reject_factor)
+        self.max_angle_deg = float(max_angle_deg)
+
+    # ---------- edge extraction ----------
+    def edge_points(self, piece, edge_idx: int) -> np.ndarray:
+        """Contour points between the two corners of edge edge_idx (corners [TL, TR, BR, BL])."""
+        pts = np.asarray(piece.contour, dtype=np.float64).reshape(-1, 2)
+        corners = np.asarray(piece.corners, dtype=np.float64).reshape(4, 2)
+        n = len(pts)
+
+        # nearest contour index per corner (one broadcast)
+        d = np.linalg.norm(pts[None, :, :] - corners[:, None, :], axis=2)
+        idx = np.argmin(d, axis=1)
+
+        i, j = self.EDGE_TO[edge_idx % 4]
+        a, b = int(idx[i]), int(idx[j])
+        others = [int(idx[k]) for k in range(4) if k not in (i, j)]
+
+        fwd = (np.arange(a, a + ((b - a) % n) + 1)) % n
+        bwd = (np.arange(b, b + ((a - b) % n) + 1)) % n
+        # the edge is the arc between the two corners that contains no other corner
+        if not any(o in set(fwd[1:-1].tolist()) for o in others):
+            arc = fwd
+        else:
+            arc = bwd[::-1]
+        return pts[arc]
+
+    def _resample(self, pts: np.ndarray) -> np.ndarray:
+        if len(pts) < 2:
+            return pts
+        seg = np.linalg.norm(np.diff(pts, axis=0), axis=1)
+        dist = np.concatenate([[0.0], np.cumsum(seg)])
+        if dist[-1] <= 0:
+            return pts
+        t = np.linspace(0.0, dist[-1], self.num_points)
+        return np.stack([np.interp(t, dist, pts[:, 0]), np.interp(t, dist, pts[:, 1])], axis=1)
+
+    # ---------- ICP ----------
+    @staticmethod
+    def _normals(pts: np.ndarray) -> np.ndarray:
+        """Unit normals of a polyline (central differences)."""
+        tangent = np.gradient(pts, axis=0)
+        tangent /= np.linalg.norm(tangent, axis=1, keepdims=True) + 1e-12
+        return np.stack([-tangent[:, 1], tangent[:, 0]], axis=1)
+
+    def fit(self, source: np.ndarray, target: np.ndarray) -> Dict:
+        """
+        Rigid transform moving source onto target (point-to-line ICP).
+        Returns dict with R (2x2), t (2,), rmse, iterations.
+        """
+        from scipy.spatial import cKDTree
+
+        src = self._resample(np.asarray(source, dtype=np.float64).reshape(-1, 2))
+        dst = self._resample(np.asarray(target, dtype=np.float64).reshape(-1, 2))
+        nrm = self._normals(dst)
+        tree = cKDTree(dst)
+
+        R_total = np.eye(2)
+        t_total = np.zeros(2)
+        cur = src.copy()
+        rmse = np.inf
+        it = 0
+        for it in range(1, self.max_iter + 1):
+            dist, nn = tree.query(cur)
+            keep = dist <= max(self.reject_factor * np.median(dist), 1e-9)
+            if np.count_nonzero(keep) < 3:
+                break
+            p, q, n = cur[keep], dst[nn[keep]], nrm[nn[keep]]
+
+            # linearized  ((R p + t - q) . n)^2  for small angle theta:
+            # theta * (p_x n_y - p_y n_x) + t . n = (q - p) . n
+            A = np.stack([p[:, 0] * n[:, 1] - p[:, 1] * n[:, 0], n[:, 0], n[:, 1]], axis=1)
+            rhs = np.einsum("ij,ij->i", q - p, n)
+            theta, tx, ty = np.linalg.lstsq(A, rhs, rcond=None)[0]
+
+            c, s = np.cos(theta), np.sin(theta)
+            R = np.array([[c, -s], [s, c]])
+            t = np.array([tx, ty])
+            cur = cur @ R.T + t
+            R_total = R @ R_total
+            t_total = R @ t_total + t
+            rmse = float(np.sqrt(np.mean((rhs - A @ [theta, tx, ty]) ** 2)))
+            if abs(theta) < self.tol and np.linalg.norm(t) < self.tol:
+                break
+
+        return {"R": R_total, "t": t_total, "rmse": rmse, "iterations": it}
+
+    def refine(self, piece_a, edge_a: int, piece_b, edge_b: int) -> Optional[Dict]:
+        """
+        Correction for piece_b so its edge_b sits on edge_a of piece_a.
+
+        Returned as the same command format as the coarse placement:
+        rotate by angle (deg) around the centroid of piece_b, then move by (dx, dy).
+        Returns None if the fit is implausible.
+        """
+        fit = self.fit(self.edge_points(piece_b, edge_b), self.edge_points(piece_a, edge_a))
+        R, t = fit["R"], fit["t"]
+        angle = float(np.rad2deg(np.arctan2(R[1, 0], R[0, 0])))
+        if not np.isfinite(fit["rmse"]) or abs(angle) > self.max_angle_deg:
+            return None
+
+        pts = np.asarray(piece_b.contour, dtype=np.float32).reshape(-1, 2)
+        M = cv.moments(pts)
+        if abs(M["m00"]) > 1e-9:
+            c = np.array([M["m10"] / M["m00"], M["m01"] / M["m00"]])
+        else:
+            c = pts.mean(axis=0).astype(np.float64)
+
+        # R x + t == R (x - c) + c + d
+        d = R @ c + t - c
+        return {"angle": angle, "dx": float(d[0]), "dy": float(d[1]),
+                "rmse": fit["rmse"], "iterations": fit["iterations"]}
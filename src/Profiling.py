@@ -0,0 +1,196 @@
+from __future__ import annotations
+import cProfile
+import functools
+import importlib
+import inspect
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+from typing import Dict, Iterable, List, Optional
+
+# stage name -> (module, class, method); methods are patched on the class
+STAGES: Dict[str, tuple] = {
+    "find_contours": ("edgedetection", "EdgeDetection", "find_contours"),
+    "get_puzzle_edges": ("puzzle", "Puzzle", "get_puzzle_edges"),
+    "find_matches": ("matching", "Matching", "find_matches"),
+    "organize": ("puzzleorganizer", "PuzzleOrganizer", "organize"),
+    "place_anchor": ("Anchor", "Anchor", "place_anchor"),
+    "apply_matches": ("MatchPlacer", "MatchPlacer", "apply_matches"),
+    "render_diagnostics": ("visualizer", "Visualizer", "render_diagnostics"),
+}
+
+
+class _StageStats:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.profile: Optional[cProfile.Profile] = None
+        # allocation growth per source line, summed over all calls
+        self.alloc: Dict[str, List[int]] = {}
+        self.peak = 0
+
+
+class StageProfiler:
+    """
+    Opt-in cProfile / tracemalloc hooks around selected pipeline stages.
+
+        with StageProfiler("profile", stages=["find_matches", "apply_matches"]):
+            ...  # unchanged code
+
+    Every call of a hooked method is profiled; calls of the same stage are
+    accumulated (get_puzzle_edges runs once per piece). write() dumps
+    <stage>.pstats (open with pstats or snakeviz) and <stage>.alloc.txt with
+    the peak traced memory and the top-N lines by allocated bytes. A stage
+    called from inside another profiled stage is not profiled separately.
+    """
+
+    def __init__(self, out_dir: str, stages: Optional[Iterable[str]] = None, cprofile: bool = True,
+                 tracemalloc: bool = True, top: int = 20, frames: int = 1,
+                 logger: Optional[logging.Logger] = None) -> None:
+        stages = list(STAGES) if stages is None else list(stages)
+        unknown = [s for s in stages if s not in STAGES]
+        if unknown:
+            raise ValueError(f"Unbekannte Stufe(n): {unknown}; verfügbar: {list(STAGES)}")
+        self.out_dir = out_dir
+        self.stages = stages
+        self.use_cprofile = cprofile
+        self.use_tracemalloc = tracemalloc
+        self.top = int(top)
+        self.frames = int(frames)
+        self.log = logger or logging.getLogger(__name__)
+        self.stats: Dict[str, _StageStats] = {s: _StageStats(s) for s in stages}
+        self._originals: List[tuple] = []
+        self._active: Optional[str] = None
+        self._started_tracemalloc = False
+
+    @classmethod
+    def from_env(cls, logger: Optional[logging.Logger] = None) -> Optional["StageProfiler"]:
+        """
+        PREN_PROFILE=<dir> switches profiling on; PREN_PROFILE_STAGES=a,b limits
+        the stages, PREN_PROFILE_MODE=cprofile|tracemalloc picks only one of both.
+        """
+        out_dir = os.environ.get("PREN_PROFILE")
+        if not out_dir:
+            return None
+        stages = os.environ.get("PREN_PROFILE_STAGES")
+        mode = os.environ.get("PREN_PROFILE_MODE", "")
+        return cls(out_dir, stages=[s.strip() for s in stages.split(",") if s.strip()] if stages else None,
+                   cprofile=mode in ("", "cprofile"), tracemalloc=mode in ("", "tracemalloc"), logger=logger)
+
+    # ---------- hooks ----------
+    def install(self) -> "StageProfiler":
+        if self.use_tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracemalloc = True
+        for stage in self.stages:
+            module, cls_name, attr = STAGES[stage]
+            cls = getattr(importlib.import_module(module), cls_name)
+            raw = inspect.getattr_static(cls, attr)
+            func = raw.__func__ if isinstance(raw, (staticmethod, classmethod)) else raw
+            wrapped = self._wrap(stage, func)
+            if isinstance(raw, staticmethod):
+                wrapped = staticmethod(wrapped)
+            elif isinstance(raw, classmethod):
+                wrapped = classmethod(wrapped)
+            setattr(cls, attr, wrapped)
+            self._originals.append((cls, attr, raw))
+        return self
+
+    def uninstall(self) -> None:
+        for cls, attr, raw in reversed(self._originals):
+            setattr(cls, attr, raw)
+        self._originals = []
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def __enter__(self) -> "StageProfiler":
+        return self.install()
+
+    def __exit__(self, *exc) -> None:
+        self.uninstall()
+        self.write()
+
+    def _wrap(self, stage: str, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if self._active is not None:
+                return func(*args, **kwargs)
+            self._active = stage
+            try:
+                return self._call(self.stats[stage], func, args, kwargs)
+            finally:
+                self._active = None
+        return wrapper
+
+    @staticmethod
+    def _snapshot():
+        # eigene Buchhaltung von tracemalloc nicht mitzählen
+        return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+    def _call(self, st: _StageStats, func, args, kwargs):
+        before = None
+        if self.use_tracemalloc:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            before = self._snapshot()
+        prof = None
+        if self.use_cprofile:
+            prof = st.profile = st.profile or cProfile.Profile()
+
+        t0 = time.perf_counter()
+        if prof is not None:
+            prof.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if prof is not None:
+                prof.disable()
+            st.seconds += time.perf_counter() - t0
+            st.calls += 1
+            if before is not None:
+                st.peak = max(st.peak, tracemalloc.get_traced_memory()[1] - base)
+                after = self._snapshot()
+                for diff in after.compare_to(before, "lineno"):
+                    if diff.size_diff > 0:
+                        where = str(diff.traceback)
+                        acc = st.alloc.setdefault(where, [0, 0])
+                        acc[0] += diff.size_diff
+                        acc[1] += diff.count_diff
+
+    # ---------- output ----------
+    def write(self) -> List[str]:
+        """Write .pstats and allocation reports for every stage that ran; returns the paths."""
+        os.makedirs(self.out_dir, exist_ok=True)
+        written = []
+        for st in self.stats.values():
+            if st.calls == 0:
+                continue
+            if st.profile is not None:
+                path = os.path.join(self.out_dir, f"{st.name}.pstats")
+                st.profile.dump_stats(path)
+                written.append(path)
+            if self.use_tracemalloc:
+                path = os.path.join(self.out_dir, f"{st.name}.alloc.txt")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(f"{st.name}: {st.calls} Aufrufe, {st.seconds * 1000:.1f} ms, "
+                            f"Spitze {st.peak / 1024:.1f} KiB\n")
+                    top = sorted(st.alloc.items(), key=lambda kv: kv[1][0], reverse=True)[:self.top]
+                    for where, (size, count) in top:
+                        f.write(f"{size / 1024:10.1f} KiB {count:8d} Blöcke  {where}\n")
+                written.append(path)
+            self.log.info(f"Profil {st.name}: {st.calls} Aufrufe, {st.seconds * 1000:.1f} ms"
+                          + (f", Spitze {st.peak / 1024:.1f} KiB" if self.use_tracemalloc else ""))
+        return written
+
+    def top_functions(self, stage: str, n: int = 10) -> List[tuple]:
+        """(cumulative seconds, 'file:line(func)') of the n most expensive functions of a stage."""
+        prof = self.stats[stage].profile
+        if prof is None:
+            return []
+        stats = pstats.Stats(prof)
+        rows = [(ct, f"{fn[0]}:{fn[1]}({fn[2]})") for fn, (_, _, _, ct, _) in stats.stats.items()]
+        return sorted(rows, reverse=True)[:n]
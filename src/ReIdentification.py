@@ -0,0 +1,365 @@
+from __future__ import annotations
+import copy
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2 as cv
+import numpy as np
+
+EDGE_CODES = {"flat": "f", "tab": "t", "hole": "h"}
+
+
+def _resample_closed(contour: np.ndarray, samples: int) -> np.ndarray:
+    # geschlossene Kontur gleichmässig entlang der Bogenlänge abtasten
+    pts = np.asarray(contour, np.float64).reshape(-1, 2)
+    closed = np.vstack([pts, pts[:1]])
+    d = np.concatenate([[0.0], np.cumsum(np.linalg.norm(np.diff(closed, axis=0), axis=1))])
+    if d[-1] == 0:
+        return np.repeat(pts[:1], samples, axis=0)
+    t = np.linspace(0.0, d[-1], samples, endpoint=False)
+    return np.stack([np.interp(t, d, closed[:, 0]), np.interp(t, d, closed[:, 1])], axis=1)
+
+
+def edge_pattern(edge_types: Sequence[Optional[str]]) -> Optional[str]:
+    """
+    Edge types [top, right, bottom, left] as a rotation-invariant string:
+    the smallest of the 4 cyclic rotations, e.g. ("tab", "flat", "hole", "tab") -> "fhtt".
+    None if a type is unknown.
+    """
+    codes = [EDGE_CODES.get(t) for t in edge_types]
+    if len(codes) != 4 or None in codes:
+        return None
+    s = "".join(codes)
+    return min(s[k:] + s[:k] for k in range(4))
+
+
+@dataclass
+class PieceSignature:
+    """
+    Rotation-invariant description of one piece outline.
+
+    area     contour area in px^2 (same camera, so scale is fixed)
+    hu       log-scaled Hu moments
+    fourier  |FFT| of the centroid distance r(s), harmonics 1..K divided by |F0|
+    radial   r(s) itself, used to find the start point when aligning
+    outline  contour resampled along the arc length, centered (for the rigid fit)
+    center   centroid of the resampled outline in image pixels
+    pattern  canonical edge-type pattern (edge_pattern) or None
+    """
+    area: float
+    hu: np.ndarray
+    fourier: np.ndarray
+    radial: np.ndarray
+    outline: np.ndarray
+    center: np.ndarray
+    pattern: Optional[str] = None
+
+    @classmethod
+    def of(cls, contour, edge_types: Optional[Sequence[str]] = None, samples: int = 128,
+           harmonics: int = 16) -> "PieceSignature":
+        contour = np.asarray(contour)
+        hu = cv.HuMoments(cv.moments(contour.reshape(-1, 1, 2).astype(np.float32))).ravel()
+        hu = -np.sign(hu) * np.log10(np.abs(hu) + 1e-30)
+        pts = _resample_closed(contour, samples)
+        center = pts.mean(axis=0)
+        outline = pts - center
+        radial = np.linalg.norm(outline, axis=1)
+        spectrum = np.abs(np.fft.rfft(radial))
+        fourier = spectrum[1:harmonics + 1] / spectrum[0] if spectrum[0] > 0 else np.zeros(harmonics)
+        return cls(area=float(cv.contourArea(contour.reshape(-1, 1, 2).astype(np.float32))), hu=hu,
+                   fourier=fourier, radial=radial, outline=outline, center=center,
+                   pattern=edge_pattern(edge_types) if edge_types is not None else None)
+
+    def distance(self, other: "PieceSignature") -> float:
+        """Shape distance: mean Hu difference plus Fourier descriptor difference (both scale-free)."""
+        return float(np.abs(self.hu - other.hu).mean() + np.linalg.norm(self.fourier - other.fourier))
+
+    def align(self, other: "PieceSignature") -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rigid transform (R, t) with new = R @ old + t, mapping this (old) outline
+        onto other (new): the start-point shift comes from the circular
+        cross-correlation of the radial profiles, the rotation from a Kabsch fit.
+        """
+        a = self.radial - self.radial.mean()
+        b = other.radial - other.radial.mean()
+        shift = int(np.argmax(np.fft.irfft(np.conj(np.fft.rfft(a)) * np.fft.rfft(b), n=len(a))))
+        Q = np.roll(other.outline, -shift, axis=0)
+        U, _, Vt = np.linalg.svd(self.outline.T @ Q)
+        d = np.sign(np.linalg.det(U @ Vt))
+        R = (U @ np.diag([1.0, d]) @ Vt).T
+        return R, other.center - R @ self.center
+
+
+@dataclass
+class CarryOver:
+    """
+    Result of PieceIndex.carry_over for one new capture.
+
+    mapping     new piece index -> known piece index
+    pieces      new pieces; identified ones carry the known edges, moved into the new image
+    matches     known matches between identified pieces, renumbered to the new pieces
+    artifact    MatchArtifact of the known scene, renumbered and moved (None without one)
+    placements  known placement commands of identified pieces, renumbered and
+                corrected for the new pose (empty if the index has no homography)
+    unknown     new piece indices without a known counterpart (still need segmentation/matching)
+    """
+    mapping: Dict[int, int] = field(default_factory=dict)
+    pieces: List = field(default_factory=list)
+    matches: List[Dict] = field(default_factory=list)
+    artifact: Optional[object] = None
+    placements: List[Dict] = field(default_factory=list)
+    unknown: List[int] = field(default_factory=list)
+
+
+class PieceIndex:
+    """
+    Re-identification of pieces across captures.
+
+        index = PieceIndex()
+        index.add_scene(pieces, matches, artifact, solver.placements, homography=H)
+        ...  # robot moves pieces, new photo
+        carried = index.carry_over(new_pieces)
+        carried.pieces, carried.matches, carried.unknown
+
+    Every known piece is stored with a PieceSignature in a bucket keyed by its
+    log-area (bins of width area_tolerance); a lookup only scores the pieces in
+    its own and the two neighbouring bins, so it costs the same for 4 or 4000
+    known pieces. Candidates with a different edge-type pattern (if both sides
+    know theirs) are skipped, the rest is ranked by PieceSignature.distance and
+    accepted below max_distance.
+    """
+
+    def __init__(self, area_tolerance: float = 0.05, max_distance: float = 0.5, samples: int = 128,
+                 harmonics: int = 16, refine: bool = True, logger: Optional[logging.Logger] = None) -> None:
+        self.area_tolerance = area_tolerance
+        self.max_distance = max_distance
+        self.samples = samples
+        self.harmonics = harmonics
+        self.refine = refine
+        self.log = logger or logging.getLogger(__name__)
+        self.signatures: Dict[int, PieceSignature] = {}
+        self.pieces: Dict[int, object] = {}
+        self.matches: List[Dict] = []
+        self.placements: List[Dict] = []
+        self.homography: Optional[np.ndarray] = None
+        self.artifact = None
+        self._bins: Dict[int, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def _bin(self, area: float) -> int:
+        return int(math.floor(math.log(max(area, 1.0)) / math.log1p(self.area_tolerance)))
+
+    def signature(self, piece, edge_types: Optional[Sequence[str]] = None) -> PieceSignature:
+        return PieceSignature.of(piece.contour, edge_types, samples=self.samples, harmonics=self.harmonics)
+
+    # ---------- build ----------
+    def add(self, piece, edge_types: Optional[Sequence[str]] = None) -> PieceSignature:
+        if piece.index in self.signatures:
+            self._bins[self._bin(self.signatures[piece.index].area)].remove(piece.index)
+        sig = self.signature(piece, edge_types)
+        self.signatures[piece.index] = sig
+        self.pieces[piece.index] = piece
+        self._bins.setdefault(self._bin(sig.area), []).append(piece.index)
+        return sig
+
+    def add_scene(self, pieces, matches: Sequence[Dict] = (), artifact=None,
+                  placements: Sequence[Dict] = (), homography=None) -> "PieceIndex":
+        """
+        Known pieces (with segmented edges) and whatever was computed for them.
+        Placement commands are in table mm, so they can only be carried over
+        with the pixel -> mm homography they were computed with.
+        """
+        for p in pieces:
+            types = [artifact.edge_types.get((p.index, k)) for k in range(4)] if artifact is not None else None
+            self.add(p, types)
+        self.matches = list(matches)
+        self.artifact = artifact
+        self.placements = list(placements)
+        self.homography = None if homography is None else np.asarray(homography, np.float64)
+        return self
+
+    @classmethod
+    def from_scene(cls, store, placements: Sequence[Dict] = (), homography=None, **kwargs) -> "PieceIndex":
+        """Index of a saved scene (SceneStore)."""
+        return cls(**kwargs).add_scene(store.pieces(), store.matches_list(), store.artifact(), placements,
+                                       homography)
+
+    # ---------- lookup ----------
+    def lookup(self, piece, edge_types: Optional[Sequence[str]] = None) -> Optional[Tuple[int, float]]:
+        """(known index, distance) of the best known piece, or None."""
+        hits = [(dist, idx) for idx, dist in self._candidates(self.signature(piece, edge_types))]
+        if not hits:
+            return None
+        dist, idx = min(hits)
+        return idx, dist
+
+    def _candidates(self, sig: PieceSignature):
+        """(known index, distance) of all known pieces that could be sig."""
+        b = self._bin(sig.area)
+        for key in (b - 1, b, b + 1):
+            for idx in self._bins.get(key, ()):
+                known = self.signatures[idx]
+                if abs(known.area - sig.area) > self.area_tolerance * max(known.area, sig.area):
+                    continue
+                if sig.pattern and known.pattern and sig.pattern != known.pattern:
+                    continue
+                dist = known.distance(sig)
+                if dist < self.max_distance:
+                    yield idx, dist
+
+    def identify(self, pieces, edge_types: Optional[Dict[int, Sequence[str]]] = None) -> Dict[int, int]:
+        """new index -> known index, one to one; the closest pairs are assigned first."""
+        return self._assign({p.index: self.signature(p, (edge_types or {}).get(p.index)) for p in pieces})
+
+    def _assign(self, signatures: Dict[int, PieceSignature]) -> Dict[int, int]:
+        candidates = []
+        for new, sig in signatures.items():
+            candidates += [(dist, new, idx) for idx, dist in self._candidates(sig)]
+        mapping, taken = {}, set()
+        for dist, new, old in sorted(candidates):
+            if new not in mapping and old not in taken:
+                mapping[new] = old
+                taken.add(old)
+        return mapping
+
+    # ---------- carry over ----------
+    def carry_over(self, pieces) -> CarryOver:
+        """Identify new pieces and move edges, matches, artifact and placements over to them."""
+        signatures = {p.index: self.signature(p) for p in pieces}
+        mapping = self._assign(signatures)
+        result = CarryOver(mapping=mapping)
+        edge_map: Dict[Tuple[int, int], Tuple[int, int]] = {}     # (old, edge) -> (new, edge)
+        transforms = {}
+
+        for p in pieces:
+            old = mapping.get(p.index)
+            if old is None:
+                result.unknown.append(p.index)
+                result.pieces.append(p)
+                continue
+            R, t = self._transform(old, p, signatures[p.index])
+            transforms[p.index] = (R, t)
+            # Vierteldrehungen im Bild: alte Kante k liegt jetzt auf Seite (k + turns) % 4
+            turns = int(round(math.degrees(math.atan2(R[1, 0], R[0, 0])) / 90.0)) % 4
+            moved = copy.copy(p)
+            known_edges = list(getattr(self.pieces[old], "edges", []) or [])
+            edges = [{"points": [], "type": "inner"} for _ in range(4)]
+            for k, e in enumerate(known_edges[:4]):
+                edges[(k + turns) % 4] = {**e, "points": _move(e["points"], R, t, as_int=True)}
+                edge_map[(old, k)] = (p.index, (k + turns) % 4)
+            moved.edges = edges
+            result.pieces.append(moved)
+
+        for m in self.matches:
+            a, b = (m["piece_a"], m["edge_a"]), (m["piece_b"], m["edge_b"])
+            if a in edge_map and b in edge_map:
+                (pa, ea), (pb, eb) = edge_map[a], edge_map[b]
+                result.matches.append({**m, "piece_a": pa, "edge_a": ea, "piece_b": pb, "edge_b": eb})
+
+        result.placements = self._carry_placements(mapping, result.pieces, transforms)
+        if self.artifact is not None:
+            result.artifact = self._carry_artifact(mapping, edge_map, transforms)
+        self.log.info(f"Wiedererkannt: {len(mapping)}/{len(pieces)} Teile, {len(result.matches)} Matches "
+                      f"übernommen, unbekannt: {result.unknown}")
+        return result
+
+    def _transform(self, old: int, piece, sig: PieceSignature) -> Tuple[np.ndarray, np.ndarray]:
+        # grob über die Signaturen, dann ICP auf den vollen Konturen (Abtastraster ausgleichen)
+        from Position_and_Rotation.ICP import ICPRefiner
+
+        R, t = self.signatures[old].align(sig)
+        if self.refine:
+            source = np.asarray(self.pieces[old].contour, np.float64).reshape(-1, 2) @ R.T + t
+            fit = ICPRefiner(num_points=4 * self.samples).fit(source, np.asarray(piece.contour).reshape(-1, 2))
+            if np.isfinite(fit["rmse"]):
+                R, t = fit["R"] @ R, fit["R"] @ t + fit["t"]
+        return R, t
+
+    def _carry_placements(self, mapping, pieces, transforms) -> List[Dict]:
+        """
+        Placement commands for the new poses. A command rotates the piece by
+        angle around its centroid (table mm), then shifts it by (dx, dy); the
+        target stays the same, so the rotation the piece already made is taken
+        off the angle and the shift is recomputed from the new centroid.
+        """
+        if not self.placements:
+            return []
+        if self.homography is None:
+            self.log.warning("Platzierungen nicht übernommen: keine Homographie (Pose in mm unbekannt)")
+            return []
+        H = self.homography
+        inverse = {old: new for new, old in mapping.items()}
+        by_index = {p.index: p for p in pieces}
+        out = []
+        for c in self.placements:
+            new = inverse.get(c["piece"])
+            if new is None:
+                continue
+            R, t = transforms[new]
+            old_px = np.asarray(self.pieces[c["piece"]].contour, np.float64).reshape(-1, 2)
+            old_mm, new_mm = _to_mm(old_px, H), _to_mm(by_index[new].contour, H)
+            c_old, c_new = _centroid(old_mm), _centroid(new_mm)
+
+            # Drehung in mm (Y-Achse gespiegelt): Richtung (1, 0) um den Schwerpunkt in Pixeln abbilden
+            center_px = _centroid(old_px)
+            probe = np.array([center_px, center_px + (10.0, 0.0)])
+            before = _to_mm(probe, H)
+            after = _to_mm(probe @ R.T + t, H)
+            turned = math.degrees(math.atan2(*(after[1] - after[0])[::-1]) -
+                                  math.atan2(*(before[1] - before[0])[::-1]))
+            angle = (c["angle"] - turned + 180.0) % 360.0 - 180.0
+            dx, dy = c_old + (c["dx"], c["dy"]) - c_new
+            out.append({**c, "piece": new, "angle": angle, "dx": float(dx), "dy": float(dy)})
+        return out
+
+    def _carry_artifact(self, mapping, edge_map, transforms):
+        from matchartifact import MatchArtifact
+
+        art = self.artifact
+        out = MatchArtifact(num_points=art.num_points)
+        for new, old in mapping.items():
+            R, t = transforms[new]
+            if old in art.corners:
+                out.corners[new] = [tuple(c) for c in _move(art.corners[old], R, t)]
+            if old in art.edges:
+                out.edges[new] = [[]] * 4
+        # normalisierte Deskriptoren, Typen und Farbprofile hängen nicht von der Lage ab
+        for (old, k), (new, j) in edge_map.items():
+            R, t = transforms[new]
+            if old in art.edges and k < len(art.edges[old]):
+                out.edges[new][j] = _move(art.edges[old][k], R, t, as_int=True)
+            for src, dst in ((art.descriptors, out.descriptors), (art.edge_types, out.edge_types),
+                             (art.appearance, out.appearance)):
+                if (old, k) in src:
+                    dst[(new, j)] = src[(old, k)]
+        for (pa, ea, pb, eb), reversed_ in art.directions.items():
+            if (pa, ea) in edge_map and (pb, eb) in edge_map:
+                out.directions[(*edge_map[(pa, ea)], *edge_map[(pb, eb)])] = reversed_
+        return out
+
+
+def _to_mm(points, H: np.ndarray) -> np.ndarray:
+    pts = np.asarray(points, np.float64).reshape(-1, 1, 2)
+    return cv.perspectiveTransform(pts, H).reshape(-1, 2)
+
+
+def _centroid(pts: np.ndarray) -> np.ndarray:
+    # Flächenschwerpunkt wie Rotation.rotate_puzzle_in_place
+    M = cv.moments(np.asarray(pts, np.float32).reshape(-1, 1, 2))
+    if abs(M["m00"]) > 1e-9:
+        return np.array([M["m10"] / M["m00"], M["m01"] / M["m00"]])
+    return np.asarray(pts, np.float64).reshape(-1, 2).mean(axis=0)
+
+
+def _move(points, R, t, as_int: bool = False) -> List[tuple]:
+    pts = np.asarray(points, np.float64).reshape(-1, 2)
+    if not len(pts):
+        return []
+    moved = pts @ R.T + t
+    if as_int:
+        return [tuple(p) for p in np.rint(moved).astype(int).tolist()]
+    return [tuple(p) for p in moved.tolist()]
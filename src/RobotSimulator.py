@@ -0,0 +1,148 @@
+from __future__ import annotations
+import heapq
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class RobotConfig:
+    """
+    Timing model of the pick-and-place robot.
+
+    Units: mm, degrees, seconds.
+    """
+    travel_speed: float = 150.0      # gripper speed (mm/s)
+    rotation_speed: float = 90.0     # wrist speed (deg/s)
+    pick_time: float = 0.8           # lower, grip, lift (s)
+    place_time: float = 0.8          # lower, release, lift (s)
+    capture_time: float = 1.5        # camera re-capture incl. processing (s)
+    capture_every: int = 1           # re-capture after every n placements (0 = never)
+    initial_capture: bool = True     # capture once before the first move
+    home: Tuple[float, float] = (0.0, 0.0)
+
+
+class RobotSimulator:
+    """
+    Discrete-event simulation of the robot executing placement commands.
+
+    A command is a dict {piece, angle, dx, dy} as produced by
+    Anchor.place_anchor and MatchPlacer: rotate the piece by angle around its
+    centroid, then move the centroid by (dx, dy). For every command the robot
+
+      1. travels empty from its position to the piece   (travel)
+      2. picks it up                                      (pick)
+      3. moves it to the target, rotating on the way      (transport = max(travel, rotation))
+      4. places it                                        (place)
+      5. optionally re-captures the scene                 (capture)
+
+    Events are kept in a time-ordered heap; each handler schedules the next
+    event, so additional resources (e.g. a camera running in parallel) can be
+    added as further event types.
+    """
+
+    def __init__(self, config: Optional[RobotConfig] = None, logger: Optional[logging.Logger] = None) -> None:
+        self.config = config or RobotConfig()
+        self.log = logger or logging.getLogger(__name__)
+
+    def _travel_time(self, a, b) -> float:
+        return float(np.hypot(b[0] - a[0], b[1] - a[1])) / self.config.travel_speed
+
+    def _rotation_time(self, angle_deg: float) -> float:
+        a = (float(angle_deg) + 180.0) % 360.0 - 180.0
+        return abs(a) / self.config.rotation_speed
+
+    def simulate(self, commands: Sequence[Dict], positions: Dict[int, Tuple[float, float]]) -> Dict:
+        """
+        Run all commands in order.
+
+        positions : piece -> (x, y) current centroid on the table (pick position),
+            in the same table frame as the commands (both areas share the
+            calibration homography)
+
+        Returns dict with total_time, moves (per-move breakdown) and totals per phase.
+        """
+        cfg = self.config
+        pos = {k: (float(v[0]), float(v[1])) for k, v in positions.items()}
+
+        events: List = []
+        seq = 0
+
+        def schedule(t, kind, data=None):
+            nonlocal seq
+            heapq.heappush(events, (t, seq, kind, data))
+            seq += 1
+
+        gripper = (float(cfg.home[0]), float(cfg.home[1]))
+        moves: List[Dict] = []
+        current: Optional[Dict] = None
+        placed = 0
+
+        if cfg.initial_capture:
+            schedule(0.0, "capture_start", None)
+        else:
+            schedule(0.0, "next", 0)
+
+        now = 0.0
+        while events:
+            now, _, kind, data = heapq.heappop(events)
+
+            if kind == "capture_start":
+                if current is not None:
+                    current["capture"] = cfg.capture_time
+                schedule(now + cfg.capture_time, "capture_done", None)
+
+            elif kind == "capture_done":
+                if current is not None:
+                    current["end"] = now
+                schedule(now, "next", len(moves))
+
+            elif kind == "next":
+                if data >= len(commands):
+                    continue
+                cmd = commands[data]
+                piece = cmd["piece"]
+                pick = pos[piece]
+                dx, dy = float(cmd["dx"]), float(cmd["dy"])
+                target = (pick[0] + dx, pick[1] + dy)
+
+                current = {"piece": piece, "start": now, "pick_xy": pick, "place_xy": target,
+                           "angle": float(cmd["angle"]), "travel": self._travel_time(gripper, pick),
+                           "pick": cfg.pick_time, "place": cfg.place_time, "capture": 0.0}
+                current["transport"] = max(self._travel_time(pick, target), self._rotation_time(cmd["angle"]))
+                moves.append(current)
+                schedule(now + current["travel"], "arrive_pick", None)
+
+            elif kind == "arrive_pick":
+                schedule(now + current["pick"], "picked", None)
+
+            elif kind == "picked":
+                schedule(now + current["transport"], "arrive_place", None)
+
+            elif kind == "arrive_place":
+                schedule(now + current["place"], "placed", None)
+
+            elif kind == "placed":
+                piece = current["piece"]
+                gripper = current["place_xy"]
+                pos[piece] = current["place_xy"]
+                placed += 1
+                current["end"] = now
+                if cfg.capture_every and placed % cfg.capture_every == 0:
+                    schedule(now, "capture_start", None)
+                else:
+                    schedule(now, "next", len(moves))
+
+        totals = {k: float(sum(m[k] for m in moves)) for k in ("travel", "pick", "transport", "place", "capture")}
+        if cfg.initial_capture:
+            totals["capture"] += cfg.capture_time
+        result = {"total_time": float(now), "moves": moves, "totals": totals}
+
+        for m in moves:
+            self.log.info(f"Teil {m['piece']}: {m['start']:.2f}s → {m['end']:.2f}s "
+                          f"(Fahrt {m['travel']:.2f}s, Transport {m['transport']:.2f}s, "
+                          f"Kamera {m['capture']:.2f}s)")
+        self.log.info(f"Gesamte Zykluszeit: {now:.2f}s für {len(moves)} Bewegungen")
+        return result
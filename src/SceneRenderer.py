@@ -0,0 +1,146 @@
+from __future__ import annotations
+from typing import Optional, Tuple
+
+import cv2 as cv
+import numpy as np
+
+
+class SceneRenderer:
+    """
+    Rasterizes a GlobalArea straight into a NumPy canvas (BGR, uint8).
+
+    Coordinates are mm with Y up (like GlobalArea.show); the canvas has
+    px_per_mm pixels per mm. The static part (base/unsolved/solved
+    rectangles) is drawn once, each frame only copies it and draws the
+    contours with cv.fillPoly/cv.polylines, mapping all points of an area
+    in one operation on the packed buffer.
+    """
+
+    COLORS = {
+        "base": (0, 0, 0),
+        "unsolved": (180, 119, 31),      # tab:blue
+        "solved": (44, 160, 44),         # tab:green
+        "unsolved_piece": (40, 39, 214),  # tab:red
+        "solved_piece": (14, 127, 255),   # tab:orange
+        "corner": (189, 103, 148),        # tab:purple
+    }
+
+    def __init__(self, ga, px_per_mm: float = 2.0, margin: float = 10.0,
+                 fill_alpha: float = 0.25, draw_corners: bool = True) -> None:
+        self.ga = ga
+        self.scale = float(px_per_mm)
+        self.margin = float(margin)
+        self.fill_alpha = float(fill_alpha)
+        self.draw_corners = draw_corners
+
+        self.x0 = ga.base.x - margin
+        self.y1 = ga.base.bottom + margin
+        w = int(np.ceil((ga.base.w + 2 * margin) * self.scale))
+        h = int(np.ceil((ga.base.h + 2 * margin) * self.scale))
+        self.size = (w, h)
+        self._background = self._draw_background()
+
+    # ---------- mapping ----------
+    def to_px(self, pts) -> np.ndarray:
+        """mm (Y up) → pixel (row down), vectorized, float32."""
+        pts = np.asarray(pts, dtype=np.float32).reshape(-1, 2)
+        out = np.empty_like(pts)
+        out[:, 0] = (pts[:, 0] - self.x0) * self.scale
+        out[:, 1] = (self.y1 - pts[:, 1]) * self.scale
+        return out
+
+    def _rect(self, canvas, rect, color, label):
+        p0 = self.to_px([[rect.x, rect.bottom]])[0]
+        p1 = self.to_px([[rect.right, rect.y]])[0]
+        cv.rectangle(canvas, tuple(int(v) for v in p0), tuple(int(v) for v in p1), color, 2)
+        cv.putText(canvas, label, (int(p0[0]) + 4, int(p1[1]) - 6),
+                   cv.FONT_HERSHEY_SIMPLEX, 0.45, color, 1, cv.LINE_AA)
+
+    def _draw_background(self) -> np.ndarray:
+        w, h = self.size
+        canvas = np.full((h, w, 3), 255, np.uint8)
+        self._rect(canvas, self.ga.base, self.COLORS["base"], "BASE")
+        self._rect(canvas, self.ga.area_unsolved, self.COLORS["unsolved"], "UNSOLVED")
+        self._rect(canvas, self.ga.area_solved, self.COLORS["solved"], "SOLVED")
+        return canvas
+
+    # ---------- drawing ----------
+    def _polys(self, solved):
+        """Pixel polygons of one list, mapped in one pass over its packed buffer."""
+        buf = self.ga.packed(solved)
+        if not len(buf):
+            return [], np.empty((0, 4, 2), np.float32)
+        px = np.round(self.to_px(buf.points)).astype(np.int32)
+        polys = [px[buf.offsets[i]:buf.offsets[i + 1]] for i in range(len(buf))]
+        corners = self.to_px(buf.corners.reshape(-1, 2)).reshape(-1, 4, 2)
+        return polys, corners
+
+    def _draw_group(self, canvas, polys, corners, color, prefix, centroids):
+        if not polys:
+            return
+        if self.fill_alpha > 0:
+            overlay = canvas.copy()
+            cv.fillPoly(overlay, polys, color)
+            cv.addWeighted(overlay, self.fill_alpha, canvas, 1 - self.fill_alpha, 0, dst=canvas)
+        cv.polylines(canvas, polys, True, color, 1, cv.LINE_AA)
+        if self.draw_corners:
+            for c in np.round(corners.reshape(-1, 2)).astype(int):
+                cv.circle(canvas, (int(c[0]), int(c[1])), 3, self.COLORS["corner"], -1)
+        for i, c in enumerate(np.round(centroids).astype(int)):
+            cv.putText(canvas, f"{prefix}{i}", (int(c[0]) - 8, int(c[1]) + 4),
+                       cv.FONT_HERSHEY_SIMPLEX, 0.45, color, 1, cv.LINE_AA)
+
+    def render(self) -> np.ndarray:
+        """One frame of the current scene."""
+        canvas = self._background.copy()
+        for solved, key, prefix in ((False, "unsolved_piece", "U"), (True, "solved_piece", "S")):
+            polys, corners = self._polys(solved)
+            if not polys:
+                continue
+            centroids = self.to_px(self.ga.piece_centroids(solved=solved))
+            self._draw_group(canvas, polys, corners, self.COLORS[key], prefix, centroids)
+        return canvas
+
+    def save(self, path: str) -> str:
+        cv.imwrite(path, self.render())
+        return path
+
+
+class PlacementRecorder:
+    """
+    Writes one frame per placement step into a video.
+
+    Register as a MatchPlacer listener; every on_piece_moved renders the
+    scene and appends it. Call capture() for extra frames (e.g. after the
+    anchor) and close() at the end, or use it as a context manager.
+    """
+
+    def __init__(self, renderer: SceneRenderer, path: str, fps: float = 4.0,
+                 fourcc: str = "mp4v", hold_frames: int = 1) -> None:
+        self.renderer = renderer
+        self.path = path
+        self.hold_frames = max(1, int(hold_frames))
+        self.writer = cv.VideoWriter(path, cv.VideoWriter_fourcc(*fourcc), fps, renderer.size)
+        if not self.writer.isOpened():
+            raise IOError(f"VideoWriter konnte nicht geöffnet werden: {path}")
+        self.frames = 0
+
+    def capture(self) -> None:
+        frame = self.renderer.render()
+        for _ in range(self.hold_frames):
+            self.writer.write(frame)
+            self.frames += 1
+
+    def on_piece_moved(self, piece) -> None:
+        self.capture()
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+
+    def __enter__(self) -> "PlacementRecorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
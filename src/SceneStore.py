@@ -0,0 +1,186 @@
+from __future__ import annotations
+import json
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from puzzle import Puzzle
+
+FORMAT = "pren-scene"
+VERSION = 1
+
+EDGE_TYPES = ("", "flat", "tab", "hole")     # code 0 = unknown / no descriptor
+
+MATCH_DTYPE = np.dtype([("piece_a", "<i4"), ("edge_a", "<i1"), ("piece_b", "<i4"), ("edge_b", "<i1"),
+                        ("score", "<f8"), ("reversed", "<i1")])   # reversed: -1 = unknown
+
+
+def _pack(arrays, dtype, width=2):
+    arrays = [np.asarray(a).reshape(-1, width) for a in arrays]
+    offsets = np.zeros(len(arrays) + 1, np.int64)
+    offsets[1:] = np.cumsum([len(a) for a in arrays])
+    flat = np.concatenate(arrays).astype(dtype) if arrays else np.empty((0, width), dtype)
+    return flat, offsets
+
+
+def _point_dtype(arrays):
+    # OpenCV contours are int32 -> stored exactly; anything transformed stays float32
+    arrays = [a for a in arrays if len(a)]
+    return np.int32 if all(np.issubdtype(a.dtype, np.integer) for a in arrays) else np.float32
+
+
+class SceneStore:
+    """
+    One detected scene as a directory of flat .npy arrays plus header.json.
+
+      index        (P,)           piece numbers
+      geometry     (P, 7) f8      area, bbox x, y, w, h, center x, y
+      points       (N, 2)         contour points of all pieces, back to back
+      offsets      (P + 1,) i8    piece i owns points[offsets[i]:offsets[i + 1]]
+      corners      (P, 4, 2) f4   [TL, TR, BR, BL]
+      edge_points  (M, 2)         edge points, 4 edges per piece [top, right, bottom, left]
+      edge_offsets (4P + 1,) i8   edge k of piece i: slot 4 * i + k
+      edge_types   (P, 4) u1      code into EDGE_TYPES
+      descriptors  (P, 4, K, 2) f4  normalized + resampled edges (as matched)
+      matches      (Q,)           structured, see MATCH_DTYPE
+
+    SceneStore.open() memory-maps every array (np.load(mmap_mode="r")), so a
+    scene with thousands of pieces opens without reading or decoding anything;
+    pieces are built on access. Pickling a SceneStore only sends the path, so
+    worker processes re-open the same files instead of receiving copies.
+    """
+
+    ARRAYS = ("index", "geometry", "points", "offsets", "corners", "edge_points", "edge_offsets",
+              "edge_types", "descriptors", "matches")
+
+    def __init__(self, path: str, header: Dict, arrays: Dict[str, np.ndarray]) -> None:
+        self.path = path
+        self.header = header
+        self.num_points = int(header["num_points"])
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+
+    # ---------- write ----------
+    @staticmethod
+    def save(path: str, pieces: Sequence, matches: Sequence[Dict] = (), artifact=None,
+             num_points: int = 100, image: Optional[str] = None) -> str:
+        """
+        Write pieces with segmented edges (get_puzzle_edges) and optional matches.
+        artifact (MatchArtifact of the same run) supplies corners, descriptors,
+        edge types and directions; without it they are computed here.
+        """
+        from matchartifact import MatchArtifact
+
+        if artifact is None:
+            artifact = MatchArtifact.from_pieces(pieces, num_points=num_points)
+        num_points = artifact.num_points
+        P = len(pieces)
+
+        contours = [np.asarray(p.contour).reshape(-1, 2) for p in pieces]
+        points, offsets = _pack(contours, _point_dtype(contours))
+        edges = [np.asarray(e["points"]).reshape(-1, 2) for p in pieces for e in _four(p.edges)]
+        edge_points, edge_offsets = _pack(edges, _point_dtype(edges))
+
+        geometry = np.zeros((P, 7), np.float64)
+        corners = np.zeros((P, 4, 2), np.float32)
+        edge_types = np.zeros((P, 4), np.uint8)
+        descriptors = np.zeros((P, 4, num_points, 2), np.float32)
+        for i, p in enumerate(pieces):
+            geometry[i] = (p.area, *p.bounding_box, *p.center_point)
+            if artifact.corners.get(p.index) is not None:
+                corners[i] = np.asarray(artifact.corners[p.index], np.float32).reshape(4, 2)
+            for k in range(4):
+                edge_types[i, k] = EDGE_TYPES.index(artifact.edge_types.get((p.index, k), ""))
+                desc = artifact.descriptors.get((p.index, k))
+                if desc is not None and np.shape(desc) == (num_points, 2):
+                    descriptors[i, k] = desc
+
+        rows = []
+        for m in matches:
+            key = (m["piece_a"], m["edge_a"], m["piece_b"], m["edge_b"])
+            rows.append((*key, m["score"], int(artifact.directions[key]) if key in artifact.directions else -1))
+        arrays = {
+            "index": np.array([p.index for p in pieces], np.int64),
+            "geometry": geometry, "points": points, "offsets": offsets, "corners": corners,
+            "edge_points": edge_points, "edge_offsets": edge_offsets, "edge_types": edge_types,
+            "descriptors": descriptors, "matches": np.array(rows, MATCH_DTYPE),
+        }
+
+        os.makedirs(path, exist_ok=True)
+        for name, arr in arrays.items():
+            np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(arr))
+        header = {"format": FORMAT, "version": VERSION, "pieces": P, "num_points": num_points,
+                  "image": image, "edge_types": list(EDGE_TYPES),
+                  "arrays": {k: {"shape": list(v.shape), "dtype": v.dtype.str} for k, v in arrays.items()}}
+        # header zuletzt: ein Ordner ohne header.json ist unvollständig
+        with open(os.path.join(path, "header.json"), "w", encoding="utf-8") as f:
+            json.dump(header, f, indent=1)
+        return path
+
+    # ---------- read ----------
+    @classmethod
+    def open(cls, path: str, mmap: bool = True) -> "SceneStore":
+        with open(os.path.join(path, "header.json"), encoding="utf-8") as f:
+            header = json.load(f)
+        if header.get("format") != FORMAT or header.get("version") != VERSION:
+            raise ValueError(f"Kein Szenenformat {FORMAT} v{VERSION}: {path}")
+        mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in cls.ARRAYS}
+        return cls(path, header, arrays)
+
+    def __reduce__(self):
+        return (SceneStore.open, (self.path,))
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def contour(self, i: int) -> np.ndarray:
+        """(n_i, 1, 2) read-only view of contour i (OpenCV layout)."""
+        return self.points[self.offsets[i]:self.offsets[i + 1]].reshape(-1, 1, 2)
+
+    def edge(self, i: int, k: int) -> np.ndarray:
+        s = 4 * i + k
+        return self.edge_points[self.edge_offsets[s]:self.edge_offsets[s + 1]]
+
+    def piece(self, i: int) -> Puzzle:
+        """Puzzle i with geometry and edges; the contour is a copy, so pieces can be moved."""
+        area, x, y, w, h, cx, cy = self.geometry[i].tolist()
+        piece = Puzzle.from_geometry(np.array(self.contour(i)), int(self.index[i]), area,
+                                     (int(x), int(y), int(w), int(h)), (int(cx), int(cy)))
+        piece.edges = [{"points": [tuple(pt) for pt in self.edge(i, k).tolist()], "type": "inner"}
+                       for k in range(4)]
+        return piece
+
+    def pieces(self) -> List[Puzzle]:
+        return [self.piece(i) for i in range(len(self))]
+
+    def matches_list(self) -> List[Dict]:
+        return [{"piece_a": int(m["piece_a"]), "edge_a": int(m["edge_a"]), "piece_b": int(m["piece_b"]),
+                 "edge_b": int(m["edge_b"]), "score": float(m["score"])} for m in self.matches]
+
+    def artifact(self):
+        """MatchArtifact rebuilt from the stored arrays (no descriptor is recomputed)."""
+        from matchartifact import MatchArtifact
+
+        art = MatchArtifact(num_points=self.num_points)
+        for i in range(len(self)):
+            idx = int(self.index[i])
+            art.edges[idx] = [[tuple(pt) for pt in self.edge(i, k).tolist()] for k in range(4)]
+            art.corners[idx] = [tuple(c) for c in self.corners[i].tolist()]
+            for k in range(4):
+                code = int(self.edge_types[i, k])
+                if code:
+                    art.edge_types[(idx, k)] = EDGE_TYPES[code]
+                    art.descriptors[(idx, k)] = np.asarray(self.descriptors[i, k], np.float64)
+        for m in self.matches:
+            if m["reversed"] >= 0:
+                key = (int(m["piece_a"]), int(m["edge_a"]), int(m["piece_b"]), int(m["edge_b"]))
+                art.directions[key] = bool(m["reversed"])
+        return art
+
+
+def _four(edges):
+    # Teile ohne Segmentierung haben keine Kanten -> vier leere Einträge
+    edges = list(edges)
+    return edges + [{"points": []}] * (4 - len(edges))
@@ -0,0 +1,297 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional
+
+
+def solve_image_bytes(data: bytes, params: Optional[Dict] = None) -> Dict:
+    """
+    Worker job: detection -> matching -> placement for one encoded photo.
+    Runs in a worker process; returns only plain JSON-able data.
+    """
+    from Pipeline import Pipeline
+    from Solver import Solver
+
+    params = dict(params or {})
+    calibration = params.pop("calibration_image", None)
+    calibration_dir = params.pop("calibration_dir", None)
+    fd, path = tempfile.mkstemp(suffix=".img")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        pipeline = Pipeline(path, **params)
+        pipeline.run()
+        matches = sorted(pipeline.get("match")["matches"], key=lambda m: float(m["score"]))
+        solver = Solver(pipeline.get("segment"), matches, calibration_image=calibration,
+                        calibration_dir=calibration_dir).solve()
+        return {"layout": pipeline.get("organize"),
+                "placements": [{k: (int(v) if k == "piece" else float(v)) for k, v in c.items()}
+                               for c in solver.placements],
+                "cycle_time_s": float(solver.robot_run["total_time"])}
+    finally:
+        os.remove(path)
+
+
+def _ready() -> bool:
+    return True
+
+
+class SolveService:
+    """
+    Local HTTP solve service on asyncio streams (no extra dependencies).
+
+      POST /solve    body = image bytes (JPEG/PNG); response: JSON lines
+                     {"event": "queued", ...}, {"event": "started"},
+                     one {"event": "placement", ...} per command, {"event": "done", ...}
+      GET  /metrics  queue depth, jobs in flight, counters, latency percentiles
+
+    Requests go into a bounded queue (queue_size); when it is full the request
+    is refused with 503 and Retry-After instead of piling up. concurrency
+    consumer tasks hand jobs to a process pool of the same size, so CPU-bound
+    solving never blocks the event loop. Jobs of clients that disconnected
+    while queued are dropped; if a worker dies the pool is rebuilt and only
+    the job it was running fails.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, concurrency: int = 2, queue_size: int = 8,
+                 params: Optional[Dict] = None, job: Callable = solve_image_bytes, max_body: int = 64 << 20,
+                 logger: Optional[logging.Logger] = None) -> None:
+        self.host = host
+        self.port = port
+        self.concurrency = max(1, int(concurrency))
+        self.queue_size = max(1, int(queue_size))
+        self.params = params or {}
+        self.job = job
+        self.max_body = max_body
+        self.log = logger or logging.getLogger(__name__)
+
+        self.queue: Optional[asyncio.Queue] = None
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.server: Optional[asyncio.AbstractServer] = None
+        self._consumers: List[asyncio.Task] = []
+        self.in_flight = 0
+        self.counters = {"accepted": 0, "rejected": 0, "completed": 0, "failed": 0, "dropped": 0,
+                         "pool_restarts": 0}
+        self.latencies: List[float] = []     # seconds, request received -> result, last 1000
+
+    # ---------- lifecycle ----------
+    async def start(self) -> "SolveService":
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.pool = ProcessPoolExecutor(max_workers=self.concurrency)
+        # Worker jetzt starten: später geforkte Prozesse würden offene Client-Sockets
+        # erben und die Verbindung offen halten, bis sie selbst enden
+        await asyncio.gather(*(asyncio.get_running_loop().run_in_executor(self.pool, _ready)
+                               for _ in range(self.concurrency)))
+        self._consumers = [asyncio.create_task(self._consume()) for _ in range(self.concurrency)]
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.log.info(f"Solve-Service auf http://{self.host}:{self.port} "
+                      f"(concurrency={self.concurrency}, queue={self.queue_size})")
+        return self
+
+    async def stop(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for task in self._consumers:
+            task.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+    # ---------- metrics ----------
+    def metrics(self) -> Dict:
+        lat = sorted(self.latencies)
+
+        def pct(q):
+            return round(1000 * lat[min(len(lat) - 1, int(q * len(lat)))], 1) if lat else None
+
+        return {"queue_depth": self.queue.qsize() if self.queue else 0, "queue_size": self.queue_size,
+                "in_flight": self.in_flight, "concurrency": self.concurrency, **self.counters,
+                "latency_ms": {"p50": pct(0.5), "p95": pct(0.95), "max": pct(1.0)}}
+
+    # ---------- jobs ----------
+    def _restart_pool(self, broken: ProcessPoolExecutor) -> None:
+        if self.pool is not broken:
+            return      # ein anderer Consumer hat schon neu gestartet
+        self.counters["pool_restarts"] += 1
+        self.log.error("Worker-Prozess abgestürzt, Prozess-Pool wird neu gestartet")
+        broken.shutdown(wait=False, cancel_futures=True)
+        # forkserver statt fork: neue Worker dürfen die offenen Client-Sockets nicht erben
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver") if "forkserver" in methods else None
+        self.pool = ProcessPoolExecutor(max_workers=self.concurrency, mp_context=context)
+
+    async def _consume(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            data, future, started = await self.queue.get()
+            if future.done():
+                # Client hat die Verbindung schon geschlossen
+                self.counters["dropped"] += 1
+                self.queue.task_done()
+                continue
+            self.in_flight += 1
+            started.set()
+            pool = self.pool
+            try:
+                result = await loop.run_in_executor(pool, self.job, data, self.params)
+            except BrokenProcessPool as e:
+                self._restart_pool(pool)
+                if not future.done():
+                    future.set_exception(e)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self.in_flight -= 1
+                self.queue.task_done()
+
+    # ---------- HTTP ----------
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await reader.readline()
+            method, target = request.decode("latin-1").split()[:2]
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            if method == "GET" and target == "/metrics":
+                await self._respond(writer, 200, json.dumps(self.metrics()).encode() + b"\n")
+            elif method == "POST" and target == "/solve":
+                length = int(headers.get("content-length", 0))
+                if length <= 0 or length > self.max_body:
+                    await self._respond(writer, 413 if length > 0 else 400, b'{"error": "body"}\n')
+                else:
+                    await self._solve(await reader.readexactly(length), reader, writer)
+            else:
+                await self._respond(writer, 404, b'{"error": "not found"}\n')
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError) as e:
+            self.log.warning(f"Ungültige Anfrage: {e}")
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _solve(self, data: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        t0 = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        started = asyncio.Event()
+        try:
+            self.queue.put_nowait((data, future, started))
+        except asyncio.QueueFull:
+            self.counters["rejected"] += 1
+            await self._respond(writer, 503, b'{"error": "queue full"}\n', {"Retry-After": "1"})
+            return
+        self.counters["accepted"] += 1
+
+        # der Client sendet nach dem Body nichts mehr: EOF heisst, er ist weg
+        def client_gone(_):
+            if not future.done():
+                future.cancel()
+            started.set()
+
+        gone = asyncio.ensure_future(reader.read())
+        gone.add_done_callback(client_gone)
+        try:
+            await self._stream(writer, future, started, t0)
+        except asyncio.CancelledError:
+            if not gone.done():
+                raise
+        finally:
+            gone.remove_done_callback(client_gone)
+            gone.cancel()
+
+    async def _stream(self, writer, future, started, t0) -> None:
+        await self._start_stream(writer)
+        await self._line(writer, {"event": "queued", "queue_depth": self.queue.qsize()})
+        await started.wait()
+        if future.cancelled():
+            return
+        await self._line(writer, {"event": "started"})
+        try:
+            result = await future
+        except Exception as e:
+            self.counters["failed"] += 1
+            await self._line(writer, {"event": "error", "error": f"{type(e).__name__}: {e}"})
+            return
+
+        latency = time.perf_counter() - t0
+        self.latencies = (self.latencies + [latency])[-1000:]
+        self.counters["completed"] += 1
+        for cmd in result.get("placements", []):
+            await self._line(writer, {"event": "placement", **cmd})
+        done = {k: v for k, v in result.items() if k != "placements"}
+        await self._line(writer, {"event": "done", **done, "latency_ms": round(1000 * latency, 1)})
+
+    @staticmethod
+    async def _respond(writer, status: int, body: bytes, extra: Optional[Dict] = None) -> None:
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+                  503: "Service Unavailable"}[status]
+        head = [f"HTTP/1.1 {status} {reason}", "Content-Type: application/json",
+                f"Content-Length: {len(body)}", "Connection: close"]
+        head += [f"{k}: {v}" for k, v in (extra or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    @staticmethod
+    async def _start_stream(writer) -> None:
+        # ohne Content-Length: die Antwort endet, wenn die Verbindung geschlossen wird
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nConnection: close\r\n\r\n")
+        await writer.drain()
+
+    @staticmethod
+    async def _line(writer, obj: Dict) -> None:
+        writer.write(json.dumps(obj).encode() + b"\n")
+        await writer.drain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lokaler Solve-Service (HTTP, JSON lines).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--queue-size", type=int, default=8)
+    parser.add_argument("--cache-dir", help="gemeinsamer Pipeline-Cache der Worker")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+
+    base = os.path.dirname(os.path.abspath(__file__))
+    params = {"cache_dir": args.cache_dir,
+              "calibration_image": os.path.join(base, "../Data/calibration_checkerboard.jpg"),
+              "calibration_dir": os.path.join(base, "../.calibration")}
+    service = SolveService(args.host, args.port, args.concurrency, args.queue_size, params=params)
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
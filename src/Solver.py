@@ -0,0 +1,205 @@
+from __future__ import annotations
+import logging
+import os
+from typing import Callable, Dict, Iterator, List, Optional
+
+import cv2 as cv
+
+from GlobalArea import GlobalArea
+from Position_and_Rotation.Rotation import Rotation
+from Position_and_Rotation.Translation import Translation
+from Position_and_Rotation.ICP import ICPRefiner
+from FlatEdgeFinder import FlatEdgeFinder
+from Anchor import Anchor
+from MatchPlacer import MatchPlacer
+from PlacementValidator import PlacementValidator
+from MovePlanner import MovePlanner
+from RobotSimulator import RobotSimulator
+from Calibration import CameraCalibration
+from Instrumentation import trace
+
+
+class Solver:
+    """
+    Placement half of the solve: anchor, pixel -> mm mapping, match placement,
+    validation, pick-and-place order and robot cycle time.
+
+        solver = Solver(pieces, matches, calibration_image=..., calibration_dir=...)
+        solver.match_placer.listeners.append(recorder)   # optional
+        solver.solve()
+        solver.placements, solver.move_plan, solver.robot_run
+
+    Without a checkerboard image the old scale 0.23 mm/px with offset (80, 190) is used.
+    """
+
+    def __init__(self, pieces, matches, calibration_image: Optional[str] = None,
+                 calibration_dir: Optional[str] = None, refine: bool = True,
+                 logger: Optional[logging.Logger] = None) -> None:
+        self.pieces = pieces
+        self.matches = matches
+        self.calibration_image = calibration_image
+        self.calibration_dir = calibration_dir
+        self.log = logger or logging.getLogger(__name__)
+
+        self.ta = Translation()
+        self.rot = Rotation()
+        self.ga = GlobalArea(pixels_to_mm_ratio=(0.23, 0.23))
+        self.ga.set_unsolved_puzzles(pieces)
+        self.ga.set_solved_puzzles(pieces)
+
+        self.flat_finder = FlatEdgeFinder(num_points=100, logger=logging.getLogger("FlatEdgeFinder"))
+        self.anchor = Anchor(flat_finder=self.flat_finder, rot=self.rot, ta=self.ta,
+                             logger=logging.getLogger("Anchor"))
+        self.validator = PlacementValidator(self.ga, logger=logging.getLogger("PlacementValidator"))
+        self.match_placer = MatchPlacer(ga=self.ga, rot=self.rot, ta=self.ta,
+                                        logger=logging.getLogger("MatchPlacer"), listeners=[self.validator],
+                                        refiner=ICPRefiner() if refine else None)
+
+        self.anchor_piece = None
+        self.placements: List[Dict] = []
+        self.move_plan = None
+        self.robot_run = None
+        self.artifact = None
+
+    def homography(self):
+        if self.calibration_image and os.path.exists(self.calibration_image):
+            calibration = CameraCalibration(cache_dir=self.calibration_dir, logger=logging.getLogger("Calibration"))
+            image = self.calibration_image
+            setup = CameraCalibration.setup_key(image=image, mtime=os.path.getmtime(image),
+                                                pattern=(9, 6), square_mm=20.0)
+            return calibration.load_or_compute(setup, lambda: CameraCalibration.homography_from_checkerboard(
+                cv.imread(image), (9, 6), 20.0))
+        return self.ga.default_homography(offset=(80, 190))
+
+    def _place_anchor(self) -> Dict:
+        ga = self.ga
+
+        # optional debug
+        self.flat_finder.log_edge_types(self.pieces)
+
+        # choose anchor + get its flat edges
+        with trace.span("anchor"):
+            anchor_piece, flat_edges = self.anchor.choose_anchor(ga.solved_puzzles)
+        # Map pieces from pixels to real world mm. The anchor has to be chosen BEFORE this step.
+        # Otherwise the logic of identifying Puzzle edges would not work anymore.
+        ga.apply_homography(self.homography())
+
+        # top-left directions & point computed from GlobalArea
+        target_corner_point = [ga.area_solved.x, ga.area_solved.y + ga.area_solved.h]
+        with trace.span("anchor"):
+            ang, dxdy = self.anchor.place_anchor(anchor_piece, flat_edges, (1, 0), (0, 1), target_corner_point)
+        self.anchor_piece = anchor_piece
+        self.validator.rebuild()
+        return {"piece": anchor_piece.index, "angle": ang, "dx": dxdy[0], "dy": dxdy[1]}
+
+    def _finish(self, anchor_command: Dict) -> None:
+        ga = self.ga
+
+        # Überlappungen / Teile ausserhalb des Bereichs prüfen
+        self.validator.report()
+
+        # Pick-and-Place Reihenfolge für den Roboter planen
+        self.placements = [anchor_command] + self.match_placer.placements
+        starts, targets = MovePlanner.poses_from_area(ga, self.placements)
+        self.move_plan = MovePlanner(logger=logging.getLogger("MovePlanner")).plan(
+            starts, targets, current_order=[c["piece"] for c in self.placements])
+
+        # Zykluszeit des Roboters abschätzen
+        pick_positions = {p.index: tuple(c) for p, c in zip(ga.unsolved_puzzles, ga.piece_centroids(solved=False))}
+        self.robot_run = RobotSimulator(logger=logging.getLogger("RobotSimulator")).simulate(
+            self.placements, pick_positions)
+
+    def solve(self, after_anchor: Optional[Callable[[], None]] = None) -> "Solver":
+        """Run all placement steps; after_anchor is called once the anchor piece is placed."""
+        anchor_command = self._place_anchor()
+        if after_anchor:
+            after_anchor()
+
+        # apply matches
+        matches_resorted = sorted(self.matches, key=lambda m: float(m["piece_a"]))
+        with trace.span("placement", matches=len(matches_resorted)):
+            self.match_placer.apply_matches(matches_resorted)
+
+        self._finish(anchor_command)
+        return self
+
+    def stream(self, threshold: float = 0.04, confident: Optional[float] = None,
+               num_points: int = 100, appearance: Optional[Dict] = None,
+               color_threshold: Optional[float] = None) -> Iterator[Dict]:
+        """
+        Streaming solve: yields placement commands while matching is still running.
+
+        The anchor is placed as soon as the edges are classified. After that
+        only pairs (placed piece, unplaced piece) are compared; the moment a
+        pair scores below confident (default threshold / 2), the new piece is
+        placed against the cluster and its command is yielded. When no pair is
+        confident, the best match below threshold that links a new piece is
+        used. Pieces without any link to the cluster are not placed.
+
+        appearance and color_threshold enable the colour prefilter of Matching
+        (Pipeline stage "appearance"); a threshold without profiles raises
+        ValueError instead of silently comparing every pair.
+
+        matches is not needed (pass None to the constructor); afterwards it
+        holds every match found, and placements, move_plan and robot_run are
+        set as after solve().
+        """
+        from matching import Matching
+
+        if color_threshold is not None and appearance is None:
+            raise ValueError("color_threshold braucht die Farbprofile (appearance)")
+        confident = threshold / 2 if confident is None else confident
+        matcher = Matching(self.pieces, num_points=num_points, appearance=appearance,
+                           color_threshold=color_threshold)
+        # Deskriptoren vor der Umrechnung in mm, wie im Batch-Ablauf
+        matcher.prepare()
+
+        anchor_command = self._place_anchor()
+        yield anchor_command
+
+        by_index = {p.index: p for p in self.pieces}
+        placed = [self.anchor_piece.index]
+        unplaced = [p.index for p in self.pieces if p.index != self.anchor_piece.index]
+        compared = set()
+        best: Dict[int, Dict] = {}    # unplaced piece -> best match (piece_a placed, piece_b = piece)
+        found: List[Dict] = []
+
+        # keine Spanne um die Schleife: yield gibt die Kontrolle an den Aufrufer (Roboter) ab
+        while unplaced:
+            chosen = None
+            for a in placed:
+                for b in unplaced:
+                    if (a, b) in compared:
+                        continue
+                    compared.add((a, b))
+                    for m in matcher.match_pair(by_index[a], by_index[b], threshold):
+                        found.append(m)
+                        if b not in best or m["score"] < best[b]["score"]:
+                            best[b] = m
+                    if b in best and best[b]["score"] < confident:
+                        chosen = b
+                        break
+                if chosen is not None:
+                    break
+
+            if chosen is None:
+                # alle Paare Cluster <-> Rest verglichen: bester verbleibender Match
+                links = [b for b in unplaced if b in best]
+                if not links:
+                    self.log.warning(f"Ohne Verbindung zum Cluster, nicht platziert: {unplaced}")
+                    break
+                chosen = min(links, key=lambda b: best[b]["score"])
+
+            with trace.span("placement", piece=chosen):
+                self.match_placer.apply_matches([best[chosen]])
+            placed.append(chosen)
+            unplaced.remove(chosen)
+            yield self.match_placer.placements[-1]
+
+        trace.count("comparisons", matcher.comparisons)
+        trace.count("pairs_rejected", matcher.comparisons - len(found))
+        if color_threshold is not None:
+            trace.count("pairs_color_rejected", matcher.color_rejected)
+        self.matches = sorted(found, key=lambda m: m["score"])
+        self.artifact = matcher.artifact
+        self._finish(anchor_command)
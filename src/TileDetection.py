@@ -0,0 +1,324 @@
+from __future__ import annotations
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2 as cv
+import numpy as np
+
+from edgedetection import EdgeDetection
+from puzzle import Puzzle
+
+
+def _detect_tile(job):
+    """Top-level so it can run in a worker process: contours of one tile in global coordinates."""
+    frame, H, min_area, thresh, border_px = job
+    if isinstance(frame, str):
+        det = EdgeDetection(frame).load()
+    else:
+        det = EdgeDetection.from_image(frame)
+    contours = det.find_contours(thresh=thresh)
+
+    h, w = det.src_gray.shape[:2]
+    out = []
+    for c in contours:
+        pts = c.reshape(-1, 2)
+        # Teil am Kachelrand → wahrscheinlich abgeschnitten; kleine Reste davon
+        # dürfen nicht schon hier wegen min_area verschwinden
+        cut = bool((pts[:, 0] <= border_px).any() or (pts[:, 1] <= border_px).any()
+                   or (pts[:, 0] >= w - 1 - border_px).any() or (pts[:, 1] >= h - 1 - border_px).any())
+        if not cut and cv.contourArea(c) < min_area:
+            continue
+        g = cv.perspectiveTransform(pts.astype(np.float32).reshape(-1, 1, 2), np.asarray(H, np.float64))
+        out.append((g.reshape(-1, 2), cut))
+    return out
+
+
+def _raster_start(contour) -> Tuple[int, int]:
+    """
+    (y, x) of the first contour pixel in raster order (top row, leftmost).
+    cv.findContours meets the outer borders in this order and returns them
+    reversed, so sorting by it descending gives the same order.
+    """
+    pts = np.asarray(contour).reshape(-1, 2)
+    y = pts[:, 1].min()
+    return int(y), int(pts[pts[:, 1] == y, 0].min())
+
+
+def otsu_from_histogram(hist) -> int:
+    """Otsu threshold of a 256-bin histogram, same result as cv.THRESH_OTSU on the pixels."""
+    p = np.asarray(hist, dtype=np.float64)
+    p = p / p.sum()
+    i = np.arange(len(p))
+    q1 = np.cumsum(p)
+    q2 = 1.0 - q1
+    m = np.cumsum(i * p)
+    eps = np.finfo(np.float32).eps
+    valid = (np.minimum(q1, q2) >= eps) & (np.maximum(q1, q2) <= 1.0 - eps)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma = q1 * q2 * (m / q1 - (m[-1] - m) / q2) ** 2
+    return int(np.argmax(np.where(valid, sigma, 0.0)))
+
+
+def open_image(source):
+    """
+    Image source for strip processing. .npy files (e.g. MosaicBuilder output)
+    are memory-mapped, so only the rows of a strip are ever read; other
+    formats have to be decoded completely by cv.imread.
+    """
+    if not isinstance(source, str):
+        return source
+    if source.endswith(".npy"):
+        return np.load(source, mmap_mode="r")
+    img = cv.imread(source)
+    if img is None:
+        raise FileNotFoundError(f"Datei nicht gefunden: {source}")
+    return img
+
+
+class TileDetection:
+    """
+    Piece detection on the single camera tiles instead of a stitched image.
+
+    Every tile runs EdgeDetection.find_contours/filter_contours on its own
+    (in parallel worker processes). The contours are mapped into global
+    (mosaic) coordinates with the per-tile transforms (tile -> global, e.g.
+    from FrameRegistration or grid_homographies). Pieces that were cut by a
+    tile seam or seen twice in an overlap are grouped with a spatial hash on
+    the centroids. A group keeps the contour of a tile that saw the whole
+    piece; pieces that no tile saw completely are merged by rasterized
+    polygon union.
+    """
+
+    def __init__(self, min_area: float = EdgeDetection.MIN_AREA, thresh: Optional[float] = None,
+                 border_px: int = 2, seam_px: int = 3, dup_iou: float = 0.5,
+                 workers: Optional[int] = None, logger: Optional[logging.Logger] = None) -> None:
+        self.min_area = min_area
+        self.thresh = thresh
+        self.border_px = border_px
+        self.seam_px = seam_px
+        self.dup_iou = dup_iou
+        self.workers = workers
+        self.log = logger or logging.getLogger(__name__)
+
+    # ---------- detection ----------
+    def detect_tiles(self, frames: Sequence, transforms: Sequence) -> List[Tuple[np.ndarray, bool, int]]:
+        """All tile contours in global coordinates as (points Nx2, cut, tile)."""
+        jobs = [(f, H, self.min_area, self.thresh, self.border_px) for f, H in zip(frames, transforms)]
+        if self.workers == 1 or len(jobs) == 1:
+            results = [_detect_tile(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers or len(jobs)) as pool:
+                results = list(pool.map(_detect_tile, jobs))
+        return [(pts, cut, t) for t, res in enumerate(results) for pts, cut in res]
+
+    def detect(self, frames: Sequence, transforms: Sequence) -> List[Puzzle]:
+        """Merged pieces in global coordinates, numbered 1.. like filter_contours."""
+        raw = self.detect_tiles(frames, transforms)
+        pieces = [Puzzle(c, i + 1) for i, c in enumerate(self.merge_contours(raw))]
+        self.log.info(f"Kacheln: {len(frames)}, Konturen: {len(raw)}, Teile nach Zusammenführen: {len(pieces)}")
+        return pieces
+
+    # ---------- merging ----------
+    def merge_contours(self, raw) -> List[np.ndarray]:
+        """Merged int32 contours (Nx1x2) of all (points, cut, tile) entries, in find_contours order."""
+        contours = [self._merge([raw[i] for i in g]) for g in self._group(raw)]
+        contours = self._drop_nested([c for c in contours if c is not None])
+        contours = [c for c in contours if cv.contourArea(c) >= self.min_area]
+        # Reihenfolge wie cv.findContours auf dem ganzen Bild (gleiche Puzzle.index)
+        contours.sort(key=_raster_start, reverse=True)
+        return contours
+
+    @staticmethod
+    def _drop_nested(contours) -> List[np.ndarray]:
+        """
+        Remove contours lying inside another one. A blob in the hole of a piece
+        looks external in a tile that cuts the piece open; RETR_EXTERNAL on the
+        whole image would not report it.
+        """
+        if len(contours) < 2:
+            return contours
+        boxes = np.array([cv.boundingRect(c) for c in contours])
+        x0, y0 = boxes[:, 0], boxes[:, 1]
+        x1, y1 = x0 + boxes[:, 2], y0 + boxes[:, 3]
+        keep = []
+        for i, c in enumerate(contours):
+            inside = (x0 <= x0[i]) & (y0 <= y0[i]) & (x1 >= x1[i]) & (y1 >= y1[i])
+            inside[i] = False
+            p = (float(c[0, 0, 0]), float(c[0, 0, 1]))
+            if not any(cv.pointPolygonTest(contours[j], p, False) > 0 for j in np.flatnonzero(inside)):
+                keep.append(c)
+        return keep
+
+    @staticmethod
+    def _bbox(pts) -> np.ndarray:
+        return np.concatenate([pts.min(axis=0), pts.max(axis=0)])
+
+    def _group(self, raw) -> List[List[int]]:
+        """Union-find over contour pairs that overlap (duplicates) or meet at a seam (cut pieces)."""
+        n = len(raw)
+        parent = list(range(n))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        if n == 0:
+            return []
+        boxes = np.array([self._bbox(pts) for pts, _, _ in raw])
+        centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+        # Zellgrösse = grösste Ausdehnung → Kandidaten liegen in den 3x3 Nachbarzellen
+        cell = max(float((boxes[:, 2:] - boxes[:, :2]).max()), 1.0) + 2 * self.seam_px
+        grid: Dict[Tuple[int, int], List[int]] = {}
+        keys = np.floor(centers / cell).astype(int)
+        for i, (kx, ky) in enumerate(keys):
+            grid.setdefault((kx, ky), []).append(i)
+
+        for i, (kx, ky) in enumerate(keys):
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for j in grid.get((kx + dx, ky + dy), ()):
+                        if j <= i or raw[i][2] == raw[j][2] or find(i) == find(j):
+                            continue
+                        if self._should_merge(raw[i], raw[j], boxes[i], boxes[j]):
+                            parent[find(j)] = find(i)
+
+        groups: Dict[int, List[int]] = {}
+        for i in range(n):
+            groups.setdefault(find(i), []).append(i)
+        return list(groups.values())
+
+    def _should_merge(self, a, b, box_a, box_b) -> bool:
+        s = self.seam_px
+        if (box_a[0] > box_b[2] + s or box_b[0] > box_a[2] + s or
+                box_a[1] > box_b[3] + s or box_b[1] > box_a[3] + s):
+            return False
+        mask_a, mask_b = self._masks([a[0], b[0]])
+        inter = np.count_nonzero(mask_a & mask_b)
+        if inter == 0:
+            return False
+        if a[1] or b[1]:
+            # mindestens einer am Kachelrand abgeschnitten, die Teile berühren sich
+            return True
+        union = np.count_nonzero(mask_a | mask_b)
+        return inter / union >= self.dup_iou
+
+    def _masks(self, polys):
+        """Rasterize polygons into a shared local frame, dilated by seam_px."""
+        s = self.seam_px
+        lo = np.floor(np.min([p.min(axis=0) for p in polys], axis=0)) - s - 1
+        hi = np.ceil(np.max([p.max(axis=0) for p in polys], axis=0)) + s + 1
+        w, h = (hi - lo).astype(int) + 1
+        kernel = cv.getStructuringElement(cv.MORPH_ELLIPSE, (2 * s + 1, 2 * s + 1)) if s > 0 else None
+        masks = []
+        for p in polys:
+            m = np.zeros((h, w), np.uint8)
+            cv.fillPoly(m, [np.round(p - lo).astype(np.int32)], 1)
+            if kernel is not None:
+                m = cv.dilate(m, kernel)
+            masks.append(m.astype(bool))
+        return masks
+
+    def _merge(self, members) -> Optional[np.ndarray]:
+        """One contour per group: a complete view if a tile saw the whole piece, else the union."""
+        boxes = np.array([self._bbox(pts) for pts, _, _ in members])
+        lo, hi = boxes[:, :2].min(axis=0), boxes[:, 2:].max(axis=0)
+        for pts, cut, _ in sorted(members, key=lambda m: -cv.contourArea(m[0].astype(np.float32))):
+            box = self._bbox(pts)
+            # nur eine Ansicht, die die ganze Gruppe abdeckt, ersetzt die Vereinigung
+            if not cut and (box[:2] <= lo + self.seam_px).all() and (box[2:] >= hi - self.seam_px).all():
+                return np.round(pts).astype(np.int32).reshape(-1, 1, 2)
+        return self._union([pts for pts, _, _ in members])
+
+    def _union(self, polys) -> Optional[np.ndarray]:
+        """Outer contour of the union of several polygons (global coordinates, int32 Nx1x2)."""
+        # Rand so breit wie der Strukturkern, sonst verfälscht das Schliessen den Umriss
+        pad = self.seam_px + 1
+        lo = np.floor(np.min([p.min(axis=0) for p in polys], axis=0)) - pad
+        hi = np.ceil(np.max([p.max(axis=0) for p in polys], axis=0)) + pad
+        w, h = (hi - lo).astype(int) + 1
+        mask = np.zeros((h, w), np.uint8)
+        for p in polys:
+            cv.fillPoly(mask, [np.round(p - lo).astype(np.int32)], 255)
+        if self.seam_px > 0:
+            # Spalt zwischen den Hälften eines geschnittenen Teils schliessen
+            k = cv.getStructuringElement(cv.MORPH_ELLIPSE, (2 * self.seam_px + 1, 2 * self.seam_px + 1))
+            mask = cv.morphologyEx(mask, cv.MORPH_CLOSE, k)
+        contours, _ = cv.findContours(mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return None
+        best = max(contours, key=cv.contourArea)
+        return best + np.round(lo).astype(np.int32)
+
+
+class StripDetection(TileDetection):
+    """
+    Contour detection for one very large image in overlapping horizontal strips.
+
+    Pass 1 streams the strips once and builds the histogram of the blurred
+    grayscale image; its Otsu threshold is the same global threshold that
+    EdgeDetection.find_contours would use. Pass 2 thresholds every strip with
+    it and finds contours per strip. Each strip window is blurred with a
+    small halo, so the binary image is identical to the full-frame one.
+    Pieces crossing strip boundaries are stitched with the TileDetection
+    merge. Peak memory follows strip_rows + 2*overlap rows, not the image height.
+    """
+
+    HALO = 2  # GaussianBlur 5x5
+
+    def __init__(self, strip_rows: int = 1024, overlap: int = 128, **kwargs) -> None:
+        kwargs.setdefault("workers", 1)
+        # überlappende Fenster teilen echte Pixel, nur direkt aneinanderstossende brauchen 1 px Naht
+        kwargs.setdefault("seam_px", 0 if overlap > 0 else 1)
+        super().__init__(**kwargs)
+        self.strip_rows = int(strip_rows)
+        self.overlap = int(overlap)
+
+    def _strips(self, height):
+        for y0 in range(0, height, self.strip_rows):
+            yield y0, min(y0 + self.strip_rows, height)
+
+    def _blurred(self, img, y0, y1):
+        """Blurred grayscale rows y0..y1, computed from a window with halo rows."""
+        a, b = max(y0 - self.HALO, 0), min(y1 + self.HALO, img.shape[0])
+        rows = np.asarray(img[a:b])
+        gray = rows if rows.ndim == 2 else cv.cvtColor(rows, cv.COLOR_BGR2GRAY)
+        return cv.GaussianBlur(gray, (5, 5), 0)[y0 - a:y0 - a + (y1 - y0)]
+
+    def histogram(self, img) -> np.ndarray:
+        hist = np.zeros(256, np.int64)
+        for y0, y1 in self._strips(img.shape[0]):
+            hist += np.bincount(self._blurred(img, y0, y1).ravel(), minlength=256)
+        return hist
+
+    def strip_contours(self, img, thresh):
+        """(points Nx2, cut, strip) in image coordinates for every strip window."""
+        h = img.shape[0]
+        raw = []
+        for k, (y0, y1) in enumerate(self._strips(h)):
+            w0, w1 = max(y0 - self.overlap, 0), min(y1 + self.overlap, h)
+            _, mask = cv.threshold(self._blurred(img, w0, w1), thresh, 255, cv.THRESH_BINARY_INV)
+            contours, _ = cv.findContours(mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
+            for c in contours:
+                pts = c.reshape(-1, 2)
+                # nur Fensterkanten im Bildinneren schneiden Teile ab
+                cut = bool((w0 > 0 and (pts[:, 1] <= self.border_px).any()) or
+                           (w1 < h and (pts[:, 1] >= w1 - w0 - 1 - self.border_px).any()))
+                if not cut and cv.contourArea(c) < self.min_area:
+                    continue
+                raw.append(((pts + [0, w0]).astype(np.float32), cut, k))
+        return raw
+
+    def contours(self, source) -> List[np.ndarray]:
+        """All merged contours of the image (global Otsu unless thresh is set)."""
+        img = open_image(source)
+        thresh = self.thresh if self.thresh is not None else otsu_from_histogram(self.histogram(img))
+        contours = self.merge_contours(self.strip_contours(img, thresh))
+        self.log.info(f"Streifen: {len(list(self._strips(img.shape[0])))}, Schwelle: {thresh}, "
+                      f"Konturen: {len(contours)}")
+        return contours
+
+    def detect_image(self, source) -> List[Puzzle]:
+        return [Puzzle(c, i + 1) for i, c in enumerate(self.contours(source))]
@@ -0,0 +1,195 @@
+"""
+Kommandozeile für die Puzzle-Lösung, ohne GUI:
+
+    python cli.py detect  BILD            Puzzleteile finden (JSON)
+    python cli.py match   BILD            Kanten-Matches (JSON)
+    python cli.py solve   BILD --no-render  Platzierungsbefehle (JSON)
+    python cli.py solve   BILD --stream    Befehle als JSON lines, sobald sie feststehen
+    python cli.py render  BILD --out DIR   Diagnosebilder als PNG
+    python cli.py bench   BILD --repeat 5  Zeit pro Stufe
+
+Die Befehle importieren ihre Module erst beim Ausführen; matplotlib wird nur
+für render (oder solve ohne --no-render) geladen, scipy erst, wenn ein
+ICP-Schritt gerechnet wird.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_IMAGE = os.path.join(BASE_DIR, "../Data/puzzle_selfmade_black.jpeg")
+DEFAULT_CALIBRATION = os.path.join(BASE_DIR, "../Data/calibration_checkerboard.jpg")
+
+
+def _pipeline(args):
+    from Pipeline import Pipeline
+
+    return Pipeline(args.image, cache_dir=args.cache_dir, min_area=args.min_area,
+                    epsilon_factor=args.epsilon_factor, num_points=args.num_points,
+                    threshold=args.threshold, color_threshold=args.color_threshold, grid_size=args.grid_size, logger=logging.getLogger("Pipeline"))
+
+
+def _solve(args, pipeline):
+    from Solver import Solver
+
+    pipeline.run()
+    matches = sorted(pipeline.get("match")["matches"], key=lambda m: float(m["score"]))
+    solver = Solver(pipeline.get("segment"), matches, calibration_image=args.calibration,
+                    calibration_dir=os.path.join(BASE_DIR, "../.calibration"), logger=logging.getLogger("Solver"))
+    return solver.solve()
+
+
+def _render(out_dir, pipeline, solver):
+    from visualizer import Visualizer
+
+    match = pipeline.get("match")
+    return Visualizer.render_diagnostics(out_dir, solver.pieces, solver.matches, image=pipeline.get("load"),
+                                         ga=solver.ga, artifact=match["artifact"])
+
+
+def _print(obj):
+    print(json.dumps(obj, indent=2, default=float))
+
+
+def _save(args, pipeline, matches=(), artifact=None):
+    if args.save:
+        from SceneStore import SceneStore
+
+        SceneStore.save(args.save, pipeline.get("segment"), matches, artifact, num_points=args.num_points,
+                        image=os.path.abspath(args.image))
+
+
+# ---------- subcommands ----------
+def cmd_detect(args):
+    pipeline = _pipeline(args)
+    pieces = pipeline.get("detect")
+    _save(args, pipeline)
+    _print([{"index": p.index, "area": float(p.area), "bbox": [int(v) for v in p.bounding_box]} for p in pieces])
+    return 0
+
+
+def cmd_match(args):
+    pipeline = _pipeline(args)
+    match = pipeline.get("match")
+    _save(args, pipeline, match["matches"], match["artifact"])
+    _print(match["matches"])
+    return 0
+
+
+def cmd_stream(args, pipeline):
+    from Solver import Solver
+
+    solver = Solver(pipeline.get("segment"), None, calibration_image=args.calibration,
+                    calibration_dir=os.path.join(BASE_DIR, "../.calibration"), logger=logging.getLogger("Solver"))
+    t0 = time.perf_counter()
+    appearance = pipeline.get("appearance") if args.color_threshold is not None else None
+    for command in solver.stream(threshold=args.threshold, confident=args.confident, num_points=args.num_points,
+                                 appearance=appearance, color_threshold=args.color_threshold):
+        print(json.dumps({"event": "placement", **command, "t_ms": round(1000 * (time.perf_counter() - t0), 1)},
+                         default=float), flush=True)
+    print(json.dumps({"event": "done", "cycle_time_s": solver.robot_run["total_time"],
+                      "matches": len(solver.matches)}), flush=True)
+    return 0
+
+
+def cmd_solve(args):
+    pipeline = _pipeline(args)
+    if args.stream:
+        return cmd_stream(args, pipeline)
+    solver = _solve(args, pipeline)
+    _print({"layout": pipeline.get("organize"), "placements": solver.placements,
+            "cycle_time_s": solver.robot_run["total_time"]})
+    if not args.no_render:
+        if args.render_dir:
+            _render(args.render_dir, pipeline, solver)
+        else:
+            solver.ga.show()
+    return 0
+
+
+def cmd_render(args):
+    pipeline = _pipeline(args)
+    written = _render(args.out, pipeline, _solve(args, pipeline))
+    _print(written)
+    return 0
+
+
+def cmd_bench(args):
+    from Instrumentation import trace
+
+    # ohne Cache, damit jede Stufe wirklich läuft
+    args.cache_dir = None
+    totals = {}
+    wall = []
+    trace.enable()
+    for _ in range(args.repeat):
+        trace.reset()
+        t0 = time.perf_counter()
+        _solve(args, _pipeline(args))
+        wall.append(time.perf_counter() - t0)
+        for name, sec in trace.totals().items():
+            totals.setdefault(name, []).append(sec)
+    trace.enable(False)
+
+    def median_ms(values):
+        values = sorted(values)
+        return 1000 * values[len(values) // 2]
+
+    _print({"repeat": args.repeat, "total_ms": median_ms(wall),
+            "stages_ms": {name: median_ms(v) for name, v in totals.items()}})
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="pren", description="Puzzle erkennen, matchen und lösen (ohne GUI).")
+    parser.add_argument("-v", "--verbose", action="store_true", help="S-Log (INFO) auf stderr ausgeben")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add(name, func, help):
+        p = sub.add_parser(name, help=help)
+        p.add_argument("image", nargs="?", default=DEFAULT_IMAGE, help="Aufnahme der Puzzleteile")
+        p.add_argument("--cache-dir", default=os.path.join(BASE_DIR, "../.pipeline_cache"),
+                       help="Pipeline-Cache (leer = kein Cache)")
+        p.add_argument("--min-area", type=float, default=500)
+        p.add_argument("--epsilon-factor", type=float, default=0.00002)
+        p.add_argument("--num-points", type=int, default=100)
+        p.add_argument("--threshold", type=float, default=0.04)
+        p.add_argument("--color-threshold", type=float,
+                       help="Farb-Vorfilter: Tab/Hole-Paare mit grösserer Lab-Distanz verwerfen (Standard: aus)")
+        p.add_argument("--grid-size", type=int, default=2)
+        p.add_argument("--calibration", default=DEFAULT_CALIBRATION, help="Schachbrett-Aufnahme")
+        p.set_defaults(func=func)
+        return p
+
+    detect = add("detect", cmd_detect, "Puzzleteile finden")
+    detect.add_argument("--save", help="Teile mit Kanten als Szene speichern (SceneStore-Ordner)")
+    match = add("match", cmd_match, "Kanten-Matches berechnen")
+    match.add_argument("--save", help="Teile, Kanten und Matches als Szene speichern (SceneStore-Ordner)")
+    solve = add("solve", cmd_solve, "Puzzle lösen und Platzierungsbefehle ausgeben")
+    solve.add_argument("--no-render", action="store_true", help="keine Bilder/Fenster (kein matplotlib)")
+    solve.add_argument("--render-dir", help="Diagnosebilder hierhin schreiben statt anzuzeigen")
+    solve.add_argument("--stream", action="store_true",
+                       help="Befehle als JSON lines ausgeben, sobald sie feststehen (Anker zuerst, ohne Render)")
+    solve.add_argument("--confident", type=float, help="Score, ab dem beim Streamen sofort platziert wird "
+                                                       "(Standard: threshold / 2)")
+    render = add("render", cmd_render, "Diagnosebilder als PNG schreiben")
+    render.add_argument("--out", required=True, help="Zielordner")
+    bench = add("bench", cmd_bench, "Laufzeit pro Stufe messen (ohne Cache)")
+    bench.add_argument("--repeat", type=int, default=3)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='[%(levelname)s] %(message)s', stream=sys.stderr)
+    if not args.cache_dir:
+        args.cache_dir = None
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,5 @@
 import numpy as np
-from scipy.interpolate import interp1d
+import kernels
 
 class EdgeComparator:
     #Vergleicht zwei Puzzle-Kanten.
@@ -13,44 +13,17 @@ class EdgeComparator:
         edge = np.asanyarray(edge)
         if len(edge) < 2:
             return edge
-            
-        #Translation für optimalen Vergleich
-        edge = edge - edge[0]
-        
-        #Rotation
-        end_point = edge[-1]
-        angle = -np.arctan2(end_point[1], end_point[0])
-        c, s = np.cos(angle), np.sin(angle)
-        rot_matrix = np.array([[c, -s], [s, c]])
-        edge = np.dot(edge, rot_matrix.T)
-        
-        # Skalierung
-        x_dist = edge[-1, 0]
-        if x_dist > 0:
-            edge = edge / x_dist
-            
-        return edge
+
+        #Translation, Rotation und Skalierung für optimalen Vergleich
+        return kernels.normalize(np.asarray(edge, np.float64))
 
     def _resample_edge(self, edge: np.ndarray) -> np.ndarray:
         #Interpoliert die Kante auf eine feste Punktanzahl entlang der Kurve.
         edge = np.asanyarray(edge)
         if len(edge) < 2: 
             return edge
-        
-        diffs = np.linalg.norm(np.diff(edge, axis=0), axis=1)
-        dists = np.concatenate([[0], np.cumsum(diffs)])
-        total_len = dists[-1]
-        
-        if total_len == 0: 
-            return edge
 
-        fx = interp1d(dists, edge[:, 0], kind='linear')
-        fy = interp1d(dists, edge[:, 1], kind='linear')
-        
-        new_dists = np.linspace(0, total_len, self.num_points)
-        new_edge = np.stack([fx(new_dists), fy(new_dists)], axis=1)
-        
-        return new_edge
+        return kernels.resample(np.asarray(edge, np.float64), self.num_points)
 
     def get_edge_type(self, edge_norm: np.ndarray):
         #Klassifiziert die Kante: tab, hole, flat
@@ -68,36 +41,37 @@ class EdgeComparator:
         else:
             return "flat"
 
+    def describe(self, edge) -> np.ndarray:
+        #Normalisierte und neu abgetastete Kante, so wie compare() sie vergleicht.
+        return self._resample_edge(self._normalize_geometry(edge))
+
     def compare(self) -> float:
         #Vergleich zweier Kanten.
 
         #Normalisieren
-        A_norm = self._normalize_geometry(self.edge_a)
-        B_norm = self._normalize_geometry(self.edge_b)
-        
-        A = self._resample_edge(A_norm)
-        B = self._resample_edge(B_norm)
-        
+        A = self.describe(self.edge_a)
+        B = self.describe(self.edge_b)
+
+        return self.compare_descriptors(A, B)[0]
+
+    def compare_descriptors(self, A: np.ndarray, B: np.ndarray, type_a=None, type_b=None):
+        #Vergleich zweier bereits normalisierter Kanten.
+        #Gibt (Score, reversed) zurück; reversed = B wurde umgekehrt verglichen.
+
         #Typ-Filter
-        type_a = self.get_edge_type(A)
-        type_b = self.get_edge_type(B)
+        if type_a is None:
+            type_a = self.get_edge_type(A)
+        if type_b is None:
+            type_b = self.get_edge_type(B)
         
         if type_a == "flat" or type_b == "flat":
-            return 99.0
+            return 99.0, False
             
         if type_a == type_b:
-            return 98.0
+            return 98.0, False
             
-        #Geometrischer Vergleich
-        B_inv = B.copy()
-        B_inv[:, 1] *= -1 
-        
-        # Teste beide Richtungen
-        diff_fwd = np.sqrt(np.mean(np.sum((A - B_inv)**2, axis=1)))
-        
-        B_inv_rev = B_inv[::-1].copy()
-        B_inv_rev[:, 0] = 1.0 - B_inv_rev[:, 0]
-        diff_rev = np.sqrt(np.mean(np.sum((A - B_inv_rev)**2, axis=1)))
+        #Geometrischer Vergleich: B gespiegelt, beide Richtungen testen
+        diff_fwd, diff_rev = kernels.rmse_bidirectional(A, B)
         
         shape_score = min(diff_fwd, diff_rev)
         
@@ -106,4 +80,14 @@ class EdgeComparator:
         height_b = np.max(np.abs(B[:, 1]))
         height_penalty = abs(height_a - height_b)
         
-        return shape_score + (height_penalty * 0.5)
\ No newline at end of file
+        return shape_score + (height_penalty * 0.5), bool(diff_rev < diff_fwd)
+
+    @staticmethod
+    def mirrored(B: np.ndarray, reversed_: bool) -> np.ndarray:
+        #Gespiegelte Kante B in der Richtung, in der sie verglichen wurde.
+        B_inv = B.copy()
+        B_inv[:, 1] *= -1
+        if reversed_:
+            B_inv = B_inv[::-1].copy()
+            B_inv[:, 0] = 1.0 - B_inv[:, 0]
+        return B_inv
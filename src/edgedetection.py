@@ -16,6 +16,14 @@ class EdgeDetection:
         self.contours = None
         self.puzzle_pieces = []
 
+    @classmethod
+    def from_image(cls, image, name: str = "<image>"):
+        """Detector for an image that is already in memory (e.g. one camera tile)."""
+        det = cls(name)
+        det.src = image
+        det.src_gray = image if image.ndim == 2 else cv.cvtColor(image, cv.COLOR_BGR2GRAY)
+        return det
+
     def load(self):
         """Load image from path"""
         self.src = cv.imread(self.path_to_file)
@@ -25,15 +33,33 @@ class EdgeDetection:
         logging.info(f"Bild geladen: {self.path_to_file} Größe={self.src.shape[1]}x{self.src.shape[0]}")
         return self
         
-    def find_contours(self):
-        """Find contours using Gaussian blur + Otsu threshold."""
+    def find_contours(self, thresh=None):
+        """Find contours using Gaussian blur + Otsu threshold (or a fixed thresh)."""
         img_blur = cv.GaussianBlur(self.src_gray, (5,5), 0)
-        _, img_thresh = cv.threshold(img_blur, 0, 255, cv.THRESH_BINARY_INV + cv.THRESH_OTSU)
+        if thresh is None:
+            _, img_thresh = cv.threshold(img_blur, 0, 255, cv.THRESH_BINARY_INV + cv.THRESH_OTSU)
+        else:
+            _, img_thresh = cv.threshold(img_blur, thresh, 255, cv.THRESH_BINARY_INV)
         contours, _ = cv.findContours(img_thresh, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
         self.contours = contours
         logging.info(f"Gefundene Konturen: {len(contours)}")
         return contours
 
+    def find_contours_tiled(self, strip_rows=1024, overlap=128, thresh=None):
+        """
+        Same contours as find_contours (same order, so filter_contours gives
+        the same Puzzle.index), computed in overlapping strips with a global
+        Otsu threshold from a streaming histogram (see StripDetection).
+        Without load() the file is read strip by strip (.npy is memory-mapped).
+        """
+        from TileDetection import StripDetection
+
+        source = self.src if self.src is not None else self.path_to_file
+        strips = StripDetection(strip_rows=strip_rows, overlap=overlap, thresh=thresh, min_area=0)
+        self.contours = strips.contours(source)
+        logging.info(f"Gefundene Konturen: {len(self.contours)}")
+        return self.contours
+
     def filter_contours(self, min_area = MIN_AREA):
         """Filter contours by area and create Puzzle objects"""
         if self.contours is None or len(self.contours) == 0:
@@ -0,0 +1,245 @@
+"""
+Numerische Kernels für Kantenvergleich und Segmentierung, mit zwei Backends:
+
+    numpy   reine NumPy-Implementierung (immer vorhanden)
+    numba   mit numba kompiliert (nur wenn numba installiert ist)
+
+Standard ist numba, sobald es importiert werden kann; PREN_KERNELS=numpy|numba
+erzwingt ein Backend (ein nicht verfügbares fällt mit Warnung auf den Standard
+zurück). Beide liefern dieselben Ergebnisse (kernels_test.py).
+
+    python kernels.py     Laufzeit pro Kernel und Backend
+"""
+from __future__ import annotations
+import logging
+import os
+import sys
+import timeit
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+# ---------- NumPy ----------
+def _resample_numpy(edge: np.ndarray, num_points: int) -> np.ndarray:
+    diffs = np.linalg.norm(np.diff(edge, axis=0), axis=1)
+    dists = np.concatenate([[0.0], np.cumsum(diffs)])
+    total_len = dists[-1]
+    if total_len == 0:
+        return edge
+    new_dists = np.linspace(0, total_len, num_points)
+    return np.stack([np.interp(new_dists, dists, edge[:, 0]), np.interp(new_dists, dists, edge[:, 1])], axis=1)
+
+
+def _normalize_numpy(edge: np.ndarray) -> np.ndarray:
+    edge = edge - edge[0]
+    end_point = edge[-1]
+    angle = -np.arctan2(end_point[1], end_point[0])
+    c, s = np.cos(angle), np.sin(angle)
+    edge = np.dot(edge, np.array([[c, -s], [s, c]]).T)
+    x_dist = edge[-1, 0]
+    if x_dist > 0:
+        edge = edge / x_dist
+    return edge
+
+
+def _rmse_bidirectional_numpy(A: np.ndarray, B: np.ndarray) -> Tuple[float, float]:
+    # B gespiegelt (y * -1), einmal vorwärts und einmal rückwärts (x -> 1 - x)
+    fwd = np.sqrt(np.mean((A[:, 0] - B[:, 0]) ** 2 + (A[:, 1] + B[:, 1]) ** 2))
+    R = B[::-1]
+    rev = np.sqrt(np.mean((A[:, 0] - (1.0 - R[:, 0])) ** 2 + (A[:, 1] + R[:, 1]) ** 2))
+    return float(fwd), float(rev)
+
+
+def _assign_corners_numpy(points: np.ndarray, corners: np.ndarray) -> List[int]:
+    # je Ecke der nächste noch freie Konturpunkt; bei Gleichstand der kleinste Index
+    dists = np.linalg.norm(points[None, :, :] - corners[:, None, :], axis=2)
+    free = np.ones(len(points), bool)
+    assigned = []
+    for d in dists:
+        if free.any():
+            idx = int(np.argmin(np.where(free, d, np.inf)))
+        else:
+            idx = int(np.argmin(d))
+        free[idx] = False
+        assigned.append(idx)
+    return assigned
+
+
+NUMPY = SimpleNamespace(name="numpy", resample=_resample_numpy, normalize=_normalize_numpy,
+                        rmse_bidirectional=_rmse_bidirectional_numpy, assign_corners=_assign_corners_numpy)
+BACKENDS: Dict[str, SimpleNamespace] = {"numpy": NUMPY}
+
+
+# ---------- numba ----------
+if numba is not None:
+    @numba.njit(cache=True)
+    def _resample_nb(edge, num_points):
+        n = edge.shape[0]
+        dists = np.zeros(n)
+        for i in range(1, n):
+            dists[i] = dists[i - 1] + np.hypot(edge[i, 0] - edge[i - 1, 0], edge[i, 1] - edge[i - 1, 1])
+        total_len = dists[n - 1]
+        if total_len == 0:
+            return edge.copy()
+        new_dists = np.linspace(0, total_len, num_points)
+        out = np.empty((num_points, 2))
+        out[:, 0] = np.interp(new_dists, dists, edge[:, 0])
+        out[:, 1] = np.interp(new_dists, dists, edge[:, 1])
+        return out
+
+    @numba.njit(cache=True)
+    def _normalize_nb(edge):
+        n = edge.shape[0]
+        x0, y0 = edge[0, 0], edge[0, 1]
+        angle = -np.arctan2(edge[n - 1, 1] - y0, edge[n - 1, 0] - x0)
+        c, s = np.cos(angle), np.sin(angle)
+        out = np.empty((n, 2))
+        for i in range(n):
+            dx, dy = edge[i, 0] - x0, edge[i, 1] - y0
+            out[i, 0] = dx * c - dy * s
+            out[i, 1] = dx * s + dy * c
+        x_dist = out[n - 1, 0]
+        if x_dist > 0:
+            for i in range(n):
+                out[i, 0] /= x_dist
+                out[i, 1] /= x_dist
+        return out
+
+    @numba.njit(cache=True)
+    def _rmse_bidirectional_nb(A, B):
+        n = A.shape[0]
+        fwd = 0.0
+        rev = 0.0
+        for i in range(n):
+            dx, dy = A[i, 0] - B[i, 0], A[i, 1] + B[i, 1]
+            fwd += dx * dx + dy * dy
+            j = n - 1 - i
+            dx, dy = A[i, 0] - (1.0 - B[j, 0]), A[i, 1] + B[j, 1]
+            rev += dx * dx + dy * dy
+        return np.sqrt(fwd / n), np.sqrt(rev / n)
+
+    @numba.njit(cache=True)
+    def _assign_corners_nb(points, corners):
+        n = points.shape[0]
+        free = np.ones(n, np.bool_)
+        assigned = np.empty(corners.shape[0], np.int64)
+        for k in range(corners.shape[0]):
+            best, best_free = -1, -1
+            best_d, best_free_d = np.inf, np.inf
+            for i in range(n):
+                d = np.hypot(points[i, 0] - corners[k, 0], points[i, 1] - corners[k, 1])
+                if d < best_d:
+                    best, best_d = i, d
+                if free[i] and d < best_free_d:
+                    best_free, best_free_d = i, d
+            idx = best_free if best_free >= 0 else best
+            free[idx] = False
+            assigned[k] = idx
+        return assigned
+
+    BACKENDS["numba"] = SimpleNamespace(
+        name="numba",
+        resample=lambda edge, num_points: _resample_nb(np.ascontiguousarray(edge, np.float64), int(num_points)),
+        normalize=lambda edge: _normalize_nb(np.ascontiguousarray(edge, np.float64)),
+        rmse_bidirectional=lambda A, B: tuple(float(v) for v in _rmse_bidirectional_nb(
+            np.ascontiguousarray(A, np.float64), np.ascontiguousarray(B, np.float64))),
+        assign_corners=lambda points, corners: _assign_corners_nb(
+            np.ascontiguousarray(points, np.float64), np.ascontiguousarray(corners, np.float64)).tolist())
+
+
+def use(name: str) -> SimpleNamespace:
+    """Switch the backend of the module-level kernels; raises ValueError if it is not available."""
+    global _active
+    if name not in BACKENDS:
+        raise ValueError(f"Kernel-Backend {name!r} nicht verfügbar; vorhanden: {sorted(BACKENDS)}")
+    _active = BACKENDS[name]
+    return _active
+
+
+def backend() -> str:
+    return _active.name
+
+
+def _from_environment() -> SimpleNamespace:
+    default = "numba" if "numba" in BACKENDS else "numpy"
+    requested = os.environ.get("PREN_KERNELS") or default
+    try:
+        return use(requested)
+    except ValueError as e:
+        logging.getLogger(__name__).warning(f"PREN_KERNELS: {e}; verwende {default}")
+        return use(default)
+
+
+_active = _from_environment()
+
+
+# ---------- kernels (float64 (n, 2) arrays, n >= 2) ----------
+def resample(edge: np.ndarray, num_points: int) -> np.ndarray:
+    """num_points points evenly spaced along the arc length; an edge of length 0 is returned unchanged."""
+    return _active.resample(edge, num_points)
+
+
+def normalize(edge: np.ndarray) -> np.ndarray:
+    """Start at the origin, end on the positive x axis, end point at x = 1."""
+    return _active.normalize(edge)
+
+
+def rmse_bidirectional(A: np.ndarray, B: np.ndarray) -> Tuple[float, float]:
+    """RMSE of A against mirrored B, forwards and reversed."""
+    return _active.rmse_bidirectional(A, B)
+
+
+def assign_corners(points: np.ndarray, corners: np.ndarray) -> List[int]:
+    """Contour index per corner: the closest point not taken by an earlier corner."""
+    return _active.assign_corners(points, corners)
+
+
+# ---------- benchmark ----------
+def _bench_inputs(seed: int = 0):
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, 1, 250)
+    edge = np.stack([300 * t, 40 * np.sin(np.pi * t) + rng.normal(0, 0.5, t.size)], axis=1)
+    desc = _resample_numpy(_normalize_numpy(edge), 100)
+    angle = np.linspace(0, 2 * np.pi, 1500, endpoint=False)
+    contour = np.round(np.stack([200 + 150 * np.cos(angle), 200 + 150 * np.sin(angle)], axis=1))
+    corners = np.array([[94.0, 94.0], [306.0, 94.0], [306.0, 306.0], [94.0, 306.0]])
+    return {"resample": (edge, 100), "normalize": (edge,), "rmse_bidirectional": (desc, desc[::-1].copy()),
+            "assign_corners": (contour, corners)}
+
+
+def benchmark(number: int = 2000) -> Dict[str, Dict[str, float]]:
+    """Microseconds per call, per backend and kernel."""
+    inputs = _bench_inputs()
+    out = {}
+    for name, impl in BACKENDS.items():
+        out[name] = {}
+        for kernel, args in inputs.items():
+            func = getattr(impl, kernel)
+            func(*args)     # numba: Kompilierung nicht mitmessen
+            out[name][kernel] = 1e6 * min(timeit.repeat(lambda: func(*args), number=number, repeat=3)) / number
+    return out
+
+
+def main() -> int:
+    results = benchmark()
+    print(f"{'Kernel':<20}" + "".join(f"{name:>12}" for name in results) +
+          ("    Speedup" if "numba" in results else ""))
+    for kernel in results["numpy"]:
+        row = f"{kernel:<20}" + "".join(f"{results[name][kernel]:>10.2f}us" for name in results)
+        if "numba" in results:
+            row += f"{results['numpy'][kernel] / results['numba'][kernel]:>10.1f}x"
+        print(row)
+    if numba is None:
+        print("numba nicht installiert: nur NumPy-Backend gemessen")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
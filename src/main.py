@@ -1,107 +1,124 @@
 import os
 import logging
-import numpy as np
-from edgedetection import EdgeDetection
-from matching import Matching
-from puzzleorganizer import PuzzleOrganizer
-from visualizer import Visualizer
-from GlobalArea import GlobalArea
-from Position_and_Rotation.Rotation import Rotation
-from Position_and_Rotation.Translation   import Translation
-from FlatEdgeFinder import FlatEdgeFinder
-from Anchor import Anchor
-from MatchPlacer import MatchPlacer
-
-logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
-
-# Puzzleteile einlesen
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-path = os.path.join(BASE_DIR, "../Data/puzzle_selfmade_black.jpeg")
-
-detector = EdgeDetection(path)
-detector.load()
-
-# Konturen finden und filtern
-detector.find_contours()
-detector.filter_contours()
-
-# Puzzleteile vorbereiten
-pieces = detector.get_puzzle_pieces()
-pieces_by_id = {p.index: p for p in pieces}
-for piece in pieces:
-    piece.get_puzzle_edges()
-    logging.info(f"Teil {piece.index} Kanten: {[len(e['points']) for e in piece.edges]}")
-
-# Matches finden
-matcher = Matching(pieces)
-matches = matcher.find_matches(threshold=0.04)
-logging.info(f'matches: {matches}')
-matches = sorted(matches, key=lambda m: float(m["score"]))  # best first
-logging.info(f"Gefundene Matches: {len(matches)}")
-
-if not matches:
-    logging.warning("Keine Matches gefunden.")
-else:
-    for m in matches:
-        logging.info(f"Teil {m['piece_a']} Kante {m['edge_a']} ↔ "
-                     f"Teil {m['piece_b']} Kante {m['edge_b']} | Score={m['score']:.4f}")
-
-# Puzzle in 2x2 Array legen
-organizer = PuzzleOrganizer(pieces, matches, grid_size=2)
-grid = organizer.organize()
-logging.info("Puzzle-Layout:")
-for row in grid:
-    logging.info(f"  {row}")
-
-
-
-
-
-#Instatntiate 
-ta = Translation()
-rot = Rotation()
-ga = GlobalArea()
-ga.set_unsolved_puzzles(pieces) 
-ga.set_solved_puzzles(pieces)
-
-
-
-# --- new helpers ---
-flat_finder = FlatEdgeFinder(num_points=100, logger=logging.getLogger("FlatEdgeFinder"))
-anchor = Anchor(flat_finder=flat_finder, rot=rot, ta=ta, logger=logging.getLogger("Anchor"))
-match_placer = MatchPlacer(ga=ga, rot=rot, ta=ta, logger=logging.getLogger("MatchPlacer"))
-
-# optional debug
-flat_finder.log_edge_types(pieces)
-
-# choose anchor + get its flat edges
-
-anchor_piece, flat_edges = anchor.choose_anchor(ga.solved_puzzles)
-#Scale and move unsolved pieces to match real world. This Needs to be done BEItFORE the Pieces are scaled. 
-#Otherwise the logic of identifying Puzzle edges would not work anymore. 
-ga.scale_all_puzzles(0.23, 0.23)
-ga.translate_unsolved_puzzles(80,190)
-
-
-# Example: top-left directions & point computed from GlobalArea
-
-target_corner_point = [ga.area_solved.x, ga.area_solved.y + ga.area_solved.h]
-
-# choose corner directions/target point
-ang, dxdy = anchor.place_anchor(anchor_piece, flat_edges, (1,0), (0,1), target_corner_point)
-
-
-# apply matches
-matches_resorted = sorted(matches, key=lambda m: float(m["piece_a"]))
-match_placer.apply_matches(matches_resorted)
-
-
+from Pipeline import Pipeline
+from Solver import Solver
+from Instrumentation import trace
+from Profiling import StageProfiler
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Visualisierung im Raster  
-Visualizer.show_all_edges_grid(pieces, image=detector.src)
 
-# Visualisierung aller gefundenen Matches
-Visualizer.show_matches(matches, pieces)
-#Show Solved Puzzle
-ga.show()
\ No newline at end of file
+def main():
+    logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+
+    # Optional: Zeitmessung und Zähler pro Stufe (PREN_TRACE=Ordner) als
+    # trace.jsonl und trace.json (Chrome trace-event, z.B. in Perfetto öffnen)
+    TRACE_DIR = os.environ.get("PREN_TRACE")
+    if TRACE_DIR:
+        trace.enable()
+
+    # Optional: cProfile/tracemalloc pro Stufe (PREN_PROFILE=Ordner, PREN_PROFILE_STAGES=find_matches,...,
+    # PREN_PROFILE_MODE=cprofile|tracemalloc). Stufen, die aus dem Pipeline-Cache kommen, laufen nicht.
+    profiler = StageProfiler.from_env(logger=logging.getLogger("Profiling"))
+    if profiler:
+        profiler.install()
+
+    # Puzzleteile einlesen
+    path = os.path.join(BASE_DIR, "../Data/puzzle_selfmade_black.jpeg")
+
+    # Erkennung, Kanten, Matching und Layout als Pipeline mit Festplatten-Cache:
+    # nach einer Änderung z.B. nur am Schwellwert werden Erkennung und Segmentierung
+    # nicht wiederholt (Cache-Ordner löschen, um alles neu zu berechnen)
+    pipeline = Pipeline(path, cache_dir=os.path.join(BASE_DIR, "../.pipeline_cache"),
+                        threshold=0.04, grid_size=2, logger=logging.getLogger("Pipeline"))
+    pipeline.run()
+
+    # Puzzleteile vorbereiten
+    pieces = pipeline.get("segment")
+    pieces_by_id = {p.index: p for p in pieces}
+    for piece in pieces:
+        logging.info(f"Teil {piece.index} Kanten: {[len(e['points']) for e in piece.edges]}")
+
+    # Matches finden
+    matches = pipeline.get("match")["matches"]
+    artifact = pipeline.get("match")["artifact"]
+    logging.info(f'matches: {matches}')
+    matches = sorted(matches, key=lambda m: float(m["score"]))  # best first
+    logging.info(f"Gefundene Matches: {len(matches)}")
+
+    if not matches:
+        logging.warning("Keine Matches gefunden.")
+    else:
+        for m in matches:
+            logging.info(f"Teil {m['piece_a']} Kante {m['edge_a']} ↔ "
+                         f"Teil {m['piece_b']} Kante {m['edge_b']} | Score={m['score']:.4f}")
+
+    # Puzzle in 2x2 Array legen
+    grid = pipeline.get("organize")
+    logging.info("Puzzle-Layout:")
+    for row in grid:
+        logging.info(f"  {row}")
+
+    # Anker, Umrechnung Pixel -> mm, Platzierung, Prüfung, Roboter-Reihenfolge
+    solver = Solver(pieces, matches, calibration_image=os.path.join(BASE_DIR, "../Data/calibration_checkerboard.jpg"),
+                    calibration_dir=os.path.join(BASE_DIR, "../.calibration"), logger=logging.getLogger("Solver"))
+    ga = solver.ga
+
+    # Optional: Video mit einem Bild pro Platzierungsschritt (PREN_REPLAY_VIDEO=replay.mp4)
+    REPLAY_VIDEO = os.environ.get("PREN_REPLAY_VIDEO")
+    recorder = None
+    if REPLAY_VIDEO:
+        from SceneRenderer import SceneRenderer, PlacementRecorder
+        recorder = PlacementRecorder(SceneRenderer(ga), REPLAY_VIDEO)
+        solver.match_placer.listeners.append(recorder)
+
+    # Optional: Platzierung live mitverfolgen (PREN_LIVE_VIEW=1, oder =step für Schritt-für-Schritt)
+    LIVE_VIEW = os.environ.get("PREN_LIVE_VIEW")
+    viewer = None
+    if LIVE_VIEW:
+        from LiveViewer import LiveViewer
+        viewer = LiveViewer(ga, step=(LIVE_VIEW == "step"))
+        solver.match_placer.listeners.append(viewer)
+
+    def after_anchor():
+        if recorder:
+            recorder.capture()
+        if viewer:
+            viewer.refresh()
+
+    solver.solve(after_anchor=after_anchor)
+    if recorder:
+        recorder.close()
+    placements, move_plan, robot_run = solver.placements, solver.move_plan, solver.robot_run
+
+    if TRACE_DIR:
+        trace.log_summary()
+        trace.write_jsonl(os.path.join(TRACE_DIR, "trace.jsonl"))
+        trace.write_chrome_trace(os.path.join(TRACE_DIR, "trace.json"))
+        logging.info(f"Trace gespeichert: {TRACE_DIR}")
+
+    # Ohne GUI (z.B. auf Build-Servern): PREN_RENDER_DIR setzen, dann werden alle
+    # Diagnosebilder als PNG in diesen Ordner geschrieben.
+    RENDER_DIR = os.environ.get("PREN_RENDER_DIR")
+    from visualizer import Visualizer
+    if RENDER_DIR:
+        written = Visualizer.render_diagnostics(RENDER_DIR, pieces, matches, image=pipeline.get("load"), ga=ga,
+                                                artifact=artifact)
+        logging.info(f"Diagnosebilder gespeichert: {written}")
+    else:
+        # Visualisierung im Raster
+        Visualizer.show_all_edges_grid(pieces, image=pipeline.get("load"), artifact=artifact)
+
+        # Visualisierung aller gefundenen Matches
+        Visualizer.show_matches(matches, pieces, artifact=artifact)
+        #Show Solved Puzzle
+        ga.show()
+
+    if profiler:
+        profiler.uninstall()
+        logging.info(f"Profile gespeichert: {profiler.write()}")
+
+if __name__ == "__main__":
+    # Guard nötig: render_diagnostics startet einen ProcessPoolExecutor, unter spawn
+    # (Windows/macOS) importiert jeder Worker main.py neu
+    main()
@@ -0,0 +1,63 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+@dataclass
+class MatchArtifact:
+    """
+    Everything the matching stage computed per run, for read-only consumers
+    (Visualizer, exports). Nothing here has to be recomputed from the pieces.
+
+    edges       : piece -> edge point lists [top, right, bottom, left] as matched
+    corners     : piece -> 4 corners [TL, TR, BR, BL] in image pixels
+    descriptors : (piece, edge) -> normalized + resampled edge (num_points x 2)
+    edge_types  : (piece, edge) -> "tab" / "hole" / "flat"
+    directions  : (piece_a, edge_a, piece_b, edge_b) -> True if B was compared reversed
+    appearance  : (piece, edge) -> Lab colour profile inside the edge (EdgeAppearance), if computed
+    """
+    edges: Dict[int, List] = field(default_factory=dict)
+    corners: Dict[int, List] = field(default_factory=dict)
+    descriptors: Dict[Tuple[int, int], np.ndarray] = field(default_factory=dict)
+    edge_types: Dict[Tuple[int, int], str] = field(default_factory=dict)
+    directions: Dict[Tuple[int, int, int, int], bool] = field(default_factory=dict)
+    appearance: Dict[Tuple[int, int], np.ndarray] = field(default_factory=dict)
+    num_points: int = 100
+
+    @classmethod
+    def from_pieces(cls, pieces, num_points: int = 100) -> "MatchArtifact":
+        """
+        Build edges, corners and descriptors from pieces whose edges are
+        already segmented. Reads piece.edges, never calls get_puzzle_edges().
+        """
+        from edgecomparator import EdgeComparator
+
+        comp = EdgeComparator([], [], num_points=num_points)
+        art = cls(num_points=num_points)
+        for p in pieces:
+            art.add_piece(p, comp)
+        return art
+
+    def add_piece(self, piece, comp) -> None:
+        self.edges[piece.index] = [e["points"] for e in piece.edges]
+        if hasattr(piece, "get_best_4_corners"):
+            self.corners[piece.index] = piece.get_best_4_corners()
+        for k, e in enumerate(piece.edges):
+            desc = comp.describe(e["points"])
+            self.descriptors[(piece.index, k)] = desc
+            if np.ndim(desc) == 2 and len(desc) >= 2:
+                self.edge_types[(piece.index, k)] = comp.get_edge_type(desc)
+
+    def direction(self, match) -> bool:
+        key = (match["piece_a"], match["edge_a"], match["piece_b"], match["edge_b"])
+        if key not in self.directions:
+            # match did not come from this run's matcher -> compare once and remember
+            from edgecomparator import EdgeComparator
+
+            comp = EdgeComparator([], [], num_points=self.num_points)
+            ka, kb = key[:2], key[2:]
+            self.directions[key] = comp.compare_descriptors(
+                self.descriptors[ka], self.descriptors[kb],
+                self.edge_types.get(ka), self.edge_types.get(kb))[1]
+        return self.directions[key]
@@ -1,34 +1,89 @@
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Optional
 from edgecomparator import EdgeComparator
+from edgeappearance import EdgeAppearance
+from matchartifact import MatchArtifact
+from Instrumentation import trace
 
 class Matching:
 #Brute-Force Matcher für Puzzle-Kanten.
 
-    def __init__(self, pieces: List):
+    def __init__(self, pieces: List, num_points: int = 100, appearance: Optional[Dict] = None,
+                 color_threshold: Optional[float] = None):
         self.pieces = pieces
+        self.num_points = num_points
+        # (piece, edge) -> Farbprofil (EdgeAppearance); mit color_threshold werden
+        # Tab/Hole-Paare mit grösserer Farbdistanz vor dem Formvergleich verworfen
+        self.appearance = appearance
+        self.color_threshold = color_threshold
+        self.artifact = None
+        self._comp = None
+        # Anzahl Kantenvergleiche dieses Objekts
+        self.comparisons = 0
+        self.color_rejected = 0
+
+    def prepare(self) -> MatchArtifact:
+        # Deskriptoren (normalisiert + abgetastet) nur einmal pro Kante berechnen
+        self._comp = EdgeComparator([], [], num_points=self.num_points)
+        with trace.span("classification", pieces=len(self.pieces)):
+            self.artifact = MatchArtifact.from_pieces(self.pieces, num_points=self.num_points)
+            if self.appearance is not None:
+                self.artifact.appearance = self.appearance
+        return self.artifact
+
+    def match_pair(self, pa, pb, threshold: float) -> List[Dict]:
+        """All edge pairs of two pieces below threshold (needs prepare())."""
+        comp = self._comp
+        artifact = self.artifact
+        desc = artifact.descriptors
+        types = artifact.edge_types
+        colors = self.appearance if self.color_threshold is not None else None
+
+        matches = []
+        for edge_a_idx, edge_a in enumerate(pa.edges):
+            for edge_b_idx, edge_b in enumerate(pb.edges):
+                key_a = (pa.index, edge_a_idx)
+                key_b = (pb.index, edge_b_idx)
+
+                self.comparisons += 1
+                # Farb-Vorfilter nur für Paare, die sonst den vollen Formvergleich bekämen
+                if colors is not None:
+                    type_a, type_b = types.get(key_a), types.get(key_b)
+                    if type_a != type_b and "flat" not in (type_a, type_b) and \
+                            EdgeAppearance.distance(colors.get(key_a), colors.get(key_b)) > self.color_threshold:
+                        self.color_rejected += 1
+                        continue
+
+                score, reversed_ = comp.compare_descriptors(
+                    desc[key_a], desc[key_b], types.get(key_a), types.get(key_b))
+
+                # Nur hinzufügen, wenn der Score plausibel ist
+                if score < threshold and score < 10.0:
+                    artifact.directions[(pa.index, edge_a_idx, pb.index, edge_b_idx)] = reversed_
+                    matches.append({
+                        "piece_a": pa.index,
+                        "edge_a": edge_a_idx,
+                        "piece_b": pb.index,
+                        "edge_b": edge_b_idx,
+                        "score": score
+                    })
+        return matches
 
     def find_matches(self, threshold: float = 0.2) -> List[Dict]:
+        self.prepare()
+        start = self.comparisons
+        color_start = self.color_rejected
+
         matches = []
-        for i, pa in enumerate(self.pieces):
-            for j, pb in enumerate(self.pieces):
-                if i >= j: continue
-
-                for edge_a_idx, edge_a in enumerate(pa.edges):
-                    for edge_b_idx, edge_b in enumerate(pb.edges):
-                        
-                        comp = EdgeComparator(edge_a["points"], edge_b["points"])
-                                                
-                        score = comp.compare()
-                        
-                        # Nur hinzufügen, wenn der Score plausibel ist
-                        if score < threshold and score < 10.0:
-                            matches.append({
-                                "piece_a": pa.index,
-                                "edge_a": edge_a_idx,
-                                "piece_b": pb.index,
-                                "edge_b": edge_b_idx,
-                                "score": score
-                            })
+        with trace.span("matching", pieces=len(self.pieces), threshold=threshold):
+            for i, pa in enumerate(self.pieces):
+                for j, pb in enumerate(self.pieces):
+                    if i >= j: continue
+                    matches.extend(self.match_pair(pa, pb, threshold))
+        comparisons = self.comparisons - start
+        trace.count("comparisons", comparisons)
+        trace.count("pairs_rejected", comparisons - len(matches))
+        if self.color_threshold is not None:
+            trace.count("pairs_color_rejected", self.color_rejected - color_start)
         matches.sort(key=lambda m: m["score"])
         return matches
@@ -1,5 +1,6 @@
 import cv2 as cv
 import numpy as np
+import kernels
 
 class Puzzle:
 
@@ -11,7 +12,19 @@ class Puzzle:
         self.center_point = self.get_center_point()
         self.edges = []
         self.corners = []
-        
+
+    @classmethod
+    def from_geometry(cls, contour, index, area, bounding_box, center_point):
+        """Create a piece from already known geometry (no contourArea/boundingRect/moments)."""
+        piece = cls.__new__(cls)
+        piece.index = index
+        piece.contour = contour
+        piece.area = area
+        piece.bounding_box = bounding_box
+        piece.center_point = center_point
+        piece.edges = []
+        piece.corners = []
+        return piece
 
     def get_contour(self):
         return self.contour
@@ -50,44 +63,18 @@ class Puzzle:
 
             return sorted_corners
 
-    def get_puzzle_edges(self):
+    def get_puzzle_edges(self, epsilon_factor=0.00002):
         contour_pts = self.contour.reshape(-1, 2)
         n = len(contour_pts)
-        corners = self.get_best_4_corners()
+        corners = self.get_best_4_corners(epsilon_factor)
 
         if n == 0 or len(corners) != 4:
             edges = [{"points": [], "type": "inner"} for _ in range(4)]
             self.edges = edges
             return edges
 
-        corner_candidate_indices = []
-        for c in corners:
-            dists = np.linalg.norm(contour_pts - np.array(c), axis=1)
-            sorted_idx = np.argsort(dists)
-            corner_candidate_indices.append(list(sorted_idx))
-
-        used = set()
-        assigned = [None] * 4
-        for i in range(4):
-            for idx in corner_candidate_indices[i]:
-                if idx not in used:
-                    assigned[i] = int(idx)
-                    used.add(idx)
-                    break
-            if assigned[i] is None:
-                base = corner_candidate_indices[i][0]
-                found = False
-                for offset in range(1, n):
-                    for cand in [(base + offset) % n, (base - offset) % n]:
-                        if cand not in used:
-                            assigned[i] = int(cand)
-                            used.add(cand)
-                            found = True
-                            break
-                    if found:
-                        break
-                if not found:
-                    assigned[i] = int(base)
+        # je Ecke der nächste noch nicht vergebene Konturpunkt
+        assigned = kernels.assign_corners(contour_pts.astype(np.float64), np.asarray(corners, np.float64))
 
         idx_corner_pairs = list(zip(assigned, corners))
         idx_corner_pairs.sort(key=lambda x: x[0])
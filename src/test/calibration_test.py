@@ -0,0 +1,96 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import logging
+import shutil
+import tempfile
+import unittest
+import cv2 as cv
+import numpy as np
+from Calibration import CameraCalibration
+
+
+def _checkerboard(pattern=(9, 6), square=40):
+    # weisser Rand von einem Feld; innere Ecken bei (k * square - 0.5) Pixeln
+    cols, rows = pattern
+    img = np.full(((rows + 3) * square, (cols + 3) * square), 255, np.uint8)
+    for r in range(rows + 1):
+        for c in range(cols + 1):
+            if (r + c) % 2 == 0:
+                img[(r + 1) * square:(r + 2) * square, (c + 1) * square:(c + 2) * square] = 0
+    gx, gy = np.meshgrid(np.arange(cols), np.arange(rows))
+    corners = np.stack([(gx.ravel() + 2) * square, (gy.ravel() + 2) * square], axis=1) - 0.5
+    return img, corners.astype(np.float64), gx.ravel(), gy.ravel()
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.calls = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _compute(self, H):
+        def compute():
+            self.calls += 1
+            return H
+        return compute
+
+    def test_hit_does_not_compute(self):
+        H = np.diag([0.25, -0.25, 1.0])
+        key = CameraCalibration.setup_key(camera="top", size=(1252, 932))
+        first = CameraCalibration(cache_dir=self.tmp, logger=logging.getLogger("test"))
+        np.testing.assert_array_equal(first.load_or_compute(key, self._compute(H)), H)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp, f"homography_{key}.npy")))
+
+        second = CameraCalibration(cache_dir=self.tmp, logger=logging.getLogger("test"))
+        np.testing.assert_array_equal(second.load_or_compute(key, self._compute(np.eye(3))), H)
+        self.assertEqual(self.calls, 1)
+
+    def test_other_setup_misses(self):
+        calibration = CameraCalibration(cache_dir=self.tmp, logger=logging.getLogger("test"))
+        a = CameraCalibration.setup_key(camera="top", size=(1252, 932))
+        b = CameraCalibration.setup_key(camera="top", size=(1920, 1080))
+        self.assertNotEqual(a, b)
+        self.assertEqual(a, CameraCalibration.setup_key(size=(1252, 932), camera="top"))
+        calibration.load_or_compute(a, self._compute(np.eye(3)))
+        np.testing.assert_array_equal(calibration.load_or_compute(b, self._compute(2 * np.eye(3))), 2 * np.eye(3))
+        self.assertEqual(self.calls, 2)
+
+
+class TestHomography(unittest.TestCase):
+
+    def setUp(self):
+        # Kamera leicht schräg: bekannte Homographie Bild -> Tisch
+        self.H_true = np.array([[0.25, 0.01, 12.0], [0.005, -0.24, 230.0], [2e-5, 1e-5, 1.0]])
+
+    def test_from_markers(self):
+        px = np.array([[100, 80], [1100, 90], [1150, 850], [60, 900], [600, 450], [300, 700]], np.float64)
+        mm = cv.perspectiveTransform(px.reshape(-1, 1, 2), self.H_true).reshape(-1, 2)
+        for n in (4, 6):
+            H = CameraCalibration.homography_from_markers(px[:n], mm[:n])
+            np.testing.assert_allclose(H / H[2, 2], self.H_true, rtol=1e-6, atol=1e-9)
+        with self.assertRaises(ValueError):
+            CameraCalibration.homography_from_markers(px[:3], mm[:3])
+
+    def test_from_checkerboard(self):
+        img, corners, gx, gy = _checkerboard()
+        warp = np.array([[1.0, 0.05, 30.0], [0.02, 0.95, 20.0], [1e-4, 5e-5, 1.0]])
+        photo = cv.warpPerspective(img, warp, (img.shape[1] + 100, img.shape[0] + 100), borderValue=255)
+        pixels = cv.perspectiveTransform(corners.reshape(-1, 1, 2), warp)
+
+        H = CameraCalibration.homography_from_checkerboard(photo, (9, 6), 20.0, origin_mm=(50.0, 300.0))
+        mm = cv.perspectiveTransform(pixels, H).reshape(-1, 2)
+        expected = np.stack([50.0 + 20.0 * gx, 300.0 - 20.0 * gy], axis=1)
+        np.testing.assert_allclose(mm, expected, atol=0.1)
+
+    def test_checkerboard_not_found(self):
+        with self.assertRaises(ValueError):
+            CameraCalibration.homography_from_checkerboard(np.full((200, 200), 255, np.uint8), (9, 6), 20.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import subprocess
+import unittest
+import cli
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+IMAGE = os.path.join(SRC_DIR, "../Data/puzzle_selfmade_black.jpeg")
+
+# Summe aller Importe von "cli.py solve --no-render", in Sekunden
+IMPORT_BUDGET_S = 2.0
+
+
+def import_times(argv):
+    """Top-level imports (name -> cumulative seconds) of one CLI run, via -X importtime."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", os.path.join(SRC_DIR, "cli.py")] + argv,
+                          cwd=SRC_DIR, capture_output=True, text=True, timeout=300)
+    if proc.returncode != 0:
+        raise AssertionError(proc.stderr[-2000:])
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # Kopfzeile
+        # genau ein Leerzeichen Einrückung = vom Programm selbst importiert
+        if name.startswith(" ") and not name.startswith("  "):
+            times[name.strip()] = int(cumulative) / 1e6
+    imported = {line.split("|", 2)[2].strip() for line in proc.stderr.splitlines()
+                if line.startswith("import time:") and line.count("|") == 2}
+    return times, imported, proc.stdout
+
+
+@unittest.skipUnless(os.path.exists(IMAGE), "Beispielbild fehlt")
+class TestCli(unittest.TestCase):
+
+    def test_solve_no_render_import_budget(self):
+        times, imported, out = import_times(["solve", IMAGE, "--no-render", "--cache-dir", ""])
+        self.assertNotIn("matplotlib", imported)
+        self.assertNotIn("matplotlib.pyplot", imported)
+        total = sum(times.values())
+        self.assertLess(total, IMPORT_BUDGET_S, f"Importe: {sorted(times.items(), key=lambda kv: -kv[1])[:5]}")
+        result = json.loads(out)
+        self.assertTrue(result["placements"])
+        self.assertEqual(len(result["layout"]), 2)
+
+    def test_detect_does_not_import_scipy_or_matplotlib(self):
+        _, imported, out = import_times(["detect", IMAGE, "--cache-dir", ""])
+        self.assertFalse({"scipy", "matplotlib"} & imported)
+        self.assertEqual(len(json.loads(out)), 4)
+
+    def test_parser(self):
+        args = cli.build_parser().parse_args(["solve", "x.jpg", "--no-render", "--threshold", "0.1"])
+        self.assertIs(args.func, cli.cmd_solve)
+        self.assertTrue(args.no_render)
+        self.assertEqual(args.threshold, 0.1)
+        with self.assertRaises(SystemExit):
+            cli.build_parser().parse_args(["render", "x.jpg"])  # --out fehlt
+
+
+if __name__ == '__main__':
+    unittest.main()
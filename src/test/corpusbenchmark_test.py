@@ -0,0 +1,111 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import logging
+import tempfile
+import unittest
+from CorpusBenchmark import CorpusBenchmark, DATA_DIR
+
+LAYOUT = [[1, 2], [3, 4]]
+
+
+def _record(name, pieces=4, matches=4, layout=LAYOUT, status="ok", failed_at=None, total_ms=50.0, stages=None):
+    return {"image": name, "status": status, "failed_at": failed_at, "error": None, "pieces": pieces,
+            "matches": matches, "layout": layout, "placements": 5, "total_ms": total_ms,
+            "stages_ms": stages or {"matching": total_ms / 2}, "counters": {}}
+
+
+class TestCompare(unittest.TestCase):
+
+    def setUp(self):
+        self.bench = CorpusBenchmark(data_dir=tempfile.gettempdir(), golden="", logger=logging.getLogger("test"))
+        self.golden = {"params": {}, "images": {
+            "a.jpg": {"status": "ok", "failed_at": None, "pieces": 4, "matches": 4, "layout": LAYOUT,
+                      "expected_failure": False},
+            "b.jpg": {"status": "error", "failed_at": "match", "pieces": 6, "matches": None, "layout": None,
+                      "expected_failure": False},
+            "d.jpg": {"status": "error", "failed_at": "match", "pieces": 6, "matches": None, "layout": None,
+                      "expected_failure": "Matching bricht ab"},
+        }}
+
+    def _verdicts(self, images, previous=None):
+        rows = self.bench.compare({"params": {}, "images": images}, self.golden, previous or {})
+        return {r["image"]: r for r in rows}
+
+    def test_accuracy_verdicts(self):
+        rows = self._verdicts({"a.jpg": _record("a.jpg", pieces=3), "b.jpg": _record("b.jpg", pieces=6),
+                               "unusable.jpg": _record("unusable.jpg", layout=[[1, None], [None, None]]),
+                               "c.jpg": _record("c.jpg")})
+        self.assertEqual(rows["a.jpg"]["verdict"], "REGRESSION")
+        self.assertIn("pieces: 4 -> 3", rows["a.jpg"]["notes"])
+        self.assertEqual(rows["b.jpg"]["verdict"], "improved")
+        self.assertEqual(rows["unusable.jpg"]["verdict"], "xfail")
+        self.assertEqual(rows["c.jpg"]["verdict"], "new")
+
+    def test_slowdown_against_previous_run(self):
+        previous = {"images": {"a.jpg": _record("a.jpg", total_ms=50.0),
+                               "b.jpg": _record("b.jpg", total_ms=50.0, stages={"matching": 10.0})}}
+        rows = self._verdicts({"a.jpg": _record("a.jpg", total_ms=52.0),
+                               "b.jpg": _record("b.jpg", status="error", failed_at="match", matches=None,
+                                                layout=None, pieces=6, total_ms=55.0,
+                                                stages={"matching": 30.0})}, previous)
+        self.assertEqual(rows["a.jpg"]["verdict"], "ok")
+        self.assertEqual(rows["a.jpg"]["flags"], [])
+        self.assertEqual(rows["b.jpg"]["verdict"], "error")
+        self.assertEqual(rows["b.jpg"]["flags"], ["SLOW"])
+        self.assertIn("matching: 10.0 -> 30.0 ms", rows["b.jpg"]["notes"])
+        self.assertIn("SLOW", CorpusBenchmark.table(list(rows.values())))
+
+    def test_stored_failure_is_not_a_pass(self):
+        failed = _record("b.jpg", status="error", failed_at="match", matches=None, layout=None, pieces=6)
+        rows = self._verdicts({"b.jpg": failed, "d.jpg": dict(failed, image="d.jpg")})
+        self.assertEqual(rows["b.jpg"]["verdict"], "error")
+        self.assertEqual(rows["d.jpg"]["verdict"], "xfail")
+        self.assertIn("Matching bricht ab", rows["d.jpg"]["notes"])
+        table = CorpusBenchmark.table(list(rows.values()))
+        self.assertIn("Matching bricht ab", table)
+        self.assertIn("error: 1", table)
+
+    def test_update_golden_keeps_reasons(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "golden.json")
+            with open(path, "w") as f:
+                json.dump(self.golden, f)
+            bench = CorpusBenchmark(data_dir=tmp, golden=path, logger=logging.getLogger("test"))
+            failed = _record("d.jpg", status="error", failed_at="match", matches=None, layout=None, pieces=6)
+            bench.update_golden({"params": {}, "images": {"a.jpg": _record("a.jpg"), "d.jpg": failed,
+                                                          "e.jpg": dict(failed, image="e.jpg")}})
+            images = bench.golden()["images"]
+        self.assertEqual(images["d.jpg"]["expected_failure"], "Matching bricht ab")
+        self.assertFalse(images["a.jpg"]["expected_failure"])
+        self.assertFalse(images["e.jpg"]["expected_failure"])
+
+
+@unittest.skipUnless(os.path.exists(os.path.join(DATA_DIR, "golden.json")), "Golden-File fehlt")
+class TestCorpus(unittest.TestCase):
+
+    def test_corpus_matches_golden(self):
+        logging.disable(logging.WARNING)
+        try:
+            with tempfile.TemporaryDirectory() as out:
+                bench = CorpusBenchmark(out_dir=out)
+                run = bench.run()
+                rows = bench.compare(run)
+                bench.write(run, rows)
+                with open(os.path.join(out, "last.json")) as f:
+                    self.assertEqual(set(json.load(f)["images"]), set(bench.images()))
+        finally:
+            logging.disable(logging.NOTSET)
+        regressions = [(r["image"], r["notes"]) for r in rows if r["verdict"] == "REGRESSION"]
+        self.assertEqual(regressions, [])
+        self.assertEqual([r["image"] for r in rows if r["verdict"] == "error"], [])
+        golden = bench.golden()["images"]
+        self.assertEqual({r["image"] for r in rows if r["verdict"] == "xfail"},
+                         {name for name, ref in golden.items() if ref["expected_failure"]})
+        self.assertTrue(all(r["record"]["stages_ms"] for r in rows))
+
+
+if __name__ == "__main__":
+    unittest.main()
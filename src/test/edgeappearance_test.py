@@ -0,0 +1,72 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import unittest
+import cv2 as cv
+import numpy as np
+from edgeappearance import EdgeAppearance
+from puzzle import Puzzle
+
+
+def _square_piece(index, x, y, size, clockwise=True):
+    corners = [(x, y), (x + size, y), (x + size, y + size), (x, y + size)]
+    if not clockwise:
+        corners = corners[::-1]
+    edges = []
+    for a, b in zip(corners, corners[1:] + corners[:1]):
+        n = size + 1
+        edges.append({"points": list(zip(np.linspace(a[0], b[0], n).astype(int).tolist(),
+                                         np.linspace(a[1], b[1], n).astype(int).tolist())), "type": "inner"})
+    contour = np.array([p for e in edges for p in e["points"][:-1]], np.int32).reshape(-1, 1, 2)
+    piece = Puzzle.from_geometry(contour, index, float(size * size), (x, y, size, size),
+                                 (x + size // 2, y + size // 2))
+    piece.edges = edges
+    return piece
+
+
+class TestEdgeAppearance(unittest.TestCase):
+
+    def setUp(self):
+        # weisser Hintergrund, ein rotes und ein blaues Teil; die rechte Hälfte des roten ist grün
+        self.image = np.full((200, 300, 3), 255, np.uint8)
+        cv.rectangle(self.image, (20, 20), (120, 120), (0, 0, 255), -1)
+        cv.rectangle(self.image, (71, 20), (120, 120), (0, 255, 0), -1)
+        cv.rectangle(self.image, (160, 20), (260, 120), (255, 0, 0), -1)
+        self.lab = {name: cv.cvtColor(np.uint8([[bgr]]), cv.COLOR_BGR2LAB)[0, 0].astype(np.float32)
+                    for name, bgr in (("red", (0, 0, 255)), ("green", (0, 255, 0)), ("blue", (255, 0, 0)))}
+
+    def test_band_lies_inside_for_both_orientations(self):
+        app = EdgeAppearance(samples=8)
+        for clockwise in (True, False):
+            profiles = app.describe_piece(self.image, _square_piece(1, 160, 20, 100, clockwise))
+            self.assertEqual(sorted(profiles), [0, 1, 2, 3])
+            for profile in profiles.values():
+                self.assertEqual(profile.shape, (8, 3))
+                # kein Weiss vom Hintergrund im Profil
+                np.testing.assert_allclose(profile.mean(axis=0), self.lab["blue"], atol=3)
+
+    def test_profile_follows_colour_along_edge(self):
+        profiles = EdgeAppearance(samples=10).describe_piece(self.image, _square_piece(1, 20, 20, 100))
+        top = profiles[0]     # von links nach rechts: erst rot, dann grün
+        np.testing.assert_allclose(top[0], self.lab["red"], atol=3)
+        np.testing.assert_allclose(top[-1], self.lab["green"], atol=3)
+        np.testing.assert_allclose(profiles[1].mean(axis=0), self.lab["green"], atol=3)
+
+    def test_distance(self):
+        app = EdgeAppearance(samples=10)
+        red = app.describe(self.image, [_square_piece(1, 20, 20, 100)])
+        blue = app.describe(self.image, [_square_piece(2, 160, 20, 100)])
+        top = red[(1, 0)]
+        self.assertAlmostEqual(EdgeAppearance.distance(top, top[::-1].copy()), 0.0, places=4)
+        self.assertGreater(EdgeAppearance.distance(red[(1, 3)], blue[(2, 3)]), 50)
+        self.assertEqual(EdgeAppearance.distance(top, None), 0.0)
+
+    def test_edges_without_points_are_skipped(self):
+        piece = _square_piece(1, 20, 20, 100)
+        piece.edges[2] = {"points": [], "type": "inner"}
+        self.assertEqual(sorted(EdgeAppearance().describe_piece(self.image, piece)), [0, 1, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
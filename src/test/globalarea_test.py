@@ -0,0 +1,104 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import unittest
+import numpy as np
+from puzzle import Puzzle
+from GlobalArea import GlobalArea
+from Position_and_Rotation.Rotation import Rotation
+from Position_and_Rotation.Translation import Translation
+
+
+class TestGlobalArea(unittest.TestCase):
+
+    def setUp(self):
+        # Zwei Rechtecke und ein Dreieck in Bildkoordinaten
+        contours = [
+            np.array([[[10, 10]], [[110, 10]], [[110, 60]], [[10, 60]]], dtype=np.int32),
+            np.array([[[200, 100]], [[260, 100]], [[260, 180]], [[200, 180]]], dtype=np.int32),
+            np.array([[[300, 300]], [[400, 300]], [[400, 350]], [[350, 400]], [[300, 350]]], dtype=np.int32),
+        ]
+        self.pieces = [Puzzle(c, i + 1) for i, c in enumerate(contours)]
+        self.ga = GlobalArea()
+        self.ga.set_solved_puzzles(self.pieces)
+        self.ga.set_unsolved_puzzles(self.pieces)
+
+    def test_import_matches_puzzle_geometry(self):
+        for p in self.ga.solved_puzzles:
+            ref = Puzzle(np.array(p.contour), p.index)
+            self.assertAlmostEqual(p.area, ref.area, places=3)
+            self.assertEqual(p.bounding_box, ref.bounding_box)
+            self.assertEqual(p.center_point, ref.center_point)
+
+    def test_import_does_not_touch_source(self):
+        self.ga.scale_all_puzzles(0.5, 0.5)
+        self.ga.translate_unsolved_puzzles(10, 20)
+        self.assertEqual(self.pieces[0].contour[1, 0].tolist(), [110, 10])
+
+    def test_contours_are_views_into_buffer(self):
+        buf = self.ga.solved_buffer
+        for p in self.ga.solved_puzzles:
+            self.assertIs(p.contour.base, buf.points)
+            self.assertIs(p.corners.base, buf.corners)
+
+    def test_scale_and_translate(self):
+        before = [np.array(p.contour, dtype=float) for p in self.ga.unsolved_puzzles]
+        self.ga.scale_all_puzzles(0.25, 0.5)
+        self.ga.translate_unsolved_puzzles(80, 190)
+        for b, p in zip(before, self.ga.unsolved_puzzles):
+            expected = b.reshape(-1, 2) * [0.25, 0.5] + [80, 190]
+            np.testing.assert_allclose(np.asarray(p.contour).reshape(-1, 2), expected, atol=1e-3)
+
+    def test_homography_matches_scale_and_translate(self):
+        legacy = GlobalArea()
+        legacy.set_unsolved_puzzles(self.pieces)
+        legacy.scale_all_puzzles(0.23, 0.23)
+        legacy.translate_unsolved_puzzles(80, 190)
+
+        ga = GlobalArea(pixels_to_mm_ratio=(0.23, 0.23))
+        ga.set_unsolved_puzzles(self.pieces)
+        ga.apply_homography(ga.default_homography(offset=(80, 190)), solved=False)
+        for p, q in zip(ga.unsolved_puzzles, legacy.unsolved_puzzles):
+            np.testing.assert_allclose(np.asarray(p.contour).reshape(-1, 2),
+                                       np.asarray(q.contour).reshape(-1, 2), atol=1e-3)
+            np.testing.assert_allclose(p.corners, q.corners, atol=1e-3)
+
+    def test_rotate_matches_rotation_helper(self):
+        ref = GlobalArea()
+        ref.set_solved_puzzles(self.pieces)
+        rot = Rotation()
+        angles = [30.0, -90.0, 12.5]
+        for p, a in zip(ref.solved_puzzles, angles):
+            rot.rotate_puzzle_in_place(p, a)
+
+        self.ga.rotate_puzzles(angles)
+        for p, q in zip(self.ga.solved_puzzles, ref.solved_puzzles):
+            np.testing.assert_allclose(np.asarray(p.contour).reshape(-1, 2),
+                                       np.asarray(q.contour).reshape(-1, 2), atol=1e-3)
+            np.testing.assert_allclose(p.corners, q.corners, atol=1e-3)
+
+    def test_sync_after_external_transform(self):
+        # Rotation ersetzt das Kontur-Array, der Buffer muss es wieder übernehmen
+        p = self.ga.solved_puzzles[1]
+        Rotation().rotate_puzzle_in_place(p, 45.0)
+        Translation().translate_puzzle_in_place(p, (5.0, -5.0))
+        rotated = np.array(p.contour, dtype=float).reshape(-1, 2)
+
+        self.ga.translate_solved_puzzles(1.0, 2.0)
+        self.assertIs(p.contour.base, self.ga.solved_buffer.points)
+        np.testing.assert_allclose(np.asarray(p.contour).reshape(-1, 2), rotated + [1.0, 2.0], atol=1e-4)
+
+
+    def test_packed_is_synced(self):
+        p = self.ga.unsolved_puzzles[0]
+        Rotation().rotate_puzzle_in_place(p, 30.0)
+        rotated = np.array(p.contour, dtype=float).reshape(-1, 2)
+        buf = self.ga.packed(solved=False)
+        self.assertIs(buf, self.ga.unsolved_buffer)
+        np.testing.assert_allclose(buf.points[buf.offsets[0]:buf.offsets[1]], rotated, atol=1e-4)
+        self.assertIs(self.ga.packed(), self.ga.solved_buffer)
+
+
+if __name__ == "__main__":
+    unittest.main()
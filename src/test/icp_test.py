@@ -0,0 +1,53 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import unittest
+import numpy as np
+from Position_and_Rotation.ICP import ICPRefiner
+
+
+def rotate(pts, deg, center):
+    th = np.deg2rad(deg)
+    R = np.array([[np.cos(th), -np.sin(th)], [np.sin(th), np.cos(th)]])
+    return (pts - center) @ R.T + center
+
+
+class TestICPRefiner(unittest.TestCase):
+
+    def setUp(self):
+        # Kante mit Nase
+        x = np.linspace(0, 50, 200)
+        y = 8 * np.exp(-((x - 25) / 6) ** 2)
+        self.edge = np.stack([x, y], axis=1)
+        self.icp = ICPRefiner(num_points=64)
+
+    def test_fit_recovers_rigid_transform(self):
+        moved = rotate(self.edge, 4.0, np.array([25.0, 0.0])) + [1.5, -0.8]
+        fit = self.icp.fit(moved, self.edge)
+        aligned = moved @ fit["R"].T + fit["t"]
+        self.assertLess(np.abs(aligned - self.edge).max(), 1e-6)
+        self.assertLessEqual(fit["iterations"], self.icp.max_iter)
+
+    def test_edge_points_between_corners(self):
+        class Piece:
+            pass
+        p = Piece()
+        # Quadrat 0..10, gegen den Uhrzeigersinn, Ecken [TL, TR, BR, BL] (Y nach oben)
+        side = np.linspace(0, 10, 11)[:-1]
+        p.contour = np.concatenate([
+            np.stack([side, np.zeros_like(side)], 1),
+            np.stack([np.full_like(side, 10), side], 1),
+            np.stack([10 - side, np.full_like(side, 10)], 1),
+            np.stack([np.zeros_like(side), 10 - side], 1),
+        ]).reshape(-1, 1, 2)
+        p.corners = np.array([[0, 10], [10, 10], [10, 0], [0, 0]], dtype=np.float32)
+
+        top = self.icp.edge_points(p, 0)
+        self.assertTrue(np.allclose(top[:, 1], 10))
+        self.assertEqual(top[0].tolist(), [0, 10])
+        self.assertEqual(top[-1].tolist(), [10, 10])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from Instrumentation import Instrumentation, trace
+from matching import Matching
+from MatchPlacer import MatchPlacer
+
+
+class MockPiece:
+    def __init__(self, index, edges):
+        self.index = index
+        self.edges = [{"points": e} for e in edges]
+
+
+class MockArea:
+    def get_matching_edge_lines(self, *args):
+        return None
+
+    def get_solved_puzzle_piece(self, index):
+        return index
+
+
+class MockMotion:
+    def compute_required_rotation_deg(self, lines):
+        return 0.0
+
+    def rotate_puzzle_in_place(self, piece, angle):
+        pass
+
+    def translate_piece_b_to_a_in_place(self, piece, lines):
+        return 0.0, 0.0
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        trace.enable(False)
+        trace.reset()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_disabled_records_nothing(self):
+        t = Instrumentation()
+        with t.span("load"):
+            pass
+        t.count("comparisons", 5)
+        self.assertEqual(t.spans, [])
+        self.assertEqual(t.counters, {})
+        # derselbe No-op-Kontextmanager für jeden Aufruf
+        self.assertIs(t.span("a"), t.span("b"))
+
+    def test_spans_and_counters(self):
+        t = Instrumentation(enabled=True)
+        with t.span("matching", pieces=3):
+            with t.span("classification"):
+                pass
+            t.count("comparisons", 4)
+            t.count("comparisons")
+        # innere Spanne endet zuerst
+        self.assertEqual([s["name"] for s in t.spans], ["classification", "matching"])
+        outer, inner = t.spans[1], t.spans[0]
+        self.assertLessEqual(outer["start_ns"], inner["start_ns"])
+        self.assertGreaterEqual(outer["start_ns"] + outer["dur_ns"], inner["start_ns"] + inner["dur_ns"])
+        self.assertEqual(t.counters, {"comparisons": 5})
+        self.assertEqual(set(t.totals()), {"matching", "classification"})
+
+    def test_exports(self):
+        t = Instrumentation(enabled=True)
+        with t.span("load", image="a.jpg"):
+            t.count("cache_hits")
+        lines = [json.loads(l) for l in open(t.write_jsonl(os.path.join(self.tmp, "trace.jsonl")))]
+        self.assertEqual(lines[0]["type"], "span")
+        self.assertEqual(lines[0]["args"], {"image": "a.jpg"})
+        self.assertEqual(lines[-1], {"type": "counter", "name": "cache_hits", "value": 1})
+
+        with open(t.write_chrome_trace(os.path.join(self.tmp, "trace.json"))) as f:
+            events = json.load(f)["traceEvents"]
+        self.assertEqual({e["ph"] for e in events}, {"X", "C"})
+        span = next(e for e in events if e["ph"] == "X")
+        self.assertEqual(span["name"], "load")
+        self.assertGreaterEqual(span["dur"], 0)
+
+    def test_matching_counts_comparisons(self):
+        edge_tab = np.array([[0, 0], [0.5, 0.2], [1, 0]])
+        edge_hole = np.array([[0, 0], [0.5, -0.2], [1, 0]])
+        pieces = [MockPiece(0, [edge_tab, edge_hole]), MockPiece(1, [edge_hole, edge_tab]),
+                  MockPiece(2, [edge_tab, edge_tab])]
+        trace.enable()
+        matches = Matching(pieces).find_matches(threshold=0.5)
+        # 3 Paare x 2 x 2 Kanten
+        self.assertEqual(trace.counters["comparisons"], 12)
+        self.assertEqual(trace.counters["pairs_rejected"], 12 - len(matches))
+        self.assertIn("matching", trace.totals())
+
+    def test_pieces_placed_counts_each_piece_once(self):
+        # Teil 3 wird von zwei Matches bewegt
+        matches = [{"piece_a": a, "edge_a": 0, "piece_b": b, "edge_b": 1} for a, b in ((1, 2), (2, 3), (1, 3))]
+        trace.enable()
+        placer = MatchPlacer(MockArea(), MockMotion(), MockMotion())
+        placer.apply_matches(matches)
+        self.assertEqual(len(placer.placements), 3)
+        self.assertEqual(trace.counters["pieces_placed"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
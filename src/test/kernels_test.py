@@ -0,0 +1,133 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import unittest
+import numpy as np
+import kernels
+from kernels import BACKENDS, NUMPY
+
+
+# Referenz: die Implementierungen, die vor den Kernels in EdgeComparator / Puzzle standen
+def _resample_reference(edge, num_points):
+    from scipy.interpolate import interp1d
+
+    dists = np.concatenate([[0], np.cumsum(np.linalg.norm(np.diff(edge, axis=0), axis=1))])
+    new_dists = np.linspace(0, dists[-1], num_points)
+    return np.stack([interp1d(dists, edge[:, 0])(new_dists), interp1d(dists, edge[:, 1])(new_dists)], axis=1)
+
+
+def _rmse_reference(A, B):
+    B_inv = B.copy()
+    B_inv[:, 1] *= -1
+    fwd = np.sqrt(np.mean(np.sum((A - B_inv) ** 2, axis=1)))
+    B_inv_rev = B_inv[::-1].copy()
+    B_inv_rev[:, 0] = 1.0 - B_inv_rev[:, 0]
+    return fwd, np.sqrt(np.mean(np.sum((A - B_inv_rev) ** 2, axis=1)))
+
+
+def _assign_reference(points, corners):
+    used, assigned = set(), []
+    for c in corners:
+        order = np.argsort(np.linalg.norm(points - c, axis=1), kind="stable")
+        idx = next((int(i) for i in order if int(i) not in used), int(order[0]))
+        used.add(idx)
+        assigned.append(idx)
+    return assigned
+
+
+def _cases(seed=0):
+    rng = np.random.default_rng(seed)
+    for n in (2, 3, 17, 250):
+        t = np.linspace(0, 1, n)
+        yield np.stack([rng.uniform(50, 400) * t, rng.normal(0, 20, n)], axis=1) + rng.uniform(0, 500, 2)
+    # Kante mit doppelten Punkten (Länge 0 zwischen zwei Punkten)
+    yield np.array([[0, 0], [5, 2], [5, 2], [10, 0]], np.float64)
+
+
+class TestNumpyKernels(unittest.TestCase):
+
+    def test_resample_matches_interp1d(self):
+        for edge in _cases():
+            np.testing.assert_allclose(NUMPY.resample(edge, 100), _resample_reference(edge, 100), atol=1e-9)
+
+    def test_zero_length_edge_is_returned_unchanged(self):
+        edge = np.zeros((5, 2))
+        self.assertIs(NUMPY.resample(edge, 100), edge)
+
+    def test_normalize(self):
+        for edge in _cases():
+            out = NUMPY.normalize(edge)
+            np.testing.assert_allclose(out[0], [0, 0], atol=1e-12)
+            np.testing.assert_allclose(out[-1], [1, 0], atol=1e-9)
+
+    def test_rmse_matches_reference(self):
+        rng = np.random.default_rng(1)
+        A, B = rng.normal(size=(100, 2)), rng.normal(size=(100, 2))
+        np.testing.assert_allclose(NUMPY.rmse_bidirectional(A, B), _rmse_reference(A, B), rtol=1e-12)
+
+    def test_assign_corners_takes_free_points_lowest_index_first(self):
+        points = np.array([[0, 0], [1, 0], [1, 0], [5, 5]], np.float64)
+        corners = np.array([[1, 0], [1, 0], [1, 0], [1, 0], [9, 9]], np.float64)
+        # vier gleiche Ecken: doppelte Punkte zuerst, dann der nächste freie, am Ende der nächste überhaupt
+        self.assertEqual(NUMPY.assign_corners(points, corners), [1, 2, 0, 3, 3])
+
+        angle = np.linspace(0, 2 * np.pi, 400, endpoint=False)
+        contour = np.round(np.stack([100 + 80 * np.cos(angle), 100 + 80 * np.sin(angle)], axis=1))
+        corners = np.array([[40.0, 40.0], [160.0, 40.0], [160.0, 160.0], [40.0, 160.0]])
+        self.assertEqual(NUMPY.assign_corners(contour, corners), _assign_reference(contour, corners))
+
+
+class TestBackendParity(unittest.TestCase):
+
+    def test_all_backends_agree_with_numpy(self):
+        rng = np.random.default_rng(2)
+        angle = np.linspace(0, 2 * np.pi, 700, endpoint=False)
+        contour = np.round(np.stack([300 + 200 * np.cos(angle), 250 + 120 * np.sin(angle)], axis=1))
+        corners = rng.uniform(100, 500, (4, 2))
+        for name, impl in BACKENDS.items():
+            with self.subTest(backend=name):
+                for edge in _cases(3):
+                    np.testing.assert_allclose(impl.resample(edge, 64), NUMPY.resample(edge, 64), atol=1e-9)
+                    np.testing.assert_allclose(impl.normalize(edge), NUMPY.normalize(edge), atol=1e-9)
+                A, B = rng.normal(size=(100, 2)), rng.normal(size=(100, 2))
+                np.testing.assert_allclose(impl.rmse_bidirectional(A, B), NUMPY.rmse_bidirectional(A, B),
+                                           rtol=1e-9)
+                self.assertEqual(impl.assign_corners(contour, corners), NUMPY.assign_corners(contour, corners))
+
+    @unittest.skipUnless(kernels.numba is not None, "numba nicht installiert")
+    def test_numba_is_default_when_installed(self):
+        if not os.environ.get("PREN_KERNELS"):
+            self.assertEqual(kernels.backend(), "numba")
+
+    def test_use_switches_and_rejects_unknown_backend(self):
+        current = kernels.backend()
+        try:
+            self.assertIs(kernels.use("numpy"), NUMPY)
+            self.assertEqual(kernels.backend(), "numpy")
+            with self.assertRaises(ValueError):
+                kernels.use("cuda")
+        finally:
+            kernels.use(current)
+
+    def test_unavailable_backend_from_environment_falls_back(self):
+        import subprocess
+
+        code = "import kernels; print(kernels.backend())"
+        env = dict(os.environ, PREN_KERNELS="cuda")
+        out = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(kernels.__file__), env=env,
+                             capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip(), "numba" if "numba" in BACKENDS else "numpy")
+        self.assertIn("PREN_KERNELS", out.stderr)
+        self.assertIn("'cuda'", out.stderr)
+
+    def test_benchmark_reports_every_kernel(self):
+        results = kernels.benchmark(number=5)
+        self.assertEqual(set(results), set(BACKENDS))
+        for timings in results.values():
+            self.assertEqual(set(timings), {"resample", "normalize", "rmse_bidirectional", "assign_corners"})
+            self.assertTrue(all(v > 0 for v in timings.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
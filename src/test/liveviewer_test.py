@@ -0,0 +1,51 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import unittest
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from puzzle import Puzzle
+from GlobalArea import GlobalArea
+from LiveViewer import LiveViewer
+from Position_and_Rotation.Translation import Translation
+
+
+def _square(x, y, s=40):
+    return np.array([[[x, y]], [[x + s, y]], [[x + s, y + s]], [[x, y + s]]], dtype=np.int32)
+
+
+class TestLiveViewer(unittest.TestCase):
+
+    def setUp(self):
+        # Acht Quadrate, weit auseinander
+        pieces = [Puzzle(_square(100 + 200 * (i % 4), 100 + 300 * (i // 4)), i + 1) for i in range(8)]
+        self.ga = GlobalArea()
+        self.ga.set_solved_puzzles(pieces)
+        self.ga.apply_homography(self.ga.default_homography())
+        fig = Figure(figsize=(6, 5), dpi=80)
+        FigureCanvasAgg(fig)
+        self.viewer = LiveViewer(self.ga, fig=fig)
+
+    def _pixels(self):
+        return np.asarray(self.viewer.canvas.buffer_rgba()).copy()
+
+    def test_update_redraws_only_moved_piece(self):
+        p = self.ga.solved_puzzles[0]
+        Translation().translate_puzzle_in_place(p, (5.0, 3.0))
+        self.viewer.on_piece_moved(p)
+        self.assertEqual(self.viewer.last_redrawn, 1)
+
+    def test_incremental_equals_full_redraw(self):
+        p = self.ga.solved_puzzles[2]
+        Translation().translate_puzzle_in_place(p, (-12.0, 7.0))
+        self.viewer.on_piece_moved(p)
+        incremental = self._pixels()
+
+        self.viewer.canvas.draw()
+        np.testing.assert_array_equal(incremental, self._pixels())
+
+
+if __name__ == "__main__":
+    unittest.main()
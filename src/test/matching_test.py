@@ -52,5 +52,27 @@ class TestPuzzleMatcher(unittest.TestCase):
         for match in matches:
             self.assertNotEqual(match["piece_a"], match["piece_b"])
 
+    def test_color_prefilter_drops_pairs_before_shape_comparison(self):
+        grey, red = np.full((5, 3), 128.0), np.tile([[128.0, 200.0, 170.0]], (5, 1))
+        appearance = {(0, 0): grey, (0, 1): grey, (1, 0): red, (1, 1): grey, (2, 0): grey, (2, 1): grey}
+        plain = Matching([self.piece1, self.piece2, self.piece3]).find_matches(threshold=0.5)
+        matcher = Matching([self.piece1, self.piece2, self.piece3], appearance=appearance, color_threshold=10.0)
+        matches = matcher.find_matches(threshold=0.5)
+
+        # das rote Hole von Teil 1 passt farblich zu keinem Tab mehr
+        pairs = {(m["piece_a"], m["piece_b"]) for m in matches}
+        self.assertIn((0, 1), {(m["piece_a"], m["piece_b"]) for m in plain})
+        self.assertNotIn((0, 1), pairs)
+        self.assertNotIn((1, 2), pairs)
+        self.assertEqual(matcher.color_rejected, 2)
+        self.assertEqual(len(matches), len(plain) - 2)
+
+    def test_artifact_covers_matches(self):
+        matches = self.matcher.find_matches(threshold=0.5)
+        artifact = self.matcher.artifact
+        self.assertEqual(len(artifact.descriptors), 6)
+        for m in matches:
+            self.assertIn((m["piece_a"], m["edge_a"], m["piece_b"], m["edge_b"]), artifact.directions)
+
 if __name__ == "__main__":
     unittest.main()
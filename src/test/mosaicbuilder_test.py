@@ -0,0 +1,62 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from Combine_Images.MosaicBuilder import MosaicBuilder, grid_homographies, mosaic_bounds, build_mosaic
+
+
+class TestMosaicBuilder(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.frames = [rng.integers(0, 256, (30, 40, 3), dtype=np.uint8) for _ in range(6)]
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_grid_matches_stacking(self):
+        # Ohne Überlappung muss das Raster genau hstack/vstack entsprechen, auch über Kachelgrenzen
+        Hs = grid_homographies((40, 30), rows=2, cols=3)
+        size, offset = mosaic_bounds([(40, 30)] * 6, Hs)
+        self.assertEqual(size, (120, 60))
+
+        builder = MosaicBuilder(size, os.path.join(self.tmp, "m.npy"), tile=16)
+        for f, H in zip(self.frames, Hs):
+            builder.add(f, offset @ H)
+        out = builder.finalize()
+
+        expected = np.vstack([np.hstack(self.frames[:3]), np.hstack(self.frames[3:])])
+        np.testing.assert_array_equal(np.asarray(out), expected)
+
+    def test_overlap_is_blended(self):
+        a = np.full((20, 20, 3), 100, np.uint8)
+        b = np.full((20, 20, 3), 200, np.uint8)
+        Hs = grid_homographies((20, 20), rows=1, cols=2, overlap=(10, 0))
+        builder = MosaicBuilder((30, 20), os.path.join(self.tmp, "o.npy"), tile=8, feather=False)
+        builder.add(a, Hs[0])
+        builder.add(b, Hs[1])
+        out = np.asarray(builder.finalize())
+        self.assertEqual(out[10, 5, 0], 100)
+        self.assertEqual(out[10, 15, 0], 150)
+        self.assertEqual(out[10, 25, 0], 200)
+
+    def test_build_mosaic_from_files(self):
+        import cv2
+        paths = []
+        for i, f in enumerate(self.frames[:2]):
+            p = os.path.join(self.tmp, f"f{i}.png")
+            cv2.imwrite(p, f)
+            paths.append(p)
+        builder = build_mosaic(paths, grid_homographies((40, 30), rows=1, cols=2),
+                               os.path.join(self.tmp, "b.npy"))
+        out = np.load(builder.out_path, mmap_mode="r")
+        np.testing.assert_array_equal(out, np.hstack(self.frames[:2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import itertools
+import logging
+import unittest
+import numpy as np
+from puzzle import Puzzle
+from GlobalArea import GlobalArea
+from MovePlanner import MovePlanner, Pose
+
+
+def _poses(rng, n):
+    starts = {i: Pose(*rng.uniform(0, 300, 2), rng.uniform(-180, 180)) for i in range(1, n + 1)}
+    targets = {i: Pose(*rng.uniform(0, 300, 2), rng.uniform(-180, 180)) for i in range(1, n + 1)}
+    return starts, targets
+
+
+class TestMovePlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.planner = MovePlanner(logger=logging.getLogger("test"))
+
+    def test_two_opt_never_worsens_nearest_neighbour(self):
+        for n in (3, 10, 30):
+            for _ in range(10):
+                starts, targets = _poses(self.rng, n)
+                ids = sorted(targets)
+                C, _, S = self.planner._leg_costs(ids, starts, targets)
+                T = np.array([[targets[i].x, targets[i].y] for i in ids])
+                nn = self.planner._nearest_neighbour(S, T)
+                improved = self.planner._two_opt(C, nn)
+                self.assertEqual(sorted(improved), list(range(n)))
+                self.assertLessEqual(self.planner._tour_cost(C, improved), self.planner._tour_cost(C, nn) + 1e-9)
+
+    def test_small_plans_equal_brute_force(self):
+        for n in range(1, 7):
+            for _ in range(5):
+                starts, targets = _poses(self.rng, n)
+                ids = sorted(targets)
+                C, fixed, _ = self.planner._leg_costs(ids, starts, targets)
+                best = min(self.planner._tour_cost(C, np.array(p)) for p in itertools.permutations(range(n)))
+                result = self.planner.plan(starts, targets)
+                self.assertAlmostEqual(result["cost"], best + fixed, places=6)
+                self.assertEqual(sorted(result["order"]), ids)
+
+    def test_savings_against_current_order(self):
+        for n in (4, 12, 40):
+            for _ in range(5):
+                starts, targets = _poses(self.rng, n)
+                current = list(self.rng.permutation(sorted(targets)))
+                result = self.planner.plan(starts, targets, current_order=current)
+                self.assertEqual(result["baseline_order"], current)
+                self.assertGreaterEqual(result["savings"], -1e-9)
+                self.assertAlmostEqual(result["savings"], result["baseline_cost"] - result["cost"])
+
+    def test_poses_from_area(self):
+        # Teil 1 liegt bei (30, 20), Teil 2 bei (120, 70) (Bildkoordinaten, Y wird beim Import gespiegelt)
+        ga = GlobalArea(img_height=100)
+        pieces = [Puzzle(np.array([[[20, 70]], [[40, 70]], [[40, 90]], [[20, 90]]], np.int32), 1),
+                  Puzzle(np.array([[[110, 20]], [[130, 20]], [[130, 40]], [[110, 40]]], np.int32), 2)]
+        ga.set_unsolved_puzzles(pieces)
+        ga.set_solved_puzzles(pieces)
+        ga.translate_solved_puzzles(100, 0)
+        placements = [{"piece": 1, "angle": 90.0, "dx": 0.0, "dy": 0.0},
+                      {"piece": 1, "angle": -30.0, "dx": 1.0, "dy": 0.0}]
+
+        starts, targets = MovePlanner.poses_from_area(ga, placements)
+        self.assertEqual(set(starts), {1, 2})
+        self.assertEqual(set(targets), {1})         # Teil 2 wird nicht bewegt
+        self.assertAlmostEqual(starts[1].x, 30.0, places=3)
+        self.assertAlmostEqual(starts[1].y, 20.0, places=3)
+        self.assertAlmostEqual(starts[2].y, 70.0, places=3)
+        self.assertAlmostEqual(targets[1].x, 130.0, places=3)
+        self.assertAlmostEqual(targets[1].y, 20.0, places=3)
+        self.assertAlmostEqual(targets[1].angle, 60.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import dataclasses
+import shutil
+import tempfile
+import unittest
+import cv2 as cv
+import numpy as np
+import Pipeline as pipeline_module
+from Pipeline import Pipeline
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        # vier dunkle Teile auf hellem Grund
+        img = np.full((400, 400, 3), 230, np.uint8)
+        for x, y in [(40, 40), (220, 40), (40, 220), (220, 220)]:
+            cv.rectangle(img, (x, y), (x + 120, y + 120), (30, 30, 30), -1)
+        self.path = os.path.join(self.tmp, "pieces.png")
+        cv.imwrite(self.path, img)
+        self.cache = os.path.join(self.tmp, "cache")
+
+        # Aufrufe der Stufenfunktionen zählen
+        self.calls = {}
+        self.saved = {}
+        for name in ("_load", "_detect", "_segment", "_appearance", "_match"):
+            func = getattr(pipeline_module, name)
+            self.saved[name] = func
+            setattr(pipeline_module, name, self._counting(name, func))
+        self.stages = Pipeline.STAGES
+        Pipeline.STAGES = tuple(dataclasses.replace(s, func=getattr(pipeline_module, "_" + s.name))
+                                for s in self.stages)
+
+    def tearDown(self):
+        Pipeline.STAGES = self.stages
+        for name, func in self.saved.items():
+            setattr(pipeline_module, name, func)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _counting(self, name, func):
+        def wrapped(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return func(*args, **kwargs)
+        return wrapped
+
+    def test_first_run_computes_and_caches(self):
+        p = Pipeline(self.path, cache_dir=self.cache)
+        p.run(until="match")
+        self.assertEqual(len(p.get("segment")), 4)
+        self.assertEqual(p.status, {"load": "run", "detect": "run", "segment": "run", "match": "run"})
+        self.assertNotIn("_appearance", self.calls)
+        self.assertTrue(os.path.isdir(os.path.join(self.cache, "segment")))
+        self.assertFalse(os.path.isdir(os.path.join(self.cache, "load")))
+
+    def test_threshold_change_skips_detection_and_segmentation(self):
+        Pipeline(self.path, cache_dir=self.cache).run(until="match")
+        self.calls.clear()
+
+        p = Pipeline(self.path, cache_dir=self.cache, threshold=0.5)
+        p.run(until="match")
+        self.assertEqual(p.status["match"], "run")
+        self.assertEqual(p.status["segment"], "hit")
+        self.assertNotIn("detect", p.status)
+        self.assertEqual(self.calls, {"_match": 1})
+
+    def test_color_threshold_reuses_cached_appearance(self):
+        Pipeline(self.path, cache_dir=self.cache).run(until="match")
+        self.calls.clear()
+
+        p = Pipeline(self.path, cache_dir=self.cache, color_threshold=20.0)
+        p.run(until="match")
+        self.assertEqual(p.status["appearance"], "run")
+        self.assertEqual(self.calls, {"_load": 1, "_appearance": 1, "_match": 1})
+        self.assertEqual(len(p.get("appearance")), 16)
+        self.calls.clear()
+
+        q = p.with_params(color_threshold=30.0)
+        q.run(until="match")
+        self.assertEqual(q.status["appearance"], "hit")
+        self.assertEqual(self.calls, {"_match": 1})
+
+    def test_segment_parameter_invalidates_downstream_only(self):
+        p = Pipeline(self.path, cache_dir=self.cache)
+        p.run(until="match")
+        q = p.with_params(epsilon_factor=0.001)
+        self.assertEqual(q.key("detect"), p.key("detect"))
+        self.assertNotEqual(q.key("segment"), p.key("segment"))
+        self.assertNotEqual(q.key("match"), p.key("match"))
+
+    def test_image_bytes_change_invalidates_all(self):
+        p = Pipeline(self.path, cache_dir=self.cache)
+        key = p.key("detect")
+        img = cv.imread(self.path)
+        img[0, 0] = 0
+        cv.imwrite(self.path, img)
+        self.assertNotEqual(Pipeline(self.path, cache_dir=self.cache).key("detect"), key)
+
+
+if __name__ == '__main__':
+    unittest.main()
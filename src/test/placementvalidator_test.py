@@ -0,0 +1,103 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import unittest
+import cv2 as cv
+import numpy as np
+from GlobalArea import GlobalArea, Rect
+from PlacementValidator import PlacementValidator, UniformGrid
+
+
+class MockPiece:
+    def __init__(self, index, x, y, w=20.0, h=10.0):
+        self.index = index
+        self.contour = np.array([[x, y], [x + w, y], [x + w, y + h], [x, y + h]],
+                                dtype=np.float32).reshape(-1, 1, 2)
+
+
+class TestUniformGrid(unittest.TestCase):
+
+    def test_pairs_match_brute_force(self):
+        rng = np.random.default_rng(0)
+        grid = UniformGrid(cell_size=15.0)
+        boxes = {}
+        for k in range(60):
+            x, y = rng.uniform(0, 200, 2)
+            w, h = rng.uniform(2, 30, 2)
+            boxes[k] = (x, y, x + w, y + h)
+            grid.insert(k, boxes[k])
+
+        brute = {(a, b) for a in boxes for b in boxes
+                 if a < b and UniformGrid.boxes_intersect(boxes[a], boxes[b])}
+        self.assertEqual(grid.pairs(), brute)
+
+    def test_update_moves_key(self):
+        grid = UniformGrid(cell_size=10.0)
+        grid.insert(1, (0, 0, 5, 5))
+        grid.insert(2, (3, 3, 8, 8))
+        self.assertEqual(grid.candidates(1), {2})
+        grid.update(2, (100, 100, 105, 105))
+        self.assertEqual(grid.candidates(1), set())
+
+
+class TestPlacementValidator(unittest.TestCase):
+
+    def setUp(self):
+        self.ga = GlobalArea(area_solved=Rect(0, 0, 100, 100))
+        self.ga.solved_puzzles = [
+            MockPiece(1, 10, 10),
+            MockPiece(2, 20, 15),   # überlappt Teil 1 mit 10x5
+            MockPiece(3, 60, 60),
+        ]
+        self.validator = PlacementValidator(self.ga, min_overlap_area=0.5)
+        self.validator.rebuild()
+
+    def test_overlap_area(self):
+        overlaps = self.validator.overlaps()
+        self.assertEqual([(o["piece_a"], o["piece_b"]) for o in overlaps], [(1, 2)])
+        self.assertAlmostEqual(overlaps[0]["area"], 50.0, places=3)
+
+    def test_adjacent_pieces_do_not_overlap(self):
+        a, b = MockPiece(4, 0, 0), MockPiece(5, 20, 0)    # gemeinsame Kante x = 20
+        self.assertEqual(self.validator.overlap_area(a, b), 0.0)
+        self.assertEqual(self.validator.overlap_area(b, a), 0.0)
+
+    def test_interlocking_pieces_do_not_overlap(self):
+        # Teil a mit Nase nach rechts, Teil b mit passender Aussparung
+        a, b = MockPiece(4, 0, 0), MockPiece(5, 0, 0)
+        a.contour = np.array([[0, 0], [20, 0], [20, 3], [24, 2], [26, 5], [24, 8], [20, 7], [20, 10], [0, 10]],
+                             np.float32).reshape(-1, 1, 2)
+        b.contour = np.array([[20, 0], [40, 0], [40, 10], [20, 10], [20, 7], [24, 8], [26, 5], [24, 2], [20, 3]],
+                             np.float32).reshape(-1, 1, 2)
+        self.assertEqual(self.validator.overlap_area(a, b), 0.0)
+        self.assertEqual(self.validator.overlap_area(b, a), 0.0)
+
+        # um 1 mm ineinander geschoben: Vergleich mit feinem Raster (50 px/mm)
+        b.contour = b.contour - np.float32([1, 0])
+        masks = []
+        for p in (a, b):
+            m = np.zeros((600, 2100), np.uint8)
+            cv.fillPoly(m, [np.round(p.contour * 50).astype(np.int32)], 1)
+            masks.append(m)
+        raster = np.count_nonzero(masks[0] & masks[1]) / 2500
+        self.assertAlmostEqual(self.validator.overlap_area(a, b), raster, delta=0.5)
+
+    def test_incremental_update(self):
+        p3 = self.ga.solved_puzzles[2]
+        p3.contour = MockPiece(3, 12, 12).contour
+        self.validator.on_piece_moved(p3)
+        pairs = {(o["piece_a"], o["piece_b"]) for o in self.validator.overlaps()}
+        self.assertEqual(pairs, {(1, 2), (1, 3), (2, 3)})
+
+    def test_outside_solved_area(self):
+        p2 = self.ga.solved_puzzles[1]
+        p2.contour = MockPiece(2, 90, 50).contour
+        self.validator.on_piece_moved(p2)
+        outside = self.validator.outside(self.ga.area_solved)
+        self.assertEqual([o["piece"] for o in outside], [2])
+        self.assertAlmostEqual(outside[0]["protrusion"], 10.0, places=3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pstats
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from Profiling import StageProfiler
+from matching import Matching
+
+
+class MockPiece:
+    def __init__(self, index, edges):
+        self.index = index
+        self.edges = [{"points": e} for e in edges]
+
+
+class TestStageProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        edge_tab = np.array([[0, 0], [0.5, 0.2], [1, 0]])
+        edge_hole = np.array([[0, 0], [0.5, -0.2], [1, 0]])
+        self.pieces = [MockPiece(0, [edge_tab, edge_hole]), MockPiece(1, [edge_hole, edge_tab])]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_hooks_are_removed_again(self):
+        original = Matching.find_matches
+        with StageProfiler(self.tmp, stages=["find_matches"]):
+            self.assertIsNot(Matching.find_matches, original)
+        self.assertIs(Matching.find_matches, original)
+
+    def test_writes_pstats_and_allocations(self):
+        with StageProfiler(self.tmp, stages=["find_matches", "apply_matches"], top=5) as prof:
+            expected = Matching(self.pieces).find_matches(threshold=0.5)
+            Matching(self.pieces).find_matches(threshold=0.5)
+
+        self.assertEqual(prof.stats["find_matches"].calls, 2)
+        # nicht aufgerufene Stufen erzeugen keine Dateien
+        self.assertEqual(sorted(os.listdir(self.tmp)), ["find_matches.alloc.txt", "find_matches.pstats"])
+
+        stats = pstats.Stats(os.path.join(self.tmp, "find_matches.pstats"))
+        self.assertTrue(any(fn[2] == "compare_descriptors" for fn in stats.stats))
+        with open(os.path.join(self.tmp, "find_matches.alloc.txt"), encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines[0].startswith("find_matches: 2 Aufrufe"))
+        self.assertLessEqual(len(lines) - 1, 5)
+        self.assertEqual(Matching(self.pieces).find_matches(threshold=0.5), expected)
+
+    def test_cprofile_only(self):
+        with StageProfiler(self.tmp, stages=["find_matches"], tracemalloc=False) as prof:
+            Matching(self.pieces).find_matches(threshold=0.5)
+        self.assertEqual(os.listdir(self.tmp), ["find_matches.pstats"])
+        self.assertTrue(prof.top_functions("find_matches"))
+
+    def test_unknown_stage(self):
+        with self.assertRaises(ValueError):
+            StageProfiler(self.tmp, stages=["nope"])
+
+
+if __name__ == '__main__':
+    unittest.main()
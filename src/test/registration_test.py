@@ -0,0 +1,91 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import shutil
+import tempfile
+import unittest
+import cv2
+import numpy as np
+from Combine_Images.Registration import FrameRegistration, stitch_registered
+
+
+def _scene(h=700, w=1100, seed=0):
+    rng = np.random.default_rng(seed)
+    img = np.full((h, w, 3), 230, np.uint8)
+    for _ in range(400):
+        c = tuple(int(v) for v in rng.integers(0, 255, 3))
+        x, y = int(rng.integers(0, w)), int(rng.integers(0, h))
+        if rng.random() < 0.5:
+            cv2.circle(img, (x, y), int(rng.integers(4, 25)), c, -1)
+        else:
+            cv2.rectangle(img, (x, y), (x + int(rng.integers(5, 40)), y + int(rng.integers(5, 40))), c, -1)
+    return img
+
+
+class TestFrameRegistration(unittest.TestCase):
+
+    def setUp(self):
+        self.scene = _scene()
+        # Drei Kameras, je 500x400, nach rechts versetzt
+        self.offsets = [(0, 0), (300, 20), (600, 40)]
+        self.frames = [self.scene[y:y + 400, x:x + 500].copy() for x, y in self.offsets]
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_recovers_translation(self):
+        reg = FrameRegistration(scale=0.5).register(self.frames)
+        for H, (x, y) in zip(reg["H"], self.offsets):
+            p = H @ [250, 200, 1]
+            np.testing.assert_allclose(p[:2] / p[2], [x + 250, y + 200], atol=2.0)
+
+    def test_cache_is_reused_while_consistent(self):
+        reg = FrameRegistration(cache_dir=self.tmp, scale=0.5)
+        key = FrameRegistration.rig_key(rig="test")
+        first = reg.load_or_register(key, self.frames)
+        second = reg.load_or_register(key, self.frames)
+        self.assertEqual(reg.registrations, 1)
+        np.testing.assert_allclose(first, second)
+
+    def test_moved_camera_triggers_reregistration(self):
+        reg = FrameRegistration(cache_dir=self.tmp, scale=0.5)
+        key = FrameRegistration.rig_key(rig="test")
+        reg.load_or_register(key, self.frames)
+
+        moved = list(self.frames)
+        moved[2] = self.scene[40 + 30:40 + 430, 600 - 40:600 + 460].copy()
+        Hs = reg.load_or_register(key, moved)
+        self.assertEqual(reg.registrations, 2)
+        p = Hs[2] @ [250, 200, 1]
+        np.testing.assert_allclose(p[:2] / p[2], [560 + 250, 70 + 200], atol=2.0)
+
+    def test_unregistrable_frames_fall_back_to_stitcher(self):
+        # Stiching_*: zu wenig ORB-Paare für FrameRegistration, cv2.Stitcher (SCANS) schafft es
+        images = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../Combine_Images/Images")
+        paths = [os.path.join(images, f"Stiching_{i}.jpg") for i in (6, 5, 4, 3, 2, 1)]
+        if not all(os.path.exists(p) for p in paths):
+            self.skipTest("Stiching-Bilder fehlen")
+        pairs = [(0, 1), (1, 2), (0, 3), (3, 4), (4, 5)]
+        key = FrameRegistration.rig_key(rig="stiching")
+        out = os.path.join(self.tmp, "mosaic.npy")
+        with self.assertRaises(ValueError):
+            stitch_registered(paths, out, key, cache_dir=self.tmp, pairs=pairs, fallback=False)
+
+        first = FrameRegistration(cache_dir=self.tmp)
+        builder = stitch_registered(paths, out, key, pairs=pairs, registration=first)
+        self.assertEqual(first.registrations, 1)
+        mosaic = np.load(out, mmap_mode="r")
+        self.assertEqual(mosaic.shape, (builder.height, builder.width, 3))
+        self.assertGreater(builder.height, cv2.imread(paths[0]).shape[0])
+        self.assertGreater(float(np.asarray(mosaic).mean()), 10.0)
+
+        # zweiter Lauf: Stitcher-Transformationen aus dem Cache, gleiches Mosaik
+        second = FrameRegistration(cache_dir=self.tmp)
+        again = stitch_registered(paths, out, key, pairs=pairs, registration=second)
+        self.assertEqual(second.registrations, 0)
+        self.assertEqual((again.width, again.height), (builder.width, builder.height))
+
+if __name__ == "__main__":
+    unittest.main()
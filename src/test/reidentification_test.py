@@ -0,0 +1,179 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import logging
+import shutil
+import tempfile
+import time
+import unittest
+import cv2 as cv
+import numpy as np
+from Pipeline import Pipeline
+from ReIdentification import PieceIndex, edge_pattern
+from puzzle import Puzzle
+
+IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../Data/puzzle_selfmade_black.jpeg")
+PAD = 300
+
+
+def _key(m):
+    a, b = (m["piece_a"], m["edge_a"]), (m["piece_b"], m["edge_b"])
+    return (*min(a, b), *max(a, b))
+
+
+def _blob(index, radius, lobes=0):
+    # Kreis, optional mit Ausbuchtungen, als OpenCV-Kontur
+    angle = np.linspace(0, 2 * np.pi, 360, endpoint=False)
+    r = radius * (1 + 0.1 * np.sin(lobes * angle))
+    pts = np.stack([1000 + r * np.cos(angle), 1000 + r * np.sin(angle)], axis=1)
+    return Puzzle(np.round(pts).astype(np.int32).reshape(-1, 1, 2), index)
+
+
+@unittest.skipUnless(os.path.exists(IMAGE), "Beispielbild fehlt")
+class TestReIdentification(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.WARNING)
+        cls.tmp = tempfile.mkdtemp()
+        cls.pipeline = Pipeline(IMAGE)
+        cls.pieces = cls.pipeline.get("segment")
+        cls.match = cls.pipeline.get("match")
+        cls.image = cv.copyMakeBorder(cls.pipeline.get("load"), PAD, PAD, PAD, PAD, cv.BORDER_REPLICATE)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+
+    def _capture(self, angle, shift=(0, 0)):
+        """Same pieces, moved: rotate the (padded) photo and detect again -> new indices."""
+        h, w = self.image.shape[:2]
+        M = cv.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+        M[:, 2] += shift
+        path = os.path.join(self.tmp, f"capture_{angle}.png")
+        cv.imwrite(path, cv.warpAffine(self.image, M, (w, h), borderValue=(0, 0, 0)))
+        M[:, 2] += M[:, :2] @ [PAD, PAD]     # Originalkoordinaten -> neue Aufnahme
+        return Pipeline(path), M
+
+    def _index(self, placements=()):
+        return PieceIndex().add_scene(self.pieces, self.match["matches"], self.match["artifact"], placements)
+
+    def test_identifies_moved_pieces(self):
+        capture, M = self._capture(30, shift=(40, -25))
+        new = capture.get("detect")
+        result = self._index().carry_over(new)
+
+        truth = {}
+        for n in new:
+            moved = {o.index: np.linalg.norm(M @ [*o.center_point, 1] - n.center_point) for o in self.pieces}
+            old = min(moved, key=moved.get)
+            if moved[old] < 20:
+                truth[n.index] = old
+        self.assertEqual(len(truth), 4)
+        self.assertEqual(result.mapping, truth)
+        self.assertEqual(sorted(result.unknown), sorted(set(p.index for p in new) - set(truth)))
+
+        # Ecken (und damit Kanten) folgen der Bewegung
+        for new_index, old in result.mapping.items():
+            expected = np.c_[np.asarray(self.match["artifact"].corners[old], float), np.ones(4)] @ M.T
+            np.testing.assert_allclose(result.artifact.corners[new_index], expected, atol=1.5)
+
+    def test_carried_matches_equal_fresh_matching(self):
+        capture, _ = self._capture(90)
+        result = self._index().carry_over(capture.get("detect"))
+        fresh = capture.get("match")["matches"]
+        self.assertEqual(sorted(_key(m) for m in result.matches), sorted(_key(m) for m in fresh))
+        self.assertEqual(len(result.matches), len(self.match["matches"]))
+
+        segmented = {p.index: p.edges for p in capture.get("segment")}
+        for piece in result.pieces:
+            if piece.index in result.mapping:
+                for k in range(4):
+                    carried = np.mean(piece.edges[k]["points"], axis=0)
+                    self.assertLess(np.abs(carried - np.mean(segmented[piece.index][k]["points"], axis=0)).max(), 3)
+                    key = (result.mapping[piece.index], (k + 1) % 4)     # +90° bei OpenCV: oben wird links
+                    self.assertEqual(result.artifact.edge_types[(piece.index, k)],
+                                     self.match["artifact"].edge_types[key])
+
+    def test_placements_follow_new_indices(self):
+        from Calibration import CameraCalibration
+
+        H = CameraCalibration.homography_from_scale(0.23, 0.23, (80, 190), 964)
+        placements = [{"piece": 1, "angle": 0.0, "dx": 1.0, "dy": 2.0},
+                      {"piece": 3, "angle": 90.0, "dx": 0.0, "dy": 0.0}]
+        capture, _ = self._capture(-90)
+        index = PieceIndex().add_scene(self.pieces, self.match["matches"], self.match["artifact"], placements, H)
+        result = index.carry_over(capture.get("detect"))
+        inverse = {old: new for new, old in result.mapping.items()}
+        self.assertEqual([c["piece"] for c in result.placements], [inverse[1], inverse[3]])
+        # im Uhrzeigersinn gedreht: es fehlen noch 90° mehr
+        self.assertAlmostEqual(result.placements[1]["angle"] % 360, 180.0, delta=2.0)
+
+        def target(contour, corners, command):
+            # Befehl ausführen: um den Schwerpunkt drehen, dann verschieben (alles in mm)
+            pts = cv.perspectiveTransform(np.asarray(contour, np.float64).reshape(-1, 1, 2), H).reshape(-1, 2)
+            crn = cv.perspectiveTransform(np.asarray(corners, np.float64).reshape(-1, 1, 2), H).reshape(-1, 2)
+            m = cv.moments(pts.astype(np.float32))
+            center = np.array([m["m10"] / m["m00"], m["m01"] / m["m00"]])
+            a = np.radians(command["angle"])
+            rot = np.array([[np.cos(a), -np.sin(a)], [np.sin(a), np.cos(a)]])
+            return (crn - center) @ rot.T + center + (command["dx"], command["dy"])
+
+        new_pieces = {p.index: p for p in result.pieces}
+        old_pieces = {p.index: p for p in self.pieces}
+        for before, after in zip(placements, result.placements):
+            expected = target(old_pieces[before["piece"]].contour,
+                              self.match["artifact"].corners[before["piece"]], before)
+            actual = target(new_pieces[after["piece"]].contour, result.artifact.corners[after["piece"]], after)
+            np.testing.assert_allclose(actual, expected, atol=1.5)
+
+    def test_placements_need_homography(self):
+        placements = [{"piece": 1, "angle": 0.0, "dx": 1.0, "dy": 2.0}]
+        capture, _ = self._capture(-90)
+        result = self._index(placements).carry_over(capture.get("detect"))
+        self.assertEqual(len(result.mapping), 4)
+        self.assertEqual(result.placements, [])
+
+    def test_unknown_shape_is_not_identified(self):
+        index = self._index()
+        self.assertIsNone(index.lookup(_blob(99, 190)))
+        self.assertEqual(index.lookup(self.pieces[2])[0], self.pieces[2].index)
+
+    def test_index_from_saved_scene(self):
+        from SceneStore import SceneStore
+
+        path = SceneStore.save(os.path.join(self.tmp, "scene"), self.pieces, self.match["matches"],
+                               self.match["artifact"])
+        index = PieceIndex.from_scene(SceneStore.open(path))
+        capture, _ = self._capture(180)
+        result = index.carry_over(capture.get("detect"))
+        self.assertEqual(len(result.mapping), 4)
+        self.assertEqual(len(result.matches), len(self.match["matches"]))
+
+
+class TestPieceIndex(unittest.TestCase):
+
+    def test_edge_pattern_is_rotation_invariant(self):
+        self.assertEqual(edge_pattern(["tab", "flat", "hole", "tab"]), "fhtt")
+        self.assertEqual(edge_pattern(["flat", "hole", "tab", "tab"]), "fhtt")
+        self.assertIsNone(edge_pattern(["tab", None, "hole", "tab"]))
+
+    def test_lookup_only_scores_one_area_bucket(self):
+        index = PieceIndex()
+        for i in range(2000):
+            index.add(_blob(i + 1, 60 + 0.1 * i, lobes=3 + i % 5))
+        query = _blob(0, 60 + 0.1 * 1234, lobes=3 + 1234 % 5)
+
+        candidates = list(index._candidates(index.signature(query)))
+        self.assertLess(len(candidates), 40)
+        t0 = time.perf_counter()
+        hit = index.lookup(query)
+        elapsed = time.perf_counter() - t0
+        self.assertEqual(hit[0], 1235)
+        self.assertLess(elapsed, 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
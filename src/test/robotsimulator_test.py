@@ -0,0 +1,56 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import unittest
+from RobotSimulator import RobotSimulator, RobotConfig
+
+
+class TestRobotSimulator(unittest.TestCase):
+
+    def setUp(self):
+        self.config = RobotConfig(travel_speed=100.0, rotation_speed=90.0, pick_time=1.0,
+                                  place_time=1.0, capture_time=2.0, capture_every=1,
+                                  initial_capture=False, home=(0.0, 0.0))
+        self.sim = RobotSimulator(self.config)
+
+    def test_single_move_breakdown(self):
+        # Fahrt 100 mm (1 s), Pick 1 s, Transport max(0.5 s, 1 s) = 1 s, Place 1 s, Kamera 2 s
+        cmds = [{"piece": 1, "angle": 90.0, "dx": 50.0, "dy": 0.0}]
+        result = self.sim.simulate(cmds, {1: (100.0, 0.0)})
+        move = result["moves"][0]
+        self.assertAlmostEqual(move["travel"], 1.0)
+        self.assertAlmostEqual(move["transport"], 1.0)
+        self.assertAlmostEqual(move["capture"], 2.0)
+        self.assertAlmostEqual(result["total_time"], 6.0)
+        self.assertEqual(move["place_xy"], (150.0, 0.0))
+
+    def test_gripper_starts_at_last_place(self):
+        cmds = [
+            {"piece": 1, "angle": 0.0, "dx": 100.0, "dy": 0.0},
+            {"piece": 2, "angle": 0.0, "dx": 0.0, "dy": 0.0},
+        ]
+        result = self.sim.simulate(cmds, {1: (0.0, 0.0), 2: (100.0, 100.0)})
+        self.assertAlmostEqual(result["moves"][1]["travel"], 1.0)
+        self.assertAlmostEqual(result["moves"][1]["start"], result["moves"][0]["end"])
+
+    def test_repeated_moves_start_at_last_place(self):
+        # Befehle und Positionen im selben Tischsystem, kein Versatz beim ersten Zug
+        cmds = [
+            {"piece": 1, "angle": 0.0, "dx": 10.0, "dy": 0.0},
+            {"piece": 1, "angle": 0.0, "dx": 10.0, "dy": 0.0},
+        ]
+        result = self.sim.simulate(cmds, {1: (100.0, 200.0)})
+        self.assertEqual(result["moves"][0]["place_xy"], (110.0, 200.0))
+        self.assertEqual(result["moves"][1]["pick_xy"], (110.0, 200.0))
+        self.assertEqual(result["moves"][1]["place_xy"], (120.0, 200.0))
+
+    def test_capture_interval(self):
+        sim = RobotSimulator(RobotConfig(capture_every=2, initial_capture=True, capture_time=3.0))
+        cmds = [{"piece": i, "angle": 0.0, "dx": 0.0, "dy": 0.0} for i in range(4)]
+        result = sim.simulate(cmds, {i: (0.0, 0.0) for i in range(4)})
+        self.assertAlmostEqual(result["totals"]["capture"], 3 * 3.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import shutil
+import tempfile
+import unittest
+import cv2 as cv
+import numpy as np
+from puzzle import Puzzle
+from GlobalArea import GlobalArea
+from Position_and_Rotation.Translation import Translation
+from SceneRenderer import SceneRenderer, PlacementRecorder
+
+
+def _square(x, y, s=40):
+    return np.array([[[x, y]], [[x + s, y]], [[x + s, y + s]], [[x, y + s]]], dtype=np.int32)
+
+
+class TestSceneRenderer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        # Zwei Teile; img_height so gewählt, dass sie nach dem Y-Flip im Bereich liegen
+        self.ga = GlobalArea(img_height=450)
+        pieces = [Puzzle(_square(100, 100), 1), Puzzle(_square(250, 150), 2)]
+        self.ga.set_unsolved_puzzles(pieces)
+        self.ga.set_solved_puzzles(pieces)
+        self.renderer = SceneRenderer(self.ga, px_per_mm=1.0, fill_alpha=1.0, draw_corners=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_render_two_pieces(self):
+        frame = self.renderer.render()
+        w, h = self.renderer.size
+        self.assertEqual(frame.shape, (h, w, 3))
+        # Teil 1 liegt bei x 100..140, y 310..350 (mm, Y nach oben); Mitte gefüllt, Hintergrund weiss
+        inside = self.renderer.to_px([[110, 340]])[0].astype(int)
+        self.assertEqual(tuple(frame[inside[1], inside[0]]), SceneRenderer.COLORS["solved_piece"])
+        outside = self.renderer.to_px([[5, 5]])[0].astype(int)
+        self.assertEqual(tuple(frame[outside[1], outside[0]]), (255, 255, 255))
+
+    def test_recorder_writes_one_frame_per_step(self):
+        path = os.path.join(self.tmp, "placement.mp4")
+        ta = Translation()
+        try:
+            recorder = PlacementRecorder(self.renderer, path, fps=4.0, hold_frames=2)
+        except IOError:
+            self.skipTest("mp4v-Encoder nicht verfügbar")
+        with recorder:
+            recorder.capture()
+            for p in self.ga.solved_puzzles:
+                ta.translate_puzzle_in_place(p, (20.0, -30.0))
+                recorder.on_piece_moved(p)
+        self.assertEqual(recorder.frames, 6)
+
+        cap = cv.VideoCapture(path)
+        try:
+            self.assertTrue(cap.isOpened())
+            self.assertEqual(int(cap.get(cv.CAP_PROP_FRAME_COUNT)), 6)
+            self.assertEqual((int(cap.get(cv.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv.CAP_PROP_FRAME_HEIGHT))),
+                             self.renderer.size)
+            ok, frame = cap.read()
+            self.assertTrue(ok)
+            self.assertEqual(frame.shape[1::-1], self.renderer.size)
+        finally:
+            cap.release()
+
+
+if __name__ == "__main__":
+    unittest.main()
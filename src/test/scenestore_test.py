@@ -0,0 +1,88 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pickle
+import shutil
+import tempfile
+import time
+import unittest
+import numpy as np
+from puzzle import Puzzle
+from matching import Matching
+from SceneStore import SceneStore
+
+
+def make_piece(index, x, y, size=40, bump=8):
+    # Quadrat mit einer Nase oben -> Kanten tab/flat
+    pts = [(x, y), (x + size // 2 - 5, y), (x + size // 2, y - bump), (x + size // 2 + 5, y),
+           (x + size, y), (x + size, y + size), (x, y + size)]
+    contour = np.array(pts, np.int32).reshape(-1, 1, 2)
+    piece = Puzzle(contour, index)
+    piece.get_puzzle_edges()
+    return piece
+
+
+class TestSceneStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "scene")
+        self.pieces = [make_piece(i + 1, 60 * (i % 5), 60 * (i // 5) + 10) for i in range(10)]
+        self.matcher = Matching(self.pieces)
+        self.matches = self.matcher.find_matches(threshold=0.5)
+        SceneStore.save(self.path, self.pieces, self.matches, self.matcher.artifact)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_round_trip(self):
+        scene = SceneStore.open(self.path)
+        self.assertIsInstance(scene.points, np.memmap)
+        self.assertEqual(scene.points.dtype, np.int32)
+        self.assertEqual(len(scene), 10)
+        loaded = scene.pieces()
+        for a, b in zip(self.pieces, loaded):
+            self.assertEqual(a.index, b.index)
+            np.testing.assert_array_equal(a.contour, b.contour)
+            self.assertEqual(a.bounding_box, b.bounding_box)
+            self.assertEqual([e["points"] for e in a.edges], [e["points"] for e in b.edges])
+        self.assertEqual(scene.matches_list(), self.matches)
+        # gleiche Matches ohne erneute Erkennung
+        self.assertEqual(Matching(loaded).find_matches(threshold=0.5), self.matches)
+
+    def test_artifact(self):
+        art = SceneStore.open(self.path).artifact()
+        ref = self.matcher.artifact
+        self.assertEqual(art.edge_types, ref.edge_types)
+        self.assertEqual(art.directions, ref.directions)
+        for key, desc in art.descriptors.items():
+            np.testing.assert_allclose(desc, ref.descriptors[key], atol=1e-4)
+
+    def test_pickle_reopens_path(self):
+        scene = SceneStore.open(self.path)
+        data = pickle.dumps(scene)
+        self.assertLess(len(data), 1000)
+        again = pickle.loads(data)
+        np.testing.assert_array_equal(again.points, scene.points)
+
+    def test_open_large_scene_is_lazy(self):
+        pieces = [make_piece(i + 1, 50 * (i % 100), 50 * (i // 100) + 10) for i in range(2000)]
+        big = os.path.join(self.tmp, "big")
+        SceneStore.save(big, pieces)
+        t0 = time.perf_counter()
+        scene = SceneStore.open(big)
+        elapsed = time.perf_counter() - t0
+        self.assertEqual(len(scene), 2000)
+        self.assertLess(elapsed, 0.2)
+        self.assertEqual(scene.piece(1999).index, 2000)
+
+    def test_rejects_other_format(self):
+        with open(os.path.join(self.path, "header.json"), "w") as f:
+            f.write('{"format": "x", "version": 1}')
+        with self.assertRaises(ValueError):
+            SceneStore.open(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
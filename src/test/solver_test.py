@@ -0,0 +1,81 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import logging
+import unittest
+from Pipeline import Pipeline
+from Solver import Solver
+
+IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../Data/puzzle_selfmade_black.jpeg")
+
+
+@unittest.skipUnless(os.path.exists(IMAGE), "Beispielbild fehlt")
+class TestSolver(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.WARNING)
+        cls.pipeline = Pipeline(IMAGE)
+        cls.pipeline.run(until="match")
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def fresh_pieces(self):
+        # Solver verschiebt die Teile -> für jeden Lauf neu segmentieren
+        return Pipeline(IMAGE).get("segment")
+
+    def batch(self):
+        matches = sorted(self.pipeline.get("match")["matches"], key=lambda m: float(m["score"]))
+        return Solver(self.fresh_pieces(), matches).solve()
+
+    def test_anchor_is_emitted_before_matching(self):
+        solver = Solver(self.fresh_pieces(), None)
+        stream = solver.stream(threshold=0.04)
+        anchor = next(stream)
+        self.assertEqual(anchor["piece"], self.batch().placements[0]["piece"])
+        self.assertEqual(solver.match_placer.placements, [])
+        self.assertIsNone(solver.matches)
+
+        second = next(stream)
+        self.assertEqual(len(solver.match_placer.placements), 1)
+        self.assertNotEqual(second["piece"], anchor["piece"])
+
+    def test_stream_places_every_piece_once(self):
+        solver = Solver(self.fresh_pieces(), None)
+        commands = list(solver.stream(threshold=0.04))
+        pieces = [c["piece"] for c in commands]
+        self.assertEqual(len(pieces), len(set(pieces)))
+        self.assertEqual(set(pieces), {p.index for p in solver.pieces})
+        self.assertEqual(solver.placements, commands)
+        self.assertIsNotNone(solver.robot_run)
+        self.assertTrue(solver.matches)
+
+    def test_stream_starts_like_batch(self):
+        batch = self.batch().placements
+        commands = list(Solver(self.fresh_pieces(), None).stream(threshold=0.04))
+        for a, b in zip(batch[:2], commands[:2]):
+            self.assertEqual(a["piece"], b["piece"])
+            self.assertAlmostEqual(a["angle"], b["angle"], places=6)
+            self.assertAlmostEqual(a["dx"], b["dx"], places=6)
+
+    def test_stream_uses_color_filter(self):
+        appearance = self.pipeline.get("appearance")
+        solver = Solver(self.fresh_pieces(), None)
+        with self.assertRaises(ValueError):
+            next(solver.stream(threshold=0.04, color_threshold=20.0))
+
+        loose = Solver(self.fresh_pieces(), None)
+        list(loose.stream(threshold=0.04, appearance=appearance, color_threshold=1e6))
+        strict = Solver(self.fresh_pieces(), None)
+        list(strict.stream(threshold=0.04, appearance=appearance, color_threshold=0.0))
+        self.assertEqual(loose.artifact.appearance, appearance)
+        # Schwelle 0: jedes Tab/Hole-Paar wird vor dem Formvergleich verworfen
+        self.assertTrue(loose.matches)
+        self.assertLess(len(strict.matches), len(loose.matches))
+
+
+if __name__ == '__main__':
+    unittest.main()
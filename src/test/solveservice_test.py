@@ -0,0 +1,136 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+import json
+import time
+import unittest
+from SolveService import SolveService
+
+IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../Data/puzzle_selfmade_black.jpeg")
+
+
+def slow_job(data, params):
+    # Ersatz-Job für Warteschlangen-Tests (muss für den Prozess-Pool auf Modulebene liegen)
+    time.sleep(params.get("sleep", 0.3))
+    if data == b"crash":
+        os._exit(1)
+    if data == b"fail":
+        raise ValueError("kaputt")
+    return {"placements": [{"piece": 1, "angle": 0.0, "dx": 1.0, "dy": 2.0}], "size": len(data)}
+
+
+async def request(port, method, path, body=b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, payload = raw.partition(b"\r\n\r\n")
+    status = int(head.split()[1])
+    return status, [json.loads(l) for l in payload.decode().splitlines() if l.strip()]
+
+
+class TestSolveService(unittest.TestCase):
+
+    def run_with_service(self, scenario, **kw):
+        async def main():
+            service = await SolveService(port=0, **kw).start()
+            try:
+                return await scenario(service)
+            finally:
+                await service.stop()
+        return asyncio.run(main())
+
+    def test_streams_json_lines(self):
+        async def scenario(service):
+            return await request(service.port, "POST", "/solve", b"abc")
+
+        status, lines = self.run_with_service(scenario, job=slow_job, params={"sleep": 0.0})
+        self.assertEqual(status, 200)
+        self.assertEqual([l["event"] for l in lines], ["queued", "started", "placement", "done"])
+        self.assertEqual(lines[2]["dx"], 1.0)
+        self.assertEqual(lines[3]["size"], 3)
+
+    def test_backpressure_and_metrics(self):
+        async def scenario(service):
+            # 1 Worker + Warteschlange 1: der dritte gleichzeitige Auftrag wird abgelehnt
+            first = asyncio.create_task(request(service.port, "POST", "/solve", b"a"))
+            await asyncio.sleep(0.1)
+            second = asyncio.create_task(request(service.port, "POST", "/solve", b"b"))
+            await asyncio.sleep(0.1)
+            _, [busy] = await request(service.port, "GET", "/metrics")
+            third = await request(service.port, "POST", "/solve", b"c")
+            results = [await first, await second, third]
+            _, [after] = await request(service.port, "GET", "/metrics")
+            return busy, results, after
+
+        busy, results, after = self.run_with_service(scenario, job=slow_job, concurrency=1, queue_size=1)
+        self.assertEqual(busy["in_flight"], 1)
+        self.assertEqual(busy["queue_depth"], 1)
+        self.assertEqual([r[0] for r in results], [200, 200, 503])
+        self.assertEqual(after["completed"], 2)
+        self.assertEqual(after["rejected"], 1)
+        self.assertIsNotNone(after["latency_ms"]["p50"])
+
+    def test_job_error_is_reported(self):
+        async def scenario(service):
+            return await request(service.port, "POST", "/solve", b"fail")
+
+        status, lines = self.run_with_service(scenario, job=slow_job, params={"sleep": 0.0})
+        self.assertEqual(status, 200)
+        self.assertEqual(lines[-1]["event"], "error")
+        self.assertIn("kaputt", lines[-1]["error"])
+
+    def test_pool_is_rebuilt_after_worker_crash(self):
+        async def scenario(service):
+            crashed = await request(service.port, "POST", "/solve", b"crash")
+            after = await request(service.port, "POST", "/solve", b"abc")
+            _, [metrics] = await request(service.port, "GET", "/metrics")
+            return crashed, after, metrics
+
+        crashed, after, metrics = self.run_with_service(scenario, job=slow_job, concurrency=1,
+                                                        params={"sleep": 0.0})
+        self.assertEqual(crashed[1][-1]["event"], "error")
+        self.assertIn("BrokenProcessPool", crashed[1][-1]["error"])
+        self.assertEqual(after[1][-1]["event"], "done")
+        self.assertEqual((metrics["pool_restarts"], metrics["failed"], metrics["completed"]), (1, 1, 1))
+
+    def test_disconnected_client_is_dropped(self):
+        async def scenario(service):
+            first = asyncio.create_task(request(service.port, "POST", "/solve", b"a"))
+            await asyncio.sleep(0.1)
+            # zweiter Client gibt in der Warteschlange auf
+            reader, writer = await asyncio.open_connection("127.0.0.1", service.port)
+            writer.write(b"POST /solve HTTP/1.1\r\nHost: x\r\nContent-Length: 1\r\n\r\nb")
+            await writer.drain()
+            await reader.readline()
+            writer.close()
+            await first
+            third = await request(service.port, "POST", "/solve", b"c")
+            _, [metrics] = await request(service.port, "GET", "/metrics")
+            return third, metrics
+
+        third, metrics = self.run_with_service(scenario, job=slow_job, concurrency=1, queue_size=2)
+        self.assertEqual(third[1][-1]["event"], "done")
+        self.assertEqual((metrics["accepted"], metrics["dropped"], metrics["completed"]), (3, 1, 2))
+
+    @unittest.skipUnless(os.path.exists(IMAGE), "Beispielbild fehlt")
+    def test_solves_photo(self):
+        with open(IMAGE, "rb") as f:
+            data = f.read()
+
+        async def scenario(service):
+            return await request(service.port, "POST", "/solve", data)
+
+        status, lines = self.run_with_service(scenario, concurrency=1)
+        self.assertEqual(status, 200)
+        placements = [l for l in lines if l["event"] == "placement"]
+        self.assertTrue(placements)
+        self.assertEqual(lines[-1]["event"], "done")
+        self.assertEqual(len(lines[-1]["layout"]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
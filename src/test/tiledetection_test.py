@@ -0,0 +1,103 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import unittest
+import cv2 as cv
+import numpy as np
+from edgedetection import EdgeDetection
+from TileDetection import TileDetection, StripDetection, otsu_from_histogram
+
+IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../Data/puzzle_3d_1.jpg")
+
+
+def _scene():
+    # Vier dunkle Teile auf hellem Grund; Teil 1 liegt genau auf der Kachelnaht
+    img = np.full((400, 600, 3), 230, np.uint8)
+    cv.rectangle(img, (40, 40), (180, 150), (20, 20, 20), -1)
+    cv.circle(img, (300, 200), 70, (20, 20, 20), -1)
+    cv.rectangle(img, (420, 260), (560, 370), (20, 20, 20), -1)
+    cv.ellipse(img, (120, 300), (60, 40), 30, 0, 360, (20, 20, 20), -1)
+    return img
+
+
+def _tiles(img, overlap):
+    h, w = img.shape[:2]
+    tw, th = (w + overlap) // 2, (h + overlap) // 2
+    frames, transforms = [], []
+    for r in range(2):
+        for c in range(2):
+            x0, y0 = c * (w - tw), r * (h - th)
+            frames.append(img[y0:y0 + th, x0:x0 + tw].copy())
+            transforms.append(np.array([[1, 0, x0], [0, 1, y0], [0, 0, 1]], float))
+    return frames, transforms
+
+
+class TestTileDetection(unittest.TestCase):
+
+    def setUp(self):
+        self.img = _scene()
+        det = EdgeDetection.from_image(self.img)
+        det.find_contours()
+        det.filter_contours()
+        self.reference = det.get_puzzle_pieces()
+
+    def _check(self, overlap):
+        frames, transforms = _tiles(self.img, overlap)
+        pieces = TileDetection(workers=1).detect(frames, transforms)
+        self.assertEqual(len(pieces), len(self.reference))
+        for p, ref in zip(pieces, self.reference):
+            self.assertEqual(p.index, ref.index)
+            np.testing.assert_allclose(p.bounding_box, ref.bounding_box, atol=1)
+            self.assertAlmostEqual(p.area, ref.area, delta=0.01 * ref.area)
+
+    def test_seams_without_overlap(self):
+        self._check(overlap=0)
+
+    def test_duplicates_in_overlap(self):
+        self._check(overlap=80)
+
+    def test_parallel_matches_sequential(self):
+        frames, transforms = _tiles(self.img, 40)
+        seq = TileDetection(workers=1).detect(frames, transforms)
+        par = TileDetection(workers=2).detect(frames, transforms)
+        self.assertEqual([p.bounding_box for p in seq], [p.bounding_box for p in par])
+
+
+class TestStripDetection(unittest.TestCase):
+
+    def setUp(self):
+        self.img = _scene()
+        self.gray = cv.GaussianBlur(cv.cvtColor(self.img, cv.COLOR_BGR2GRAY), (5, 5), 0)
+
+    def test_streaming_otsu_matches_opencv(self):
+        strips = StripDetection(strip_rows=37)
+        expected, _ = cv.threshold(self.gray, 0, 255, cv.THRESH_BINARY_INV + cv.THRESH_OTSU)
+        hist = strips.histogram(self.img)
+        np.testing.assert_array_equal(hist, np.bincount(self.gray.ravel(), minlength=256))
+        self.assertEqual(otsu_from_histogram(hist), int(expected))
+
+    def test_strips_match_full_image(self):
+        det = EdgeDetection.from_image(self.img)
+        full = det.find_contours()
+        for rows, overlap in ((50, 10), (64, 0)):
+            tiled = StripDetection(strip_rows=rows, overlap=overlap, min_area=0).contours(self.img)
+            self.assertEqual(len(tiled), len(full))
+            for a, b in zip(full, tiled):
+                self.assertEqual(cv.boundingRect(a), cv.boundingRect(b))
+                self.assertAlmostEqual(cv.contourArea(a), cv.contourArea(b), delta=0.01 * cv.contourArea(a))
+
+    @unittest.skipUnless(os.path.exists(IMAGE), "Beispielbild fehlt")
+    def test_same_piece_indices_on_photo(self):
+        full = EdgeDetection(IMAGE).load()
+        full.find_contours()
+        full.filter_contours()
+        strips = EdgeDetection(IMAGE)
+        strips.find_contours_tiled(strip_rows=256, overlap=64)
+        strips.filter_contours()
+        self.assertEqual([(p.index, p.bounding_box) for p in strips.get_puzzle_pieces()],
+                         [(p.index, p.bounding_box) for p in full.get_puzzle_pieces()])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import logging
+import shutil
+import tempfile
+import unittest
+import cv2 as cv
+from GlobalArea import GlobalArea
+from Pipeline import Pipeline
+from visualizer import Visualizer
+
+IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../Data/puzzle_selfmade_black.jpeg")
+
+
+@unittest.skipUnless(os.path.exists(IMAGE), "Beispielbild fehlt")
+class TestHeadlessRendering(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.WARNING)
+        pipeline = Pipeline(IMAGE)
+        cls.image = pipeline.get("load")
+        cls.pieces = pipeline.get("segment")
+        match = pipeline.get("match")
+        cls.matches, cls.artifact = match["matches"], match["artifact"]
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _ga(self):
+        ga = GlobalArea()
+        ga.set_unsolved_puzzles(self.pieces)
+        ga.set_solved_puzzles(self.pieces)
+        return ga
+
+    def _assert_image(self, path):
+        self.assertTrue(os.path.isfile(path), path)
+        self.assertGreater(os.path.getsize(path), 0)
+        img = cv.imread(path)
+        self.assertIsNotNone(img, path)
+        self.assertGreater(min(img.shape[:2]), 10)
+
+    def test_match_gallery(self):
+        self.assertGreater(len(self.matches), 0)
+        path = Visualizer.save_match_gallery(os.path.join(self.tmp, "matches.png"), self.matches, self.pieces,
+                                             artifact=self.artifact)
+        self._assert_image(path)
+
+    def test_global_area_save(self):
+        self._assert_image(self._ga().save(os.path.join(self.tmp, "ga.png")))
+
+    def test_render_diagnostics(self):
+        # einmal im Prozess, einmal über den ProcessPoolExecutor
+        for workers in (1, None):
+            out = os.path.join(self.tmp, f"diag_{workers}")
+            paths = Visualizer.render_diagnostics(out, self.pieces, self.matches, self.image, ga=self._ga(),
+                                                  workers=workers, artifact=self.artifact)
+            self.assertEqual([os.path.basename(p) for p in paths],
+                             ["edges_grid.png", "matches.png", "global_area.png"])
+            for path in paths:
+                self._assert_image(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,105 +1,157 @@
+import os
 import cv2 as cv
 import numpy as np
-import matplotlib.pyplot as plt
 import math
+from concurrent.futures import ProcessPoolExecutor
 from edgecomparator import EdgeComparator
+from matchartifact import MatchArtifact
+
+EDGE_COLORS = [
+    (0, 255, 255),  # top
+    (255, 0, 255),  # right
+    (255, 255, 0),  # bottom
+    (0, 165, 255)   # left
+]
+
+
+def _agg_figure(figsize):
+    """Figure on the Agg canvas, independent of the pyplot GUI backend."""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _render_job(job):
+    """Top-level so it can run in a worker process."""
+    kind, path, args = job
+    if kind == "edges_grid":
+        cv.imwrite(path, Visualizer.edges_grid_canvas(*args))
+    elif kind == "match_gallery":
+        Visualizer.save_match_gallery(path, *args)
+    elif kind == "global_area":
+        args[0].save(path)
+    return path
+
 
 class Visualizer:
 
     @staticmethod
-    def show_matches(matches, pieces):
-        piece_map = {p.index: p for p in pieces}
-
-        for i, match in enumerate(matches):
-            pa = piece_map[match["piece_a"]]
-            pb = piece_map[match["piece_b"]]
+    def _artifact(pieces, artifact):
+        # Ohne Artefakt einmal aus den bereits segmentierten Teilen aufbauen (nur lesend)
+        return artifact if artifact is not None else MatchArtifact.from_pieces(pieces)
 
-            edge_a = pa.edges[match["edge_a"]]["points"]
-            edge_b = pb.edges[match["edge_b"]]["points"]
+    @staticmethod
+    def _match_curves(match, piece_map, artifact):
+        """Resampled edge A and the mirrored edge B in the direction the matcher chose."""
+        pa = piece_map[match["piece_a"]]
+        pb = piece_map[match["piece_b"]]
 
-            comp = EdgeComparator(edge_a, edge_b)
-            
-            A_norm = comp._normalize_geometry(np.array(edge_a))
-            B_norm = comp._normalize_geometry(np.array(edge_b))
-            
-            A_res = comp._resample_edge(A_norm)
-            B_res = comp._resample_edge(B_norm)
+        A_res = artifact.descriptors[(pa.index, match["edge_a"])]
+        B_res = artifact.descriptors[(pb.index, match["edge_b"])]
+        B_plot = EdgeComparator.mirrored(B_res, artifact.direction(match))
+        return pa, pb, A_res, B_plot
 
-            B_inv = B_res.copy()
-            B_inv[:, 1] *= -1
-            
-            dist1 = np.linalg.norm(A_res - B_inv)
+    @staticmethod
+    def _draw_match(ax, i, match, piece_map, artifact, legend=True):
+        pa, pb, A_res, B_plot = Visualizer._match_curves(match, piece_map, artifact)
+        ax.plot(A_res[:, 0], A_res[:, 1], "b-", lw=3, label=f"Teil {pa.index} (Kante {match['edge_a']})")
+        ax.plot(B_plot[:, 0], B_plot[:, 1], "r--", lw=3, label=f"Teil {pb.index} (Kante {match['edge_b']}, gespiegelt)")
+
+        ax.set_title(f"Match {i+1}: Score = {match['score']:.4f}")
+        ax.set_aspect("equal")
+        if legend:
+            ax.legend()
+        ax.grid(True)
+        ax.set_ylim(-0.6, 0.6)
 
-            B_inv_rev = B_inv[::-1].copy()
-            B_inv_rev[:, 0] = 1.0 - B_inv_rev[:, 0]
-            dist2 = np.linalg.norm(A_res - B_inv_rev)
+    @staticmethod
+    def show_matches(matches, pieces, artifact=None):
+        import matplotlib.pyplot as plt
 
-            B_plot = B_inv_rev if dist2 < dist1 else B_inv
+        piece_map = {p.index: p for p in pieces}
+        artifact = Visualizer._artifact(pieces, artifact)
 
+        for i, match in enumerate(matches):
             fig, ax = plt.subplots(figsize=(8, 4))
-            ax.plot(A_res[:, 0], A_res[:, 1], "b-", lw=3, label=f"Teil {pa.index} (Kante {match['edge_a']})")
-            ax.plot(B_plot[:, 0], B_plot[:, 1], "r--", lw=3, label=f"Teil {pb.index} (Kante {match['edge_b']}, gespiegelt)")
-            
-            ax.set_title(f"Match {i+1}: Score = {match['score']:.4f}")
-            ax.set_aspect("equal")
-            ax.legend()
-            ax.grid(True)
-            ax.set_ylim(-0.6, 0.6) 
+            Visualizer._draw_match(ax, i, match, piece_map, artifact)
             plt.show()
 
     @staticmethod
-    def show_all_edges(pieces, image=None):
-        #Zeigt jedes Puzzle-Teil mit Kanten, Ecken und Nummer in der Mitte.
+    def save_match_gallery(path, matches, pieces, cols=3, artifact=None):
+        """All matches as subplots of one figure, written to path (no GUI)."""
+        piece_map = {p.index: p for p in pieces}
+        artifact = Visualizer._artifact(pieces, artifact)
+        n = max(len(matches), 1)
+        cols = min(cols, n)
+        rows = math.ceil(n / cols)
 
-        colors = [
-            (0, 255, 255),  # top
-            (255, 0, 255),  # right
-            (255, 255, 0),  # bottom
-            (0, 165, 255)   # left
-        ]
+        fig = _agg_figure((5 * cols, 2.8 * rows))
+        for i, match in enumerate(matches):
+            ax = fig.add_subplot(rows, cols, i + 1)
+            Visualizer._draw_match(ax, i, match, piece_map, artifact, legend=False)
+            ax.legend(fontsize=7, loc="lower right")
+        fig.tight_layout()
+        fig.savefig(path, dpi=100)
+        return path
 
+    @staticmethod
+    def _piece_tile(piece, artifact, image=None):
+        #Ein Puzzle-Teil mit Kanten, Ecken und Nummer in der Mitte.
+        x, y, w, h = piece.bounding_box
+        tile = np.zeros((h + 20, w + 20, 3), dtype=np.uint8)
+        if image is not None:
+            tile[10:10+h, 10:10+w] = image[y:y+h, x:x+w]
+
+        edges = artifact.edges.get(piece.index, [])
+        for i, pts in enumerate(edges):
+            if len(pts):
+                pts_rel = [(p[0]-x+10, p[1]-y+10) for p in pts]
+                cv.polylines(tile, [np.array(pts_rel, dtype=np.int32)], isClosed=False, color=EDGE_COLORS[i % 4], thickness=2)
+
+        # Ecken einzeichnen
+        corners = artifact.corners.get(piece.index, [])
+        for j, c in enumerate(corners):
+            cx, cy = c
+            cv.circle(tile, (cx - x + 10, cy - y + 10), 5, (0, 0, 255), -1)
+            cv.putText(tile, f"{j+1}", (cx - x + 12, cy - y + 5), cv.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+        # Nummer in der Mitte
+        cx, cy = piece.center_point
+        cv.circle(tile, (cx - x + 10, cy - y + 10), 7, (0, 255, 0), -1)
+        cv.putText(tile, str(piece.index), (cx - x + 3, cy - y + 5), cv.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        return tile
+
+    @staticmethod
+    def show_all_edges(pieces, image=None, artifact=None):
+        #Zeigt jedes Puzzle-Teil mit Kanten, Ecken und Nummer in der Mitte.
+        artifact = Visualizer._artifact(pieces, artifact)
         for piece in pieces:
-            x, y, w, h = piece.bounding_box
-            canvas = np.zeros((h + 20, w + 20, 3), dtype=np.uint8)
-            if image is not None:
-                canvas[10:10+h, 10:10+w] = image[y:y+h, x:x+w]
-
-            edges = piece.get_puzzle_edges()
-            for i, edge in enumerate(edges):
-                pts = edge.get("points", [])
-                if pts:
-                    pts_rel = [(p[0]-x+10, p[1]-y+10) for p in pts]
-                    cv.polylines(canvas, [np.array(pts_rel, dtype=np.int32)], isClosed=False, color=colors[i % 4], thickness=2)
-
-            # Ecken einzeichnen
-            corners = piece.get_best_4_corners()
-            for j, c in enumerate(corners):
-                cx, cy = c
-                cv.circle(canvas, (cx - x + 10, cy - y + 10), 5, (0, 0, 255), -1)
-                cv.putText(canvas, f"{j+1}", (cx - x + 12, cy - y + 5), cv.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-
-            # Nummer in der Mitte
-            cx, cy = piece.center_point
-            cv.circle(canvas, (cx - x + 10, cy - y + 10), 7, (0, 255, 0), -1)
-            cv.putText(canvas, str(piece.index), (cx - x + 3, cy - y + 5), cv.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-
-            cv.imshow(f"Puzzle {piece.index} Edges", canvas)
+            cv.imshow(f"Puzzle {piece.index} Edges", Visualizer._piece_tile(piece, artifact, image))
 
         cv.waitKey(0)
         cv.destroyAllWindows()
 
     @staticmethod
-    def show_all_edges_grid(pieces, image=None, padding=20):
+    def save_all_edges(out_dir, pieces, image=None, artifact=None):
+        """Wie show_all_edges, aber je Teil eine PNG-Datei in out_dir."""
+        os.makedirs(out_dir, exist_ok=True)
+        artifact = Visualizer._artifact(pieces, artifact)
+        paths = []
+        for piece in pieces:
+            path = os.path.join(out_dir, f"piece_{piece.index}_edges.png")
+            cv.imwrite(path, Visualizer._piece_tile(piece, artifact, image))
+            paths.append(path)
+        return paths
+
+    @staticmethod
+    def edges_grid_canvas(pieces, image=None, padding=20, artifact=None):
         """
-        Zeigt alle Puzzle-Teile in einem Raster mit Kanten, Ecken und Nummern wie show_all_edges.
+        Alle Puzzle-Teile in einem Raster mit Kanten, Ecken und Nummern wie show_all_edges.
         """
-        colors = [
-            (0, 255, 255),  # top
-            (255, 0, 255),  # right
-            (255, 255, 0),  # bottom
-            (0, 165, 255)   # left
-        ]
-
+        artifact = Visualizer._artifact(pieces, artifact)
         n = len(pieces)
         cols = math.ceil(np.sqrt(n))
         rows = math.ceil(n / cols)
@@ -115,32 +167,40 @@ class Visualizer:
             x_offset = col * max_w
             y_offset = row * max_h
 
-            x, y, w, h = piece.bounding_box
-            tile = np.zeros((h + 20, w + 20, 3), dtype=np.uint8)
-            if image is not None:
-                tile[10:10+h, 10:10+w] = image[y:y+h, x:x+w]
-
-            edges = piece.get_puzzle_edges()
-            for i, edge in enumerate(edges):
-                pts = edge.get("points", [])
-                if pts:
-                    pts_rel = [(p[0]-x+10, p[1]-y+10) for p in pts]
-                    cv.polylines(tile, [np.array(pts_rel, dtype=np.int32)], isClosed=False, color=colors[i % 4], thickness=2)
-
-            corners = piece.get_best_4_corners()
-            for j, c in enumerate(corners):
-                cx, cy = c
-                cv.circle(tile, (cx - x + 10, cy - y + 10), 5, (0, 0, 255), -1)
-                cv.putText(tile, f"{j+1}", (cx - x + 12, cy - y + 5), cv.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-
-            # Nummer in der Mitte
-            cx, cy = piece.center_point
-            cv.circle(tile, (cx - x + 10, cy - y + 10), 7, (0, 255, 0), -1)
-            cv.putText(tile, str(piece.index), (cx - x + 3, cy - y + 5), cv.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-
+            tile = Visualizer._piece_tile(piece, artifact, image)
             th, tw = tile.shape[:2]
             canvas[y_offset:y_offset+th, x_offset:x_offset+tw] = tile
 
+        return canvas
+
+    @staticmethod
+    def show_all_edges_grid(pieces, image=None, padding=20, artifact=None):
+        """
+        Zeigt alle Puzzle-Teile in einem Raster mit Kanten, Ecken und Nummern wie show_all_edges.
+        """
+        canvas = Visualizer.edges_grid_canvas(pieces, image, padding, artifact)
         cv.imshow("Alle Puzzleteile mit erkannten Konturen und Ecken", canvas)
         cv.waitKey(0)
         cv.destroyAllWindows()
+
+    @staticmethod
+    def render_diagnostics(out_dir, pieces, matches, image=None, ga=None, workers=None, artifact=None):
+        """
+        Alle Diagnosebilder eines Laufs als PNG nach out_dir, ohne GUI.
+
+        Edge-Raster, Match-Galerie und GlobalArea sind unabhängig und werden
+        parallel in Worker-Prozessen gerendert. Gibt die geschriebenen Pfade zurück.
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        artifact = Visualizer._artifact(pieces, artifact)
+        jobs = [
+            ("edges_grid", os.path.join(out_dir, "edges_grid.png"), (pieces, image, 20, artifact)),
+            ("match_gallery", os.path.join(out_dir, "matches.png"), (matches, pieces, 3, artifact)),
+        ]
+        if ga is not None:
+            jobs.append(("global_area", os.path.join(out_dir, "global_area.png"), (ga,)))
+
+        if workers == 1:
+            return [_render_job(job) for job in jobs]
+        with ProcessPoolExecutor(max_workers=workers or len(jobs)) as pool:
+            return list(pool.map(_render_job, jobs))